@@ -0,0 +1,305 @@
+import hashlib
+import zipfile
+import random
+import json
+import io
+import os
+import sys
+from bench.servers import json_body
+
+# Upstream hosts the Mojang stand-in answers for, each under its own path prefix
+MOJANG_HOSTS = {
+    "piston-meta": "https://piston-meta.mojang.com",
+    "piston-data": "https://piston-data.mojang.com",
+    "libraries": "https://libraries.minecraft.net",
+    "resources": "https://resources.download.minecraft.net",
+    "fabric-meta": "https://meta.fabricmc.net",
+    "quilt-meta": "https://meta.quiltmc.org",
+    "forge-files": "https://files.minecraftforge.net",
+}
+GAME_VERSION = "1.20.1"
+OLDER_VERSIONS = ["1.20", "1.19.4", "1.19.2", "1.18.2"]
+
+_WORDS = ["Sodium", "Lithium", "Iris", "Craft", "Tweaks", "Storage", "Map", "Shader", "Tech", "Magic",
+          "Mobs", "Biomes", "Chat", "Sound", "Light", "Inventory", "Armor", "Tools", "Redstone", "Farm"]
+_BASE62 = "0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+def _blob(rng, size):
+    return rng.getrandbits(size * 8).to_bytes(size, "little") if size else b""
+
+
+def _octets(data):
+    return data, "application/octet-stream"
+
+
+class MojangWorld:
+    """A game version with a client jar, libraries and assets of random content, plus the
+    version manifest and the Fabric/Quilt/Forge version lists, as served by Mojang's hosts."""
+
+    def __init__(self, assets=1500, asset_size=8 * 1024, libraries=30, library_size=256 * 1024,
+                 client_size=4 * 1024 * 1024, version_id=GAME_VERSION, seed=1):
+        rng = random.Random(seed)
+        self.version_id = version_id
+        self.routes = {}
+
+        client = _blob(rng, client_size)
+        client_sha1 = self._add(f"https://piston-data.mojang.com/v1/objects/{{sha1}}/client.jar", client)
+
+        libs = []
+        for i in range(libraries):
+            data = _blob(rng, rng.randint(library_size // 4, library_size * 7 // 4))
+            path = f"com/bench/lib{i}/1.0/lib{i}-1.0.jar"
+            url = f"https://libraries.minecraft.net/{path}"
+            libs.append({"name": f"com.bench:lib{i}:1.0", "downloads": {"artifact": {
+                "path": path, "sha1": self._add(url, data), "size": len(data), "url": url}}})
+
+        objects = {}
+        for i in range(assets):
+            data = _blob(rng, rng.randint(asset_size // 4, asset_size * 7 // 4))
+            sha1 = hashlib.sha1(data).hexdigest()
+            self._add(f"https://resources.download.minecraft.net/{sha1[:2]}/{sha1}", data)
+            objects[f"minecraft/bench/asset{i}.bin"] = {"hash": sha1, "size": len(data)}
+        index = json.dumps({"objects": objects}).encode("utf-8")
+        index_sha1 = self._add("https://piston-meta.mojang.com/v1/packages/{sha1}/5.json", index, "application/json")
+
+        version = json.dumps({
+            "id": version_id,
+            "type": "release",
+            "mainClass": "net.minecraft.client.main.Main",
+            "minecraftArguments": "--username ${auth_player_name} --version ${version_name} --gameDir ${game_directory} "
+                                  "--assetsDir ${assets_root} --assetIndex ${assets_index_name} --uuid ${auth_uuid} "
+                                  "--accessToken ${auth_access_token} --userType ${user_type}",
+            "releaseTime": "2023-06-12T13:25:51+00:00",
+            "time": "2023-06-12T13:25:51+00:00",
+            "complianceLevel": 1,
+            "assets": "5",
+            "assetIndex": {"id": "5", "sha1": index_sha1, "size": len(index),
+                           "totalSize": sum(o["size"] for o in objects.values()),
+                           "url": f"https://piston-meta.mojang.com/v1/packages/{index_sha1}/5.json"},
+            "downloads": {"client": {"sha1": client_sha1, "size": len(client),
+                                     "url": f"https://piston-data.mojang.com/v1/objects/{client_sha1}/client.jar"}},
+            "libraries": libs,
+        }).encode("utf-8")
+        version_sha1 = self._add(f"https://piston-meta.mojang.com/v1/packages/{{sha1}}/{version_id}.json", version, "application/json")
+
+        entries = [{"id": version_id, "type": "release", "sha1": version_sha1, "complianceLevel": 1,
+                    "url": f"https://piston-meta.mojang.com/v1/packages/{version_sha1}/{version_id}.json",
+                    "time": "2023-06-12T13:25:51+00:00", "releaseTime": "2023-06-12T13:25:51+00:00"}]
+        # Listed but not served: enough for version validation and suggestions
+        for i, vid in enumerate(OLDER_VERSIONS):
+            entries.append({"id": vid, "type": "release", "sha1": "0" * 40, "complianceLevel": 1,
+                            "url": f"https://piston-meta.mojang.com/v1/packages/{'0' * 40}/{vid}.json",
+                            "time": f"2022-0{i + 1}-01T00:00:00+00:00", "releaseTime": f"2022-0{i + 1}-01T00:00:00+00:00"})
+        self._add("https://piston-meta.mojang.com/mc/game/version_manifest_v2.json",
+                  json.dumps({"latest": {"release": version_id, "snapshot": version_id}, "versions": entries}).encode("utf-8"),
+                  "application/json")
+
+        game_versions = [{"version": e["id"], "stable": True} for e in entries]
+        for host, api in (("https://meta.fabricmc.net", "v2"), ("https://meta.quiltmc.org", "v3")):
+            self.routes[self.local(f"{host}/{api}/versions/game")] = json_body(game_versions)
+            self.routes[self.local(f"{host}/{api}/versions/loader")] = json_body([{"version": "0.14.21", "stable": True}])
+        self.routes[self.local("https://files.minecraftforge.net/net/minecraftforge/forge/maven-metadata.json")] = \
+            json_body({version_id: [f"{version_id}-47.1.0", f"{version_id}-47.2.0"]})
+
+        self.files = 1 + libraries + assets
+        self.total_bytes = len(client) + sum(l["downloads"]["artifact"]["size"] for l in libs) + \
+            sum(o["size"] for o in objects.values())
+
+    @staticmethod
+    def local(url):
+        for name, prefix in MOJANG_HOSTS.items():
+            if url.startswith(prefix):
+                return "/" + name + url[len(prefix):]
+        raise ValueError(f"No stand-in host for {url}")
+
+    def _add(self, url, data, content_type="application/octet-stream"):
+        """Serves data at url ({sha1} is filled in with its hash). Returns the hash."""
+        sha1 = hashlib.sha1(data).hexdigest()
+        self.routes[self.local(url.format(sha1=sha1))] = (data, content_type)
+        return sha1
+
+    @staticmethod
+    def mirrors(base_url):
+        """Downloader mirrors that send every upstream host to the stand-in at base_url."""
+        return {prefix: f"{base_url}/{name}" for name, prefix in MOJANG_HOSTS.items()}
+
+
+class ModrinthWorld:
+    """Projects, versions and jars behind a stand-in for the Modrinth v2 API.
+
+    The first `libraries` projects are library mods that others require, as Fabric API is."""
+
+    def __init__(self, projects=60, versions_per_project=3, jar_size=128 * 1024, libraries=4, seed=2):
+        rng = random.Random(seed)
+        self.routes = {}
+        self.base_url = ""  # Set once the server is up, file URLs are absolute
+        self.projects = {}
+        self.slugs = {}
+        self.versions = {}
+        self.by_hash = {}
+        self.libraries = []
+        game_versions = OLDER_VERSIONS[:versions_per_project - 1][::-1] + [GAME_VERSION]
+
+        for i in range(projects):
+            pid = "".join(rng.choice(_BASE62) for _ in range(8))
+            title = f"{rng.choice(_WORDS)} {rng.choice(_WORDS)} {i}"
+            slug = title.lower().replace(" ", "-")
+            loaders = ["forge"] if i % 5 == 4 else ["fabric", "quilt"]
+            project = {"id": pid, "slug": slug, "title": title, "project_type": "mod",
+                       "description": f"{title} for benchmarking", "author": f"author{i % 7}",
+                       "downloads": rng.randint(1000, 10 ** 7), "loaders": loaders,
+                       "game_versions": game_versions, "versions": []}
+            depends = [] if i < libraries else [self.libraries[rng.randrange(libraries)]]
+            for k, gv in enumerate(game_versions):
+                vid = "".join(rng.choice(_BASE62) for _ in range(8))
+                number = f"1.{k}.0+{gv}"
+                jar = self._jar(rng, slug, number, jar_size)
+                filename = f"{slug}-{number}.jar"
+                path = f"/data/{pid}/versions/{vid}/{filename}"
+                self.routes[path] = _octets(jar)
+                hashes = {"sha1": hashlib.sha1(jar).hexdigest(), "sha512": hashlib.sha512(jar).hexdigest()}
+                self.versions[vid] = {
+                    "id": vid, "project_id": pid, "name": number, "version_number": number,
+                    "game_versions": [gv], "loaders": loaders, "version_type": "release",
+                    "date_published": f"202{k}-01-01T00:00:00Z",
+                    "dependencies": [{"project_id": d, "version_id": None, "dependency_type": "required"} for d in depends],
+                    "files": [{"path": path, "filename": filename, "primary": True, "size": len(jar), "hashes": hashes}],
+                }
+                self.by_hash[hashes["sha1"]] = vid
+                project["versions"].append(vid)
+            self.projects[pid] = project
+            self.slugs[slug] = pid
+            if i < libraries:
+                self.libraries.append(pid)
+
+    @staticmethod
+    def _jar(rng, slug, number, size):
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w", zipfile.ZIP_STORED) as z:
+            z.writestr("fabric.mod.json", json.dumps({"schemaVersion": 1, "id": slug.replace("-", "_"), "version": number}))
+            z.writestr("assets/pad.bin", _blob(rng, size))
+        return buf.getvalue()
+
+    def compatible(self, loader="fabric", game_version=GAME_VERSION, include_libraries=False):
+        """Slugs of projects with a version for the target, libraries excluded unless asked for."""
+        return [p["slug"] for p in self.projects.values()
+                if loader in p["loaders"] and (include_libraries or p["id"] not in self.libraries)
+                and game_version in p["game_versions"]]
+
+    def _versions(self, project):
+        return [self.versions[vid] for vid in project["versions"]]
+
+    def _project(self, key):
+        return self.projects.get(key) or self.projects.get(self.slugs.get(key))
+
+    def _version(self, vid):
+        v = dict(self.versions[vid])
+        v["files"] = [dict(f, url=self.base_url + f["path"]) for f in v["files"]]
+        for f in v["files"]:
+            del f["path"]
+        return v
+
+    def _search(self, query):
+        text = query.get("query", "").lower()
+        facets = [f for group in json.loads(query.get("facets", "[]")) for f in group]
+        hits = []
+        for p in self.projects.values():
+            if text and text not in p["title"].lower() and text not in p["description"].lower():
+                continue
+            ok = True
+            for facet in facets:
+                key, _, value = facet.partition(":")
+                if key == "versions" and value not in p["game_versions"]:
+                    ok = False
+                elif key == "categories" and value not in p["loaders"]:
+                    ok = False
+                elif key == "project_type" and value != p["project_type"]:
+                    ok = False
+            if ok:
+                hits.append(p)
+        hits.sort(key=lambda p: p["downloads"], reverse=True)
+        offset, limit = int(query.get("offset", 0)), int(query.get("limit", 10))
+        page = [{"project_id": p["id"], "slug": p["slug"], "title": p["title"], "author": p["author"],
+                 "description": p["description"], "downloads": p["downloads"], "categories": p["loaders"],
+                 "versions": p["game_versions"], "project_type": p["project_type"]} for p in hits[offset:offset + limit]]
+        return {"hits": page, "offset": offset, "limit": limit, "total_hits": len(hits)}
+
+    def handle(self, method, path, query, body):
+        """Route handler for FakeServer: the v2 endpoints the launcher uses."""
+        parts = path.strip("/").split("/")
+        if parts[0] != "v2":
+            return None
+        parts = parts[1:]
+        if method == "POST":
+            request = json.loads(body or b"{}")
+            found = {h: self.by_hash[h] for h in request.get("hashes", []) if h in self.by_hash}
+            if parts == ["version_files"]:
+                return json_body({h: self._version(vid) for h, vid in found.items()})
+            if parts == ["version_files", "update"]:
+                result = {}
+                for h, vid in found.items():
+                    candidates = [v for v in self._versions(self.projects[self.versions[vid]["project_id"]])
+                                  if (not request.get("loaders") or set(request["loaders"]) & set(v["loaders"]))
+                                  and (not request.get("game_versions") or set(request["game_versions"]) & set(v["game_versions"]))]
+                    if candidates:
+                        result[h] = self._version(max(candidates, key=lambda v: v["date_published"])["id"])
+                return json_body(result)
+            return None
+
+        if parts == ["search"]:
+            return json_body(self._search(query))
+        if parts == ["projects"]:
+            return json_body([p for p in map(self._project, json.loads(query["ids"])) if p])
+        if parts == ["versions"]:
+            return json_body([self._version(vid) for vid in json.loads(query["ids"]) if vid in self.versions])
+        if len(parts) == 2 and parts[0] == "version" and parts[1] in self.versions:
+            return json_body(self._version(parts[1]))
+        if len(parts) >= 2 and parts[0] == "project":
+            project = self._project(parts[1])
+            if project is None:
+                return None
+            if len(parts) == 2:
+                return json_body(project)
+            if parts[2:] == ["version"]:
+                loaders = set(json.loads(query.get("loaders", "[]")))
+                game_versions = set(json.loads(query.get("game_versions", "[]")))
+                versions = [self._version(v["id"]) for v in reversed(self._versions(project))
+                            if (not loaders or loaders & set(v["loaders"]))
+                            and (not game_versions or game_versions & set(v["game_versions"]))]
+                return json_body(versions)
+        return None
+
+
+FAKE_JAVA = '''import sys
+args = sys.argv[1:]
+if "-version" in args:
+    if "-XshowSettings:properties" in args:
+        sys.stderr.write("Property settings:\\n"
+                         "    java.specification.version = {major}\\n"
+                         "    java.version = {major}.0.8\\n"
+                         "    java.vendor = Bench\\n"
+                         "    os.arch = amd64\\n"
+                         "    sun.arch.data.model = 64\\n")
+    if "-XX:+PrintFlagsFinal" in args:
+        for flag in {flags!r}:
+            print("     bool %-40s = false    {{product}} {{default}}" % flag)
+    sys.stderr.write('openjdk version "{major}.0.8"\\n')
+else:
+    print("[00:00:00] [Render thread/INFO]: Setting user: Bench")
+'''
+
+FAKE_JAVA_FLAGS = ["AlwaysPreTouch", "ArchiveClassesAtExit", "DisableExplicitGC", "G1HeapRegionSize",
+                   "G1MaxNewSizePercent", "G1NewSizePercent", "G1ReservePercent", "MaxGCPauseMillis",
+                   "ParallelRefProcEnabled", "PerfDisableSharedMem", "SharedArchiveFile", "UseG1GC",
+                   "UseStringDeduplication", "UseZGC"]
+
+
+def write_fake_java(directory, major=17):
+    """Writes an executable that answers the launcher's JVM probe like a Java `major` runtime."""
+    path = os.path.join(directory, "bin", "java")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"#!{sys.executable}\n" + FAKE_JAVA.format(major=major, flags=FAKE_JAVA_FLAGS))
+    os.chmod(path, 0o755)
+    return path
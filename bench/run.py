@@ -0,0 +1,278 @@
+"""Offline benchmark suite: installs, mod search and install, and launch command building against
+local stand-ins for Mojang's and Modrinth's servers and a fake java.
+
+    python -m bench.run                      # run, write bench/results.json, compare to bench/baseline.json
+    python -m bench.run --save-baseline      # run and store the results as the new baseline
+    python -m bench.run --latency 50 --bandwidth 2048 --failure-rate 0.05
+"""
+from contextlib import redirect_stdout
+import statistics
+import platform
+import argparse
+import tempfile
+import shutil
+import time
+import json
+import sys
+import io
+import os
+from bench.servers import FakeServer, Conditions
+from bench.fixtures import MojangWorld, ModrinthWorld, GAME_VERSION, write_fake_java
+from core.launcher import NanoCore
+from core.mods import ModManager
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, "results.json")
+SEARCH_QUERIES = ["", "craft", "sodium", "map", "tech", "light", "storage", "mobs"]
+LAUNCH_RUNS = 20
+
+# (benchmark, metric, higher is better) checked against the baseline
+COMPARED = [
+    ("install_cold", "ms", False),
+    ("install_cold", "mb_per_s", True),
+    ("install_warm", "ms", False),
+    ("search_cold", "median_ms", False),
+    ("search_cold", "p95_ms", False),
+    ("search_cached", "median_ms", False),
+    ("mod_install_single", "median_ms", False),
+    ("mods_bulk_install", "ms", False),
+    ("launch_build_cold", "ms", False),
+    ("launch_build_warm", "median_ms", False),
+]
+
+
+class Bench:
+    """One suite run: both stand-in servers, a fake java and a scratch directory."""
+
+    def __init__(self, args):
+        self.args = args
+        self.root = tempfile.mkdtemp(prefix="nano-bench-")
+        conditions = dict(latency=args.latency / 1000, bandwidth=args.bandwidth * 1024 if args.bandwidth else None,
+                          failure_rate=args.failure_rate, truncate_rate=args.truncate_rate)
+        self.mojang_world = MojangWorld(assets=args.assets)
+        self.modrinth_world = ModrinthWorld(projects=args.mods)
+        self.mojang = FakeServer("mojang", self.mojang_world.routes, conditions=Conditions(seed=1, **conditions)).start()
+        self.modrinth = FakeServer("modrinth", self.modrinth_world.routes, self.modrinth_world.handle,
+                                   Conditions(seed=2, **conditions))
+        self.modrinth_world.base_url = self.modrinth.url
+        self.modrinth.start()
+        self.mirrors = MojangWorld.mirrors(self.mojang.url)
+        self.api_url = self.modrinth.url + "/v2"
+        self.java = write_fake_java(os.path.join(self.root, "java"))
+
+    def directory(self, name):
+        path = os.path.join(self.root, name)
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+        return path
+
+    def quiet(self):
+        # The launcher reports progress with print
+        return redirect_stdout(sys.stdout if self.args.verbose else io.StringIO())
+
+    def close(self):
+        self.mojang.stop()
+        self.modrinth.stop()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def _latencies(values):
+    values = sorted(values)
+    return {"median_ms": _ms(statistics.median(values)),
+            "p95_ms": _ms(values[min(len(values) - 1, int(len(values) * 0.95))]),
+            "samples": len(values)}
+
+
+def bench_install(b):
+    """Cold install into an empty game directory, then the same install again."""
+    game_directory = b.directory("install")
+    b.mojang.reset_stats()
+    with b.quiet():
+        seconds, version_id = _timed(NanoCore(game_directory, jobs=b.args.jobs, mirrors=b.mirrors).install_version, GAME_VERSION)
+    cold = {"ms": _ms(seconds), "mb_per_s": round(b.mojang_world.total_bytes / (1024 * 1024) / seconds, 2),
+            "files": b.mojang_world.files, "server": dict(b.mojang.stats)}
+
+    b.mojang.reset_stats()
+    # A new NanoCore, as the next CLI call would have
+    with b.quiet():
+        seconds, _ = _timed(NanoCore(game_directory, jobs=b.args.jobs, mirrors=b.mirrors).install_version, GAME_VERSION)
+    warm = {"ms": _ms(seconds), "server": dict(b.mojang.stats)}
+    return {"install_cold": cold, "install_warm": warm}, game_directory, version_id
+
+
+def bench_search(b):
+    """Each query once against the server, then again from the HTTP cache."""
+    manager = ModManager(b.directory("search"), api_url=b.api_url)
+    results = {}
+    for name in ("search_cold", "search_cached"):
+        b.modrinth.reset_stats()
+        samples = []
+        for query in SEARCH_QUERIES:
+            for offset in (0, 20):
+                seconds, _ = _timed(manager.search_modrinth, query, GAME_VERSION, "fabric", offset=offset)
+                samples.append(seconds)
+        results[name] = dict(_latencies(samples), server=dict(b.modrinth.stats))
+    return results
+
+
+def bench_mods(b):
+    """install_mod one project at a time, then install_mods for a larger set with dependencies."""
+    projects = b.modrinth_world.compatible()
+    manager = ModManager(b.directory("mods_single"), api_url=b.api_url)
+    b.modrinth.reset_stats()
+    samples = []
+    with b.quiet():
+        for project in projects[:5]:
+            seconds, ok = _timed(manager.install_mod, project, GAME_VERSION, "fabric")
+            if not ok:
+                raise RuntimeError(f"install_mod failed for {project}")
+            samples.append(seconds)
+    single = dict(_latencies(samples), server=dict(b.modrinth.stats))
+
+    manager = ModManager(b.directory("mods_bulk"), api_url=b.api_url)
+    b.modrinth.reset_stats()
+    with b.quiet():
+        seconds, result = _timed(manager.install_mods, projects, GAME_VERSION, "fabric", jobs=b.args.jobs)
+    bulk = {"ms": _ms(seconds), "projects": len(projects), "installed": len(result["installed"]),
+            "failed": len(result["failed"]), "server": dict(b.modrinth.stats)}
+    return {"mod_install_single": single, "mods_bulk_install": bulk}
+
+
+def bench_launch(b, game_directory, version_id):
+    """prepare_launch with no launch plan (full command build), then from the cached plan."""
+    core = NanoCore(game_directory, mirrors=b.mirrors)
+    with b.quiet():
+        core.java.info(b.java)  # Probe once, it is cached from then on anyway
+        core.plans.clear()
+        seconds, _ = _timed(core.prepare_launch, version_id, "Bench", java_path=b.java)
+        cold = {"ms": _ms(seconds)}
+        samples = [_timed(core.prepare_launch, version_id, "Bench", java_path=b.java)[0] for _ in range(LAUNCH_RUNS)]
+    return {"launch_build_cold": cold, "launch_build_warm": _latencies(samples)}
+
+
+def run_suite(b):
+    results, game_directory, version_id = bench_install(b)
+    results.update(bench_search(b))
+    results.update(bench_mods(b))
+    results.update(bench_launch(b, game_directory, version_id))
+    return results
+
+
+def merge_runs(runs):
+    """Median of every numeric metric over several suite runs."""
+    merged = {}
+    for name, first in runs[0].items():
+        merged[name] = {}
+        for key, value in first.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                merged[name][key] = round(statistics.median(run[name][key] for run in runs), 2)
+            else:
+                merged[name][key] = value
+    return merged
+
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    """Returns (lines, regressions) describing each compared metric against the baseline."""
+    lines, regressions = [], []
+    for name, metric, higher_is_better in COMPARED:
+        old = baseline["results"].get(name, {}).get(metric)
+        new = results.get(name, {}).get(metric)
+        if old is None or new is None:
+            continue
+        change = (new - old) / old if old else 0.0
+        worse = -change if higher_is_better else change
+        # Small absolute differences on fast paths are noise
+        noise = not higher_is_better and abs(new - old) < min_delta_ms
+        status = "ok"
+        if worse > tolerance and not noise:
+            status = "REGRESSION"
+            regressions.append(f"{name}.{metric}")
+        elif -worse > tolerance and not noise:
+            status = "faster" if not higher_is_better else "better"
+        lines.append(f"  {name + '.' + metric:<32} {old:>10.2f} -> {new:>10.2f}  {change * 100:+6.1f}%  {status}")
+    return lines, regressions
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Nano Launcher offline benchmarks")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the results JSON")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline results to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results to the baseline instead of comparing")
+    parser.add_argument("--repeat", type=int, default=3, help="Suite runs, each metric is the median (Default: 3)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before a metric counts as a regression (Default: 0.25)")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0, help="Timing differences below this are never regressions (Default: 5)")
+    parser.add_argument("--jobs", "-j", type=int, default=16, help="Parallel downloads (Default: 16)")
+    parser.add_argument("--latency", type=float, default=20, help="Server latency per request in ms (Default: 20)")
+    parser.add_argument("--bandwidth", type=int, default=0, help="Per-connection bandwidth cap in KiB/s (Default: unlimited)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of requests answered with 503 (Default: 0)")
+    parser.add_argument("--truncate-rate", type=float, default=0.0, help="Share of file downloads cut off halfway (Default: 0)")
+    parser.add_argument("--assets", type=int, default=1500, help="Asset objects in the fake game version (Default: 1500)")
+    parser.add_argument("--mods", type=int, default=60, help="Projects on the fake Modrinth (Default: 60)")
+    parser.add_argument("--verbose", action="store_true", help="Show the launcher's own output")
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    config = {k: getattr(args, k) for k in ("jobs", "latency", "bandwidth", "failure_rate", "truncate_rate", "assets", "mods")}
+
+    runs = []
+    for i in range(args.repeat):
+        b = Bench(args)
+        try:
+            start = time.perf_counter()
+            runs.append(run_suite(b))
+            print(f"Run {i + 1}/{args.repeat} done in {time.perf_counter() - start:.1f}s")
+        finally:
+            b.close()
+    results = merge_runs(runs)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "config": config,
+        "results": results,
+    }
+    for name, metrics in results.items():
+        shown = ", ".join(f"{k}={v}" for k, v in metrics.items() if k != "server")
+        print(f"- {name}: {shown}")
+
+    path = args.baseline if args.save_baseline else args.output
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {path}")
+    if args.save_baseline:
+        return
+
+    try:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    except (OSError, ValueError):
+        print(f"No baseline at {args.baseline}, run with --save-baseline to create one.")
+        return
+    if baseline.get("config") != config:
+        print(f"Warning: baseline was recorded with {baseline.get('config')}, this run used {config}")
+    lines, regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+    print(f"Compared to {args.baseline} ({baseline.get('created')}, tolerance {args.tolerance * 100:.0f}%):")
+    for line in lines:
+        print(line)
+    if regressions:
+        print(f"{len(regressions)} regressions: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
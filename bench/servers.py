@@ -0,0 +1,195 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+import multiprocessing
+import threading
+import hashlib
+import random
+import socket
+import time
+import json
+
+# Bytes written per socket send when a bandwidth cap is set
+THROTTLE_CHUNK = 16 * 1024
+STATS = ("requests", "failures", "truncated", "bytes")
+# Servers run in forked processes (see FakeServer.start), Linux and macOS only
+_context = multiprocessing.get_context("fork")
+
+
+class Conditions:
+    """Network conditions of one fake server.
+
+    latency: seconds before each response starts. bandwidth: bytes per second per connection
+    (None for unlimited). failure_rate: share of requests answered with 503. truncate_rate:
+    share of file bodies cut off halfway, as a dropped connection would."""
+
+    def __init__(self, latency=0.0, bandwidth=None, failure_rate=0.0, truncate_rate=0.0, seed=0):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.failure_rate = failure_rate
+        self.truncate_rate = truncate_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def roll(self, rate):
+        if not rate:
+            return False
+        with self._lock:
+            return self._random.random() < rate
+
+    def describe(self):
+        return {"latency": self.latency, "bandwidth": self.bandwidth,
+                "failure_rate": self.failure_rate, "truncate_rate": self.truncate_rate}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real hosts
+    # Headers and body go out in separate writes; with Nagle on, the client's delayed ACK adds ~40ms
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._serve("GET", None)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self._serve("POST", self.rfile.read(length))
+
+    def _serve(self, method, body):
+        server = self.server.owner
+        conditions = server.conditions
+        server.count("requests")
+        if conditions.latency:
+            time.sleep(conditions.latency)
+        if conditions.roll(conditions.failure_rate):
+            server.count("failures")
+            self._reply(503, b"injected failure", "text/plain")
+            return
+
+        parts = urlsplit(self.path)
+        query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        try:
+            response = server.resolve(method, parts.path, query, body)
+        except (ValueError, KeyError) as e:
+            self._reply(400, str(e).encode("utf-8"), "text/plain")
+            return
+        if response is None:
+            self._reply(404, b"not found", "text/plain")
+            return
+        data, content_type = response
+
+        etag = '"' + hashlib.sha1(data).hexdigest() + '"'
+        if method == "GET" and self.headers.get("If-None-Match") == etag:
+            self._reply(304, b"", None, {"ETag": etag})
+            return
+
+        status, start, headers = 200, 0, {"ETag": etag, "Accept-Ranges": "bytes"}
+        ranged = self.headers.get("Range", "")
+        if ranged.startswith("bytes=") and ranged[6:].endswith("-"):
+            start = int(ranged[6:-1])
+            if start < len(data):
+                status = 206
+                headers["Content-Range"] = f"bytes {start}-{len(data) - 1}/{len(data)}"
+            else:
+                start = 0
+        truncate = content_type == "application/octet-stream" and conditions.roll(conditions.truncate_rate)
+        if truncate:
+            server.count("truncated")
+        self._reply(status, data[start:], content_type, headers, truncate)
+
+    def _reply(self, status, data, content_type, headers=None, truncate=False):
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if status == 304:
+            return
+        if truncate:
+            data = data[:len(data) // 2]
+        self._write(data)
+        if truncate:
+            self.close_connection = True
+            self.connection.shutdown(socket.SHUT_RDWR)
+
+    def _write(self, data):
+        server = self.server.owner
+        bandwidth = server.conditions.bandwidth
+        if not bandwidth:
+            self.wfile.write(data)
+            server.count("bytes", len(data))
+            return
+        start = time.perf_counter()
+        sent = 0
+        view = memoryview(data)
+        while sent < len(data):
+            chunk = view[sent:sent + THROTTLE_CHUNK]
+            self.wfile.write(chunk)
+            sent += len(chunk)
+            server.count("bytes", len(chunk))
+            ahead = sent / bandwidth - (time.perf_counter() - start)
+            if ahead > 0:
+                time.sleep(ahead)
+
+
+class FakeServer:
+    """Threaded HTTP server on 127.0.0.1 that answers from a route table under Conditions.
+
+    routes maps a path to (bytes, content type); handler(method, path, query, body) is asked
+    for everything else and returns the same pair, or None for a 404. The port is bound (and
+    url known) on construction, serving starts with start()."""
+
+    def __init__(self, name, routes=None, handler=None, conditions=None):
+        self.name = name
+        self.routes = routes if routes is not None else {}
+        self.handler = handler
+        self.conditions = conditions or Conditions()
+        self._stats = _context.Array("q", len(STATS))  # Shared with the serving process
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.owner = self
+        self._process = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def stats(self):
+        return dict(zip(STATS, self._stats[:]))
+
+    def count(self, key, amount=1):
+        with self._stats.get_lock():
+            self._stats[STATS.index(key)] += amount
+
+    def reset_stats(self):
+        with self._stats.get_lock():
+            self._stats[:] = [0] * len(STATS)
+
+    def resolve(self, method, path, query, body):
+        if method == "GET" and path in self.routes:
+            return self.routes[path]
+        if self.handler:
+            return self.handler(method, path, query, body)
+        return None
+
+    def start(self):
+        # A process of its own: in a thread, the server's Python work would compete with the
+        # launcher's for the GIL and every timing would include it
+        self._process = _context.Process(target=self._httpd.serve_forever, daemon=True, name=f"fake-{self.name}")
+        self._process.start()
+        return self
+
+    def stop(self):
+        if self._process:
+            self._process.terminate()
+            self._process.join()
+        self._httpd.server_close()
+
+
+def json_body(value):
+    return json.dumps(value).encode("utf-8"), "application/json"
@@ -1,51 +1,586 @@
 import argparse
+import subprocess
+import time
 import sys
-from core.launcher import NanoCore
+import os
+from collections import deque
+from core.downloader import DEFAULT_JOBS, DownloadError
+from core.tuning import PROFILES, DEFAULT_PROFILE
+from core import daemon
 
-def main():
+# Everything else is imported by the commands that need it, so --help, list or a command
+# forwarded to the daemon never pay for requests and minecraft_launcher_lib.
+
+_managers = {}
+
+def mod_manager(core):
+    # The daemon keeps one per game directory, so the mod index stays in memory between commands
+    from core.mods import ModManager
+    if core.game_directory not in _managers:
+        _managers[core.game_directory] = ModManager(core.game_directory, peer=core.downloader.peer)
+    return _managers[core.game_directory]
+
+def print_game_event(process, event, data):
+    if event == "line":
+        print(data[2] if data[1] is None else f"[{data[1]}/{data[0]}] {data[2]}")
+    elif event == "startup":
+        print(f"[launcher] Game ready after {data:.1f}s")
+    elif event == "exit":
+        print(f"[launcher] Game exited with code {data}")
+
+def ps_command(core, args):
+    from core.supervisor import read_proc
+    states = core.supervisor.instances(include_exited=args.all or args.prune)
+    # CPU usage from two /proc reads 200ms apart, for all running instances at once
+    first = {s["pid"]: read_proc(s["pid"]) for s in states if s["running"]}
+    if first:
+        time.sleep(0.2)
+    print(f"{'PID':>7}  {'VERSION':<28} {'STATUS':<12} {'UPTIME':>8} {'RSS':>9} {'CPU':>6} {'THREADS':>7}")
+    for s in states:
+        uptime = f"{(time.time() - s['started']) / 60:.0f}m"
+        rss = cpu = threads = "-"
+        status = "running" if s["running"] else f"exit {s['exit_code']}" if s["exit_code"] is not None else "exited"
+        now = read_proc(s["pid"]) if s["running"] else None
+        if now and first.get(s["pid"]):
+            rss = f"{now['rss'] / (1024 * 1024):.0f} MB"
+            cpu = f"{(now['cpu_seconds'] - first[s['pid']]['cpu_seconds']) / 0.2 * 100:.0f}%"
+            threads = str(now["threads"])
+        print(f"{s['pid']:>7}  {s['version']:<28} {status:<12} {uptime:>8} {rss:>9} {cpu:>6} {threads:>7}")
+    if args.prune:
+        core.supervisor.prune()
+
+def logs_command(core, args):
+    from core.supervisor import parse_line, pid_alive
+    path = core.supervisor.log_path(args.pid)
+    if not os.path.exists(path):
+        print(f"No log for instance {args.pid}")
+        sys.exit(1)
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        level = "INFO"
+        tail = deque(maxlen=args.lines)
+        while True:
+            line = f.readline()
+            if not line:
+                for item in tail:
+                    print(item)
+                tail = deque()
+                if not args.follow or not pid_alive(args.pid):
+                    break
+                sys.stdout.flush()
+                time.sleep(0.25)
+                continue
+            level, _, _ = parse_line(line.rstrip("\n"), level)
+            if args.level and level != args.level.upper():
+                continue
+            tail.append(line.rstrip("\n"))
+
+def cds_command(core, args):
+    from core.cds import run_timed
+    if args.cds_command == "clear":
+        core.cds.clear(args.version)
+        print("Cleared.")
+        return
+
+    if args.cds_command == "build" or args.measure:
+        version = args.version if args.cds_command == "build" else args.measure
+        if args.cds_command == "build":
+            core.cds.clear(version)
+        command, mode = core.prepare_launch(version, getattr(args, "username", "Steve"), args.ram)
+        if mode is None:
+            print("The selected Java runtime does not support dynamic CDS archives (Java 13+ required).")
+            sys.exit(1)
+        if args.cds_command == "report" and mode != "warm":
+            print(f"No archive for {version} yet, run: cli.py cds build {version}")
+            sys.exit(1)
+        print("Starting the game, quit it once the main menu is up...")
+        seconds, code = run_timed(command)
+        if seconds is not None:
+            core.cds.record_startup(version, mode, seconds)
+        if code != 0:
+            print(f"Game exited with code {code}, the archive is only written on a clean exit.")
+
+    for row in core.cds.report():
+        cold = f"{row['cold']:.2f}s" if row["cold"] is not None else "-"
+        warm = f"{row['warm']:.2f}s" if row["warm"] is not None else "-"
+        gain = f" ({(1 - row['warm'] / row['cold']) * 100:.0f}% faster)" if row["cold"] and row["warm"] else ""
+        size = row["archive_bytes"] / (1024 * 1024)
+        print(f"- {row['version']}: archive {size:.1f} MB, cold start {cold}, warm start {warm}{gain}")
+
+def daemon_command(args, parser):
+    from core.launcher import default_game_directory
+    game_directory = default_game_directory()
+
+    if args.daemon_command == "serve":
+        from core.launcher import NanoCore
+        core = NanoCore()
+
+        def handler(params):
+            return run_command(argparse.Namespace(**params["args"]), core, parser)
+
+        try:
+            daemon.LauncherDaemon(core.game_directory, handler).serve_forever()
+        except daemon.DaemonUnavailable as e:
+            print(e)
+            sys.exit(1)
+        return
+
+    try:
+        status = daemon.call(game_directory, "ping", timeout=2)
+    except daemon.DaemonUnavailable:
+        status = None
+
+    if args.daemon_command == "start":
+        if status:
+            print(f"Daemon already running (pid {status['pid']})")
+            return
+        os.makedirs(game_directory, exist_ok=True)
+        log_path = os.path.join(game_directory, "daemon.log")
+        with open(log_path, "a", encoding="utf-8") as log:
+            subprocess.Popen([sys.executable, os.path.abspath(__file__), "daemon", "serve"],
+                             stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+        for _ in range(50):
+            time.sleep(0.1)
+            try:
+                status = daemon.call(game_directory, "ping", timeout=2)
+                print(f"Daemon started (pid {status['pid']})")
+                return
+            except daemon.DaemonUnavailable:
+                continue
+        print(f"Daemon did not come up, see {log_path}")
+        sys.exit(1)
+
+    elif args.daemon_command == "stop":
+        if not status:
+            print("Daemon is not running.")
+            return
+        daemon.call(game_directory, "shutdown", timeout=2)
+        print(f"Stopped daemon (pid {status['pid']})")
+
+    elif args.daemon_command == "status":
+        if not status:
+            print("Daemon is not running.")
+            sys.exit(1)
+        print(f"Daemon running (pid {status['pid']}), up {status['uptime'] / 60:.0f}m, {status['served']} commands served")
+
+    else:
+        parser.parse_args(["daemon", "--help"])
+
+def cache_command(args, core, parser):
+    from core import peer
+    if args.cache_command == "serve":
+        from core.downloader import Downloader
+        from core.store import ArtifactStore
+        store = ArtifactStore(args.store) if args.store else core.store
+        # No peer for the server's own downloads, it would be asking itself
+        downloader = Downloader(jobs=args.jobs, mirrors=core.downloader.mirrors)
+        cache = peer.ArtifactCache(store, downloader, max_bytes=args.max_size * 1024 * 1024,
+                                   upstream_hosts=peer.UPSTREAM_HOSTS + tuple(args.allow_host))
+        server = peer.PeerServer(cache, args.host, args.port)
+        print(f"Serving {store.root} on {server.url} ({cache.status()['bytes'] / (1024 * 1024):.0f} of {args.max_size} MB used)")
+        print(f"Point clients at it with --peer http://<this machine>:{server.server_address[1]} or {peer.PEER_ENV}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            cache.save()
+            status = cache.status()
+            print(f"Served {status['hits']} hits and {status['misses']} misses ({status['merged']} merged), "
+                  f"{status['upstream_bytes'] / (1024 * 1024):.1f} MB from upstream")
+
+    elif args.cache_command == "status":
+        url = args.url or core.downloader.peer or f"http://127.0.0.1:{peer.DEFAULT_PORT}"
+        try:
+            status = peer.fetch_status(url)
+        except Exception as e:
+            print(f"Peer cache at {url} is not reachable: {e}")
+            sys.exit(1)
+        print(f"{url}: {status['blobs']} blobs, {status['bytes'] / (1024 * 1024):.1f} of {status['max_bytes'] / (1024 * 1024):.0f} MB")
+        print(f"{status['hits']} hits, {status['misses']} misses, {status['merged']} merged, {status['rejected']} rejected, "
+              f"{status['errors']} errors, {status['evicted']} evicted")
+        print(f"{status['upstream_bytes'] / (1024 * 1024):.1f} MB from upstream, {status['served_bytes'] / (1024 * 1024):.1f} MB served")
+
+    else:
+        parser.parse_args(["cache", "--help"])
+
+def forwardable(args):
+    """Whether the daemon can run the command. Commands that stream for as long as a game
+    runs, and ones with per-invocation mirrors, peers or tracing, stay in the calling process."""
+    if args.command in (None, "daemon", "cache") or getattr(args, "mirror", None) or args.peer or args.trace:
+        return False
+    if args.command == "launch":
+        return args.dry_run or not args.wait
+    if args.command == "logs":
+        return not args.follow
+    if args.command == "cds":
+        return args.cds_command == "clear" or (args.cds_command == "report" and not args.measure)
+    return True
+
+def build_parser():
     parser = argparse.ArgumentParser(description="Nano Launcher - The Simplest & Most Powerful Minecraft Launcher")
+    parser.add_argument("--no-daemon", action="store_true", help="Run the command in this process even if the daemon is running")
+    parser.add_argument("--trace", metavar="FILE", help="Record timing spans and write them to FILE as a Chrome/Perfetto trace")
+    parser.add_argument("--peer", metavar="URL", help="Try this LAN cache (cli.py cache serve) before downloading from upstream")
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
 
     # Install Command
     install_parser = subparsers.add_parser("install", help="Install a Minecraft version")
     install_parser.add_argument("version", help="Minecraft version (e.g., 1.20.1)")
     install_parser.add_argument("--loader", choices=["fabric", "forge", "quilt", "vanilla"], default="vanilla", help="Mod loader to install")
+    install_parser.add_argument("--jobs", "-j", type=int, default=DEFAULT_JOBS, help=f"Parallel downloads (Default: {DEFAULT_JOBS})")
+    install_parser.add_argument("--mirror", action="append", default=[], metavar="URL=MIRROR", help="Fetch URLs starting with URL from MIRROR instead (repeatable)")
 
     # Launch Command
     launch_parser = subparsers.add_parser("launch", help="Launch Minecraft")
     launch_parser.add_argument("version", help="Version ID to launch (e.g., 1.20.1 or fabric-loader-1.20.1)")
     launch_parser.add_argument("username", help="Offline username")
     launch_parser.add_argument("--ram", type=int, default=2048, help="RAM in MB (Default: 2048)")
+    launch_parser.add_argument("--dry-run", action="store_true", help="Print the command instead of starting the game")
+    launch_parser.add_argument("--timings", action="store_true", help="Report how long each launch phase took")
+    launch_parser.add_argument("--no-cds", action="store_true", help="Don't use or record a class data sharing archive")
+    launch_parser.add_argument("--wait", action="store_true",
+                               help="Stream the game log and exit with the game's exit code instead of returning right away")
+    launch_parser.add_argument("--profile", choices=PROFILES, default=DEFAULT_PROFILE, help=f"JVM tuning profile (Default: {DEFAULT_PROFILE})")
 
     # List Command
     list_parser = subparsers.add_parser("list", help="List installed versions")
+    list_parser.add_argument("--available", action="store_true", help="List installable versions instead (cached, refreshed when stale)")
+    list_parser.add_argument("--loader", choices=["vanilla", "fabric", "forge", "quilt"], default="vanilla", help="With --available: versions this loader supports")
+    list_parser.add_argument("--snapshots", action="store_true", help="With --available: include snapshots and old betas")
 
-    args = parser.parse_args()
-    
-    core = NanoCore()
+    # PS Command
+    ps_parser = subparsers.add_parser("ps", help="List game instances started by the launcher")
+    ps_parser.add_argument("--all", action="store_true", help="Include exited instances")
+    ps_parser.add_argument("--prune", action="store_true", help="Forget exited instances and delete their logs")
+
+    # Logs Command
+    logs_parser = subparsers.add_parser("logs", help="Show the log of a game instance")
+    logs_parser.add_argument("pid", type=int, help="Instance PID (see ps)")
+    logs_parser.add_argument("-n", "--lines", type=int, default=50, help="Number of lines to show (Default: 50)")
+    logs_parser.add_argument("-f", "--follow", action="store_true", help="Keep printing new lines")
+    logs_parser.add_argument("--level", help="Only show lines of this level (e.g. WARN, ERROR)")
+
+    # Verify Command
+    verify_parser = subparsers.add_parser("verify", help="Check an installed version's files against their hashes and repair them")
+    verify_parser.add_argument("version", help="Version ID to verify")
+    verify_parser.add_argument("--no-repair", action="store_true", help="Only report broken or missing files")
+    verify_parser.add_argument("--jobs", "-j", type=int, default=DEFAULT_JOBS, help=f"Parallel hashing and downloads (Default: {DEFAULT_JOBS})")
+
+    # GC Command
+    gc_parser = subparsers.add_parser("gc", help="Remove artifact store blobs no installed version uses")
+    gc_parser.add_argument("--dry-run", action="store_true", help="Only report what would be removed")
+
+    # Java Command
+    java_parser = subparsers.add_parser("java", help="Manage detected Java runtimes")
+    java_subparsers = java_parser.add_subparsers(dest="java_command", help="Java commands")
+    java_subparsers.add_parser("list", help="List indexed Java runtimes")
+    java_subparsers.add_parser("rescan", help="Search for Java runtimes again and re-probe all of them")
 
+    # CDS Command
+    cds_parser = subparsers.add_parser("cds", help="Manage class data sharing (warm start) archives")
+    cds_subparsers = cds_parser.add_subparsers(dest="cds_command", help="CDS commands")
+    cds_build_parser = cds_subparsers.add_parser("build", help="Launch once to record the archive (quit the game to write it)")
+    cds_build_parser.add_argument("version", help="Version ID")
+    cds_build_parser.add_argument("username", nargs="?", default="Steve", help="Offline username")
+    cds_build_parser.add_argument("--ram", type=int, default=2048, help="RAM in MB (Default: 2048)")
+    cds_clear_parser = cds_subparsers.add_parser("clear", help="Delete archives")
+    cds_clear_parser.add_argument("version", nargs="?", help="Version ID (Default: all)")
+    cds_report_parser = cds_subparsers.add_parser("report", help="Show cold vs warm startup times")
+    cds_report_parser.add_argument("--measure", metavar="VERSION", help="Launch VERSION once with its archive and record the startup time")
+    cds_report_parser.add_argument("--ram", type=int, default=2048, help="RAM in MB for --measure (Default: 2048)")
+
+    # Pack Command
+    pack_parser = subparsers.add_parser("pack", help="Import or export Modrinth modpacks (.mrpack)")
+    pack_subparsers = pack_parser.add_subparsers(dest="pack_command", help="Modpack commands")
+    pack_import_parser = pack_subparsers.add_parser("import", help="Install a .mrpack: loader, mods and overrides")
+    pack_import_parser.add_argument("file", help="Path to the .mrpack")
+    pack_import_parser.add_argument("--jobs", "-j", type=int, default=DEFAULT_JOBS, help=f"Parallel downloads (Default: {DEFAULT_JOBS})")
+    pack_export_parser = pack_subparsers.add_parser("export", help="Write the mods and configs for a version as a .mrpack")
+    pack_export_parser.add_argument("version", help="Installed version ID the pack targets")
+    pack_export_parser.add_argument("output", help="Path of the .mrpack to write")
+    pack_export_parser.add_argument("--name", help="Pack name (Default: the version ID)")
+    pack_export_parser.add_argument("--pack-version", default="1.0.0", help="Pack version (Default: 1.0.0)")
+
+    # Mods Command
+    mods_parser = subparsers.add_parser("mods", help="Manage Modrinth mods")
+    mods_subparsers = mods_parser.add_subparsers(dest="mods_command", help="Mod commands")
+    mods_install_parser = mods_subparsers.add_parser("install", help="Install mods and their required dependencies")
+    mods_install_parser.add_argument("projects", nargs="+", help="Modrinth project IDs or slugs")
+    mods_install_parser.add_argument("--version", required=True, help="Target Minecraft version (e.g., 1.20.1)")
+    mods_install_parser.add_argument("--loader", choices=["fabric", "forge", "quilt"], default="fabric", help="Mod loader")
+    mods_install_parser.add_argument("--jobs", "-j", type=int, default=8, help="Parallel downloads (Default: 8)")
+    mods_update_parser = mods_subparsers.add_parser("update", help="Check installed mods for updates (and apply them)")
+    mods_update_parser.add_argument("mods", nargs="*", help="Only these mods (mod ID, Modrinth project ID or file name)")
+    mods_update_parser.add_argument("--version", required=True, help="Target Minecraft version (e.g., 1.20.1)")
+    mods_update_parser.add_argument("--loader", choices=["fabric", "forge", "quilt"], default="fabric", help="Mod loader")
+    mods_update_parser.add_argument("--apply", action="store_true", help="Download the updates instead of only listing them")
+    mods_update_parser.add_argument("--jobs", "-j", type=int, default=8, help="Parallel downloads (Default: 8)")
+    mods_list_parser = mods_subparsers.add_parser("list", help="List installed mods and flag duplicate or conflicting IDs")
+    mods_list_parser.add_argument("--deps", action="store_true", help="Show required dependencies")
+
+    # Daemon Command
+    daemon_parser = subparsers.add_parser("daemon", help="Keep a launcher process running so other commands start instantly")
+    daemon_subparsers = daemon_parser.add_subparsers(dest="daemon_command", help="Daemon commands")
+    daemon_subparsers.add_parser("start", help="Start the daemon in the background")
+    daemon_subparsers.add_parser("stop", help="Stop the daemon")
+    daemon_subparsers.add_parser("status", help="Show whether the daemon is running")
+    daemon_subparsers.add_parser("serve", help="Run the daemon in the foreground")
+
+    # Cache Command
+    cache_parser = subparsers.add_parser("cache", help="Share downloaded artifacts with other machines on the LAN")
+    cache_subparsers = cache_parser.add_subparsers(dest="cache_command", help="Cache commands")
+    cache_serve_parser = cache_subparsers.add_parser("serve", help="Serve the artifact store to launchers started with --peer")
+    cache_serve_parser.add_argument("--host", default="0.0.0.0", help="Address to listen on (Default: 0.0.0.0)")
+    cache_serve_parser.add_argument("--port", type=int, default=8737, help="Port to listen on (Default: 8737)")
+    cache_serve_parser.add_argument("--store", help="Artifact store directory (Default: the game directory's)")
+    cache_serve_parser.add_argument("--max-size", type=int, default=10240, help="Size in MB of the artifacts the cache fetches itself, least recently used go first (Default: 10240)")
+    cache_serve_parser.add_argument("--jobs", "-j", type=int, default=DEFAULT_JOBS, help=f"Parallel upstream downloads (Default: {DEFAULT_JOBS})")
+    cache_serve_parser.add_argument("--mirror", action="append", default=[], metavar="URL=MIRROR", help="Fetch URLs starting with URL from MIRROR instead (repeatable)")
+    cache_serve_parser.add_argument("--allow-host", action="append", default=[], metavar="HOST", help="Also fetch misses from HOST (repeatable)")
+    cache_status_parser = cache_subparsers.add_parser("status", help="Show a peer cache's hit rate and size")
+    cache_status_parser.add_argument("url", nargs="?", help="Peer URL (Default: --peer, or this machine)")
+
+    return parser
+
+def run_command(args, core, parser):
+    """Runs a parsed command against core, in this process or in the daemon."""
     if args.command == "install":
-        print(f"Starting installation for {args.version} ({args.loader})...")
+        print(f"Starting installation for {args.version} ({args.loader}) with {args.jobs} workers...")
         try:
-            installed_id = core.install_version(args.version, args.loader if args.loader != "vanilla" else None)
+            installed_id = core.install_version(args.version, args.loader if args.loader != "vanilla" else None, jobs=args.jobs)
             print(f"Successfully installed: {installed_id}")
         except Exception as e:
             print(f"Error installing: {e}")
 
     elif args.command == "launch":
         print(f"Launching {args.version} as {args.username}...")
+        timings = {}
+        process = None
+        if not args.dry_run and args.wait:
+            core.supervisor.add_listener(print_game_event)
         try:
-            core.launch(args.version, args.username, args.ram)
+            if args.dry_run:
+                command, _ = core.prepare_launch(args.version, args.username, args.ram, cds=not args.no_cds, timings=timings,
+                                                 profile=args.profile, dry_run=True)
+                print(" ".join(command))
+            else:
+                process = core.launch(args.version, args.username, args.ram, timings=timings, cds=not args.no_cds, profile=args.profile, detach=not args.wait)
+                print(f"Started instance {process.pid}")
         except Exception as e:
             print(f"Error launching: {e}")
+        if args.timings:
+            for name, seconds in timings.items():
+                print(f"  {name:<14} {seconds * 1000:8.2f} ms")
+            print(f"  {'total':<14} {sum(timings.values()) * 1000:8.2f} ms")
+        if process and args.wait:
+            try:
+                sys.exit(process.wait())
+            except KeyboardInterrupt:
+                process.stop()
+                sys.exit(process.wait())
+
+    elif args.command == "list" and args.available:
+        core.remote.refresh()
+        loader = args.loader if args.loader != "vanilla" else None
+        ids = core.remote.game_versions(loader, types=None if args.snapshots else ("release",))
+        for version_id in ids:
+            print(f"- {version_id}")
+        if not ids:
+            print("Version list unavailable (offline and not cached yet).")
+            sys.exit(1)
 
     elif args.command == "list":
         versions = core.get_installed_versions()
         for v in versions:
             print(f"- {v['id']} ({v['type']})")
 
+    elif args.command == "ps":
+        ps_command(core, args)
+
+    elif args.command == "logs":
+        logs_command(core, args)
+
+    elif args.command == "verify":
+        core.downloader.jobs = args.jobs
+        try:
+            report = core.verifier.verify(args.version, repair=not args.no_repair)
+        except (DownloadError, OSError, ValueError) as e:
+            print(f"Error: cannot verify {args.version}: {e}")
+            sys.exit(1)
+        for path in report["missing"]:
+            print(f"Missing: {path}")
+        for path in report["corrupt"]:
+            print(f"Corrupt: {path}")
+        for error in report["errors"]:
+            print(f"Error: {error}")
+        print(f"{report['ok']}/{report['total']} files OK ({report['hashed']} hashed) in {report['seconds']:.2f}s")
+        if report["repaired"]:
+            print(f"Repaired {len(report['repaired'])} files")
+        if report["failed"]:
+            print(f"{len(report['failed'])} files are still missing or broken")
+            sys.exit(1)
+
+    elif args.command == "gc":
+        removed, freed = core.gc_store(dry_run=args.dry_run)
+        verb = "Would remove" if args.dry_run else "Removed"
+        print(f"{verb} {removed} blobs ({freed / (1024 * 1024):.1f} MB freed)")
+
+    elif args.command == "java" and args.java_command in ("list", "rescan"):
+        if args.java_command == "rescan":
+            runtimes = core.java.scan(force=True)
+        else:
+            runtimes = core.java.runtimes()
+        for r in runtimes:
+            print(f"- Java {r['major']:<3} {r['version']:<12} {r['vendor']} ({r['arch']}, {r['bits']}-bit) {r['path']}")
+        if not runtimes:
+            print("No Java runtimes found.")
+
+    elif args.command == "java":
+        parser.parse_args(["java", "--help"])
+
+    elif args.command == "cds" and args.cds_command in ("build", "clear", "report"):
+        cds_command(core, args)
+
+    elif args.command == "cds":
+        parser.parse_args(["cds", "--help"])
+
+    elif args.command == "pack" and args.pack_command == "import":
+        from core import modpack
+        try:
+            result = modpack.import_pack(core, args.file, jobs=args.jobs)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error: cannot import {args.file}: {e}")
+            sys.exit(1)
+        for error in result["failed"]:
+            print(f"Error: {error}")
+        print(f"Installed {result['name']}: {result['files']} files, {result['overrides']} overrides")
+        print(f"Launch with: {sys.argv[0]} launch {result['version']} <username>")
+        if result["failed"]:
+            sys.exit(1)
+
+    elif args.command == "pack" and args.pack_command == "export":
+        import requests
+        from core import modpack
+        manager = mod_manager(core)
+        try:
+            result = modpack.export_pack(manager, args.version, args.output, args.name, args.pack_version)
+        except (OSError, requests.RequestException) as e:
+            print(f"Error: cannot export {args.version}: {e}")
+            sys.exit(1)
+        print(f"Wrote {args.output}: {result['files']} Modrinth files, {result['overrides']} overrides")
+
+    elif args.command == "pack":
+        parser.parse_args(["pack", "--help"])
+
+    elif args.command == "mods" and args.mods_command == "install":
+        manager = mod_manager(core)
+        result = manager.install_mods(args.projects, args.version, args.loader, jobs=args.jobs)
+        for filename in result["installed"]:
+            print(f"- {filename}")
+        for project in result["unresolved"]:
+            print(f"No compatible version for {project} on {args.version} ({args.loader})")
+        for error in result["failed"]:
+            print(f"Error: {error}")
+        print(f"Installed {len(result['installed'])} mods to {manager.mods_path}")
+        if result["failed"]:
+            sys.exit(1)
+
+    elif args.command == "mods" and args.mods_command == "update":
+        import requests
+        manager = mod_manager(core)
+        try:
+            updates, unknown = manager.check_updates(args.version, args.loader)
+        except requests.RequestException as e:
+            print(f"Update check failed: {e}")
+            sys.exit(1)
+        if args.mods:
+            wanted = set(args.mods)
+            updates = [u for u in updates if wanted & {u["file"], u["mod_id"], u["project_id"]}]
+        for u in updates:
+            print(f"- {u['mod_id'] or u['project_id']}: {u['current']['version_number']} -> {u['latest']['version_number']}  ({u['file']})")
+        if unknown:
+            print(f"{len(unknown)} jars not found on Modrinth: {', '.join(unknown)}")
+        if not updates:
+            print("Everything is up to date.")
+        elif not args.apply:
+            print(f"{len(updates)} updates available, run again with --apply to install them.")
+        else:
+            result = manager.apply_updates(updates, jobs=args.jobs)
+            for error in result["failed"]:
+                print(f"Error: {error}")
+            print(f"Updated {len(result['updated'])} mods")
+            if result["failed"]:
+                sys.exit(1)
+
+    elif args.command == "mods" and args.mods_command == "list":
+        manager = mod_manager(core)
+        mods = manager.index.mods()
+        for mod in mods:
+            print(f"- {mod['id']:<28} {str(mod['version']):<20} {mod['loader']:<9} {mod['file']}")
+            if args.deps and mod["depends"]:
+                print("    requires " + ", ".join(f"{k} {v}" for k, v in sorted(mod["depends"].items())))
+        problems = manager.index.problems()
+        for kind, subject, detail in problems:
+            print(f"{kind.capitalize()}: {subject}: {detail}")
+        print(f"{len(mods)} mods in {manager.mods_path}")
+        if any(kind in ("duplicate", "conflict") for kind, _, _ in problems):
+            sys.exit(1)
+
+    elif args.command == "mods":
+        parser.parse_args(["mods", "--help"])
+
+    elif args.command == "cache":
+        cache_command(args, core, parser)
+
     else:
         parser.print_help()
 
+def main():
+    parser = build_parser()
+    args = parser.parse_args()
+
+    if args.command == "daemon":
+        daemon_command(args, parser)
+        return
+
+    if forwardable(args) and not args.no_daemon and daemon.supported():
+        from core.launcher import default_game_directory
+        forwarded = vars(args).copy()
+        # Relative paths are resolved against the daemon's working directory otherwise
+        for key in ("file", "output"):
+            if forwarded.get(key):
+                forwarded[key] = os.path.abspath(forwarded[key])
+        try:
+            result = daemon.call(default_game_directory(), "run", {"args": forwarded}, on_output=sys.stdout.write)
+        except daemon.DaemonDisconnected as e:
+            # Not run again here: install, mods install and pack import may be halfway done
+            print(f"Error: {e}")
+            sys.exit(1)
+        except daemon.DaemonUnavailable:
+            pass
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        else:
+            sys.exit(result["exit_code"])
+
+    if args.trace:
+        from core import trace
+        trace.start()
+    try:
+        from core.launcher import NanoCore
+        mirrors = dict(m.split("=", 1) for m in getattr(args, "mirror", []))
+        core = NanoCore(mirrors=mirrors, peer=args.peer)
+        run_command(args, core, parser)
+    finally:
+        if args.trace:
+            tracer = trace.stop()
+            tracer.write(args.trace)
+            print()
+            for line in tracer.format_summary():
+                print(line)
+            print(f"Trace written to {args.trace} (open it in ui.perfetto.dev or chrome://tracing)")
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,163 @@
+from urllib.parse import urlencode
+import threading
+import hashlib
+import time
+import json
+import os
+from core import trace
+
+
+class HttpCache:
+    """On-disk cache for JSON GET requests.
+
+    Entries are keyed by URL + sorted params. Fresh entries (younger than the ttl) are served
+    without touching the network, stale ones are revalidated with If-None-Match /
+    If-Modified-Since, and when the network is down the last copy is served as is.
+    The directory is kept under max_bytes by evicting the least recently used entries.
+    session is a requests session, or a function returning one so it is only created on the
+    first request."""
+
+    def __init__(self, root, session, max_bytes=64 * 1024 * 1024, timeout=15):
+        self.root = root
+        self._session = session
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.counters = {"hits": 0, "misses": 0, "revalidated": 0, "stale": 0}
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        # key -> size on disk; access order is tracked through the files' mtime
+        self._sizes = {}
+        for name in os.listdir(root):
+            if name.endswith(".json"):
+                self._sizes[name[:-5]] = os.path.getsize(os.path.join(root, name))
+
+    @property
+    def session(self):
+        if callable(self._session):
+            self._session = self._session()
+        return self._session
+
+    def _key(self, url, params):
+        query = urlencode(sorted((params or {}).items()))
+        return hashlib.sha256(f"{url}?{query}".encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.root, key + ".json")
+
+    def _load(self, key):
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, key, entry):
+        path = self._path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
+        with self._lock:
+            self._sizes[key] = os.path.getsize(path)
+        self._evict()
+
+    def _touch(self, key):
+        try:
+            os.utime(self._path(key))
+        except OSError:
+            pass
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _evict(self):
+        with self._lock:
+            total = sum(self._sizes.values())
+            if total <= self.max_bytes:
+                return
+            by_age = []
+            for key in self._sizes:
+                try:
+                    by_age.append((os.path.getmtime(self._path(key)), key))
+                except OSError:
+                    by_age.append((0, key))
+            by_age.sort()
+            for _, key in by_age:
+                if total <= self.max_bytes:
+                    break
+                total -= self._sizes.pop(key)
+                try:
+                    os.remove(self._path(key))
+                except OSError:
+                    pass
+
+    def get_json(self, url, params=None, ttl=300, headers=None):
+        """Returns the decoded JSON body for url. Raises requests.HTTPError for error responses
+        and requests.RequestException when offline with nothing cached."""
+        import requests
+        key = self._key(url, params)
+        entry = self._load(key)
+        now = time.time()
+
+        if entry and now - entry["fetched"] < ttl:
+            self._count("hits")
+            self._touch(key)
+            return entry["body"]
+
+        request_headers = dict(headers or {})
+        if entry:
+            if entry.get("etag"):
+                request_headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                request_headers["If-Modified-Since"] = entry["last_modified"]
+
+        with trace.span("http_get", "http", url=url, params=params) as span:
+            try:
+                r = self.session.get(url, params=params, headers=request_headers, timeout=self.timeout)
+            except requests.RequestException:
+                if entry:
+                    self._count("stale")
+                    return entry["body"]
+                raise
+            span.set(status=r.status_code, bytes=len(r.content))
+
+        if r.status_code == 304 and entry:
+            self._count("revalidated")
+            entry["fetched"] = now
+            self._store(key, entry)
+            return entry["body"]
+
+        if r.status_code >= 500 and entry:
+            self._count("stale")
+            return entry["body"]
+
+        r.raise_for_status()
+        body = r.json()
+        self._count("misses")
+        self._store(key, {
+            "url": url,
+            "fetched": now,
+            "etag": r.headers.get("ETag"),
+            "last_modified": r.headers.get("Last-Modified"),
+            "body": body,
+        })
+        return body
+
+    def peek(self, url, params=None):
+        """The cached body for url however old it is, or None. Never touches the network."""
+        entry = self._load(self._key(url, params))
+        return entry["body"] if entry else None
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, entries=len(self._sizes), bytes=sum(self._sizes.values()))
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._sizes):
+                try:
+                    os.remove(self._path(key))
+                except OSError:
+                    pass
+            self._sizes.clear()
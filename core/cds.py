@@ -0,0 +1,135 @@
+import subprocess
+import hashlib
+import time
+import json
+import os
+
+# Log line that marks the game as started (printed once the window, resources and sound are up)
+STARTUP_MARKER = "Sound engine started"
+
+# Startup samples kept per version and mode
+MAX_SAMPLES = 20
+
+
+def classpath_of(argv):
+    for i, arg in enumerate(argv[:-1]):
+        if arg in ("-cp", "-classpath", "--class-path"):
+            return argv[i + 1]
+    return ""
+
+
+class CdsManager:
+    """Per-version AppCDS archives.
+
+    The first launch of a version runs with -XX:ArchiveClassesAtExit and the JVM dumps the classes
+    it loaded when the game exits; later launches map that archive with -XX:SharedArchiveFile.
+    On Java 19+ -XX:+AutoCreateSharedArchive does both steps itself. An archive is tied to the
+    classpath, the JVM binary and the version JSON hashes, and is replaced when any of them change."""
+
+    def __init__(self, game_directory):
+        self.root = os.path.join(game_directory, "cache", "cds")
+        os.makedirs(self.root, exist_ok=True)
+
+    def _meta_path(self, version_id):
+        return os.path.join(self.root, version_id + ".json")
+
+    def _load(self, version_id):
+        try:
+            with open(self._meta_path(version_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"key": None, "archive": None, "samples": {"cold": [], "warm": []}}
+
+    def _save(self, version_id, meta):
+        tmp = self._meta_path(version_id) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._meta_path(version_id))
+
+    def archive_key(self, argv, sources):
+        java = argv[0]
+        try:
+            java_mtime = os.stat(java).st_mtime_ns
+        except OSError:
+            java_mtime = 0
+        parts = [java, str(java_mtime), classpath_of(argv)] + [s["sha1"] for s in sources]
+        return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+    def flags(self, version_id, argv, sources, runtime, dry_run=False):
+        """Returns (flags, mode) for a launch. mode is "warm", "record" or None when CDS is not usable.
+        With dry_run=True nothing is written or deleted, a stale archive is only left unused."""
+        supported = set(runtime.get("flags", [])) if runtime else set()
+        if "ArchiveClassesAtExit" not in supported:
+            return [], None
+
+        key = self.archive_key(argv, sources)
+        meta = self._load(version_id)
+        archive = os.path.join(self.root, f"{version_id}-{key[:16]}.jsa")
+        if meta["key"] != key and not dry_run:
+            # Classpath, JVM or version JSON changed: the old archive would be rejected anyway
+            self._remove_archive(meta)
+            meta["key"] = key
+            meta["archive"] = archive
+            self._save(version_id, meta)
+
+        warm = os.path.isfile(archive)
+        if "AutoCreateSharedArchive" in supported:
+            return ["-XX:+AutoCreateSharedArchive", f"-XX:SharedArchiveFile={archive}"], "warm" if warm else "record"
+        if warm:
+            return [f"-XX:SharedArchiveFile={archive}"], "warm"
+        return [f"-XX:ArchiveClassesAtExit={archive}"], "record"
+
+    def _remove_archive(self, meta):
+        if meta.get("archive") and os.path.exists(meta["archive"]):
+            os.remove(meta["archive"])
+
+    def clear(self, version_id=None):
+        """Deletes the archive (and samples) of one version, or of all versions."""
+        names = [version_id + ".json"] if version_id else [n for n in os.listdir(self.root) if n.endswith(".json")]
+        for name in names:
+            vid = name[:-5]
+            meta = self._load(vid)
+            self._remove_archive(meta)
+            if os.path.exists(self._meta_path(vid)):
+                os.remove(self._meta_path(vid))
+        if not version_id:
+            for name in os.listdir(self.root):
+                if name.endswith(".jsa"):
+                    os.remove(os.path.join(self.root, name))
+
+    def record_startup(self, version_id, mode, seconds):
+        """Stores a startup time sample. mode "record" counts as a cold start."""
+        meta = self._load(version_id)
+        samples = meta["samples"]["warm" if mode == "warm" else "cold"]
+        samples.append(round(seconds, 3))
+        del samples[:-MAX_SAMPLES]
+        self._save(version_id, meta)
+
+    def report(self):
+        """Returns [{version, archive_bytes, cold, warm}] with average startup seconds."""
+        rows = []
+        for name in sorted(os.listdir(self.root)):
+            if not name.endswith(".json"):
+                continue
+            meta = self._load(name[:-5])
+            archive = meta.get("archive")
+            cold, warm = meta["samples"]["cold"], meta["samples"]["warm"]
+            rows.append({
+                "version": name[:-5],
+                "archive_bytes": os.path.getsize(archive) if archive and os.path.exists(archive) else 0,
+                "cold": sum(cold) / len(cold) if cold else None,
+                "warm": sum(warm) / len(warm) if warm else None,
+            })
+        return rows
+
+
+def run_timed(argv, marker=STARTUP_MARKER):
+    """Runs the game in the foreground, echoing its output. Returns (seconds until marker or None, exit code)."""
+    start = time.perf_counter()
+    startup = None
+    proc = subprocess.Popen(argv, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1)
+    for line in proc.stdout:
+        print(line, end="")
+        if startup is None and marker in line:
+            startup = time.perf_counter() - start
+    return startup, proc.wait()
@@ -0,0 +1,235 @@
+import threading
+import socket
+import time
+import json
+import sys
+import os
+
+SOCKET_NAME = "daemon.sock"
+PROTOCOL = "2.0"  # JSON-RPC, one JSON object per line
+
+# JSON-RPC error codes
+PARSE_ERROR = -32700
+METHOD_NOT_FOUND = -32601
+INTERNAL_ERROR = -32603
+
+
+def supported():
+    return hasattr(socket, "AF_UNIX")
+
+
+def socket_path(game_directory):
+    return os.path.join(game_directory, SOCKET_NAME)
+
+
+class DaemonUnavailable(Exception):
+    pass
+
+
+class DaemonDisconnected(DaemonUnavailable):
+    """The daemon went away after the request was sent: the command may have run, partly or
+    fully, so it must not simply be run again."""
+
+
+class _Output:
+    """File-like object that turns writes into "output" notifications to one client.
+    Once the client is gone, writes raise BrokenPipeError so the running command stops."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.closed = False
+
+    def write(self, text):
+        if self.closed:
+            raise BrokenPipeError("client disconnected")
+        if text:
+            try:
+                _send(self.conn, {"jsonrpc": PROTOCOL, "method": "output", "params": {"text": text}})
+            except OSError:
+                self.closed = True
+                raise
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+
+class _CommandStdout:
+    """sys.stdout while the daemon serves. Prints from the running command's thread and from
+    threads started during it (download workers) go to its client, everything else (listeners
+    of detached games, threads left from earlier commands) to the daemon's own stdout."""
+
+    def __init__(self, stdout):
+        self.stdout = stdout
+        self.output = None
+        self.background = frozenset()
+
+    def begin(self, output):
+        self.background = frozenset(t.ident for t in threading.enumerate()) - {threading.get_ident()}
+        self.output = output
+
+    def end(self):
+        self.output = None
+
+    def _target(self):
+        output = self.output
+        if output is not None and threading.get_ident() not in self.background:
+            return output
+        return self.stdout
+
+    def write(self, text):
+        return self._target().write(text)
+
+    def flush(self):
+        self._target().flush()
+
+    def isatty(self):
+        return self._target().isatty()
+
+
+def _send(conn, message):
+    conn.sendall(json.dumps(message).encode("utf-8") + b"\n")
+
+
+class LauncherDaemon:
+    """Serves JSON-RPC requests on a Unix socket in the game directory.
+
+    Methods: "ping", "shutdown", and "run" whose params are handed to handler(params), which
+    returns an exit code. Commands run one at a time, with their prints (including those of the
+    worker threads they start) sent to the calling client, which is why long streaming commands
+    are better left to the client process."""
+
+    def __init__(self, game_directory, handler):
+        self.game_directory = game_directory
+        self.handler = handler
+        self.path = socket_path(game_directory)
+        self.started = None
+        self.served = 0
+        self._server = None
+        self._stdout = None
+        self._command_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def serve_forever(self):
+        if os.path.exists(self.path):
+            try:
+                call(self.game_directory, "ping", timeout=1)
+            except DaemonUnavailable:
+                os.remove(self.path)  # Left behind by a daemon that died
+            else:
+                raise DaemonUnavailable(f"A daemon is already running on {self.path}")
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        umask = os.umask(0o177)  # Created 0600, no window where other users can connect
+        try:
+            self._server.bind(self.path)
+        finally:
+            os.umask(umask)
+        self._server.listen(16)
+        self._server.settimeout(0.5)
+        self.started = time.time()
+        print(f"Daemon listening on {self.path} (pid {os.getpid()})")
+        stdout = sys.stdout
+        self._stdout = sys.stdout = _CommandStdout(stdout)
+        try:
+            while not self._stop.is_set():
+                try:
+                    conn, _ = self._server.accept()
+                except socket.timeout:
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        finally:
+            sys.stdout = stdout
+            self._server.close()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def shutdown(self):
+        self._stop.set()
+
+    def _handle(self, conn):
+        with conn, conn.makefile("r", encoding="utf-8") as reader:
+            for line in reader:
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    _send(conn, {"jsonrpc": PROTOCOL, "id": None, "error": {"code": PARSE_ERROR, "message": "Parse error"}})
+                    continue
+                try:
+                    _send(conn, self._dispatch(conn, request))
+                except OSError:
+                    return  # Client went away
+
+    def _dispatch(self, conn, request):
+        rid = request.get("id")
+        method = request.get("method")
+        if method == "ping":
+            result = {"pid": os.getpid(), "uptime": time.time() - self.started, "served": self.served,
+                      "game_directory": self.game_directory}
+        elif method == "shutdown":
+            self.shutdown()
+            result = {"stopping": True}
+        elif method == "run":
+            try:
+                result = {"exit_code": self._run(conn, request.get("params") or {})}
+            except Exception as e:
+                return {"jsonrpc": PROTOCOL, "id": rid, "error": {"code": INTERNAL_ERROR, "message": str(e)}}
+        else:
+            return {"jsonrpc": PROTOCOL, "id": rid, "error": {"code": METHOD_NOT_FOUND, "message": f"Unknown method {method}"}}
+        return {"jsonrpc": PROTOCOL, "id": rid, "result": result}
+
+    def _run(self, conn, params):
+        output = _Output(conn)
+        with self._command_lock:
+            self._stdout.begin(output)
+            try:
+                code = self.handler(params)
+            except SystemExit as e:
+                code = e.code
+                if isinstance(code, str):
+                    print(code)
+                    code = 1
+            except BrokenPipeError:
+                code = 1
+            finally:
+                self._stdout.end()
+                self.served += 1
+        return code or 0
+
+
+def call(game_directory, method, params=None, on_output=None, timeout=None):
+    """Sends one request to the daemon and returns its result. Output notifications go to
+    on_output(text). Raises DaemonUnavailable if no daemon answers, DaemonDisconnected if the
+    connection is lost once the request is sent, RuntimeError for RPC errors."""
+    if not supported():
+        raise DaemonUnavailable("Unix sockets are not available on this platform")
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    conn.settimeout(timeout)
+    try:
+        conn.connect(socket_path(game_directory))
+    except OSError as e:
+        conn.close()
+        raise DaemonUnavailable(str(e))
+    with conn, conn.makefile("r", encoding="utf-8") as reader:
+        try:
+            _send(conn, {"jsonrpc": PROTOCOL, "id": 1, "method": method, "params": params or {}})
+        except OSError as e:
+            raise DaemonDisconnected(f"daemon connection lost: {e}")
+        while True:
+            try:
+                line = reader.readline()
+            except OSError as e:
+                raise DaemonDisconnected(f"daemon connection lost: {e}")
+            if not line:
+                break
+            message = json.loads(line)
+            if message.get("method") == "output":
+                if on_output:
+                    on_output(message["params"]["text"])
+            elif "error" in message:
+                raise RuntimeError(message["error"]["message"])
+            else:
+                return message["result"]
+    raise DaemonDisconnected("daemon connection lost")
@@ -0,0 +1,476 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import hashlib
+import platform
+import random
+import threading
+import time
+import json
+import os
+from core import trace
+
+USER_AGENT = "NanoLauncher/1.0 (launcher@nano.app)"
+
+VERSION_MANIFEST_URL = "https://piston-meta.mojang.com/mc/game/version_manifest_v2.json"
+RESOURCES_URL = "https://resources.download.minecraft.net"
+LIBRARIES_URL = "https://libraries.minecraft.net/"
+JAVA_RUNTIME_MANIFEST_URL = "https://launchermeta.mojang.com/v1/products/java-runtime/2ec0cc96c44e5a76b9c8b7c39df7210883d12871/all.json"
+
+DEFAULT_JOBS = 16
+CHUNK_SIZE = 64 * 1024
+VERIFIED_HASHES = ("sha1", "sha512")
+
+# Peer cache (see core/peer.py) clients use when no peer is passed explicitly
+PEER_ENV = "NANO_LAUNCHER_PEER"
+# Seconds to wait for a peer's connection, and to leave it alone after it could not be reached
+PEER_CONNECT_TIMEOUT = 3
+PEER_RETRY_AFTER = 60
+
+
+def create_session(pool_size=DEFAULT_JOBS):
+    """Returns a requests session with a connection pool big enough for pool_size workers."""
+    # requests (with urllib3/certifi) takes ~80ms to import, only pay for it once a download starts
+    import requests
+    session = requests.Session()
+    mount_pool(session, pool_size)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+def mount_pool(session, pool_size):
+    """Gives session a fresh connection pool for pool_size workers. Requests already running
+    keep the previous pool until they finish."""
+    from requests.adapters import HTTPAdapter
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+
+class DownloadError(Exception):
+    pass
+
+
+def default_peer():
+    return os.environ.get(PEER_ENV) or None
+
+
+def peer_url(peer, url, sha1=None, hashes=None, size=None):
+    """Where a peer cache serves the artifact, keyed by its SHA1 (or SHA512 if that is all there
+    is), with the upstream url for the peer to fetch it from on a miss. None without a hash."""
+    from urllib.parse import quote
+    hashes = hashes or {}
+    sha1 = sha1 or hashes.get("sha1")
+    if sha1:
+        key = f"sha1/{sha1}"
+    elif hashes.get("sha512"):
+        key = f"sha512/{hashes['sha512']}"
+    else:
+        return None
+    query = "url=" + quote(url, safe="")
+    if size is not None:
+        query += f"&size={size}"
+    return f"{peer.rstrip('/')}/{key}?{query}"
+
+
+class SingleFlight:
+    """Merges concurrent calls with the same key: the first caller runs fn, the others wait for
+    it and share its result (or exception)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        """Returns (result, shared), shared being True for callers that waited on another's call."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {"done": threading.Event(), "result": None, "error": None}
+        if not leader:
+            call["done"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"], True
+        try:
+            call["result"] = fn()
+        except BaseException as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call["done"].set()
+        return call["result"], False
+
+
+class DownloadTask:
+    """A single file to fetch. sha1/size are optional and used for verification and skipping."""
+    __slots__ = ("url", "path", "sha1", "size")
+
+    def __init__(self, url, path, sha1=None, size=None):
+        self.url = url
+        self.path = path
+        self.sha1 = sha1
+        self.size = size
+
+    def is_present(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return False
+        return self.size is None or st.st_size == self.size
+
+
+def _os_name():
+    system = platform.system()
+    if system == "Windows":
+        return "windows"
+    if system == "Darwin":
+        return "osx"
+    return "linux"
+
+
+def _jvm_platform():
+    """Platform key of Mojang's Java runtime manifest, as minecraft_launcher_lib picks it."""
+    system = platform.system()
+    bits32 = platform.architecture()[0] == "32bit"
+    if system == "Windows":
+        return "windows-x86" if bits32 else "windows-x64"
+    if system == "Linux":
+        return "linux-i386" if bits32 else "linux"
+    if system == "Darwin":
+        return "mac-os-arm64" if platform.machine() == "arm64" else "mac-os"
+    return "gamecore"
+
+
+def maven_path(name):
+    """net.fabricmc:fabric-loader:0.14.21 -> net/fabricmc/fabric-loader/0.14.21/fabric-loader-0.14.21.jar"""
+    name, _, ext = name.partition("@")
+    group, artifact, version = name.split(":")[:3]
+    classifier = name.split(":")[3] if name.count(":") >= 3 else None
+    filename = f"{artifact}-{version}" + (f"-{classifier}" if classifier else "") + "." + (ext or "jar")
+    return "/".join(group.split(".") + [artifact, version, filename])
+
+
+def rules_allow(rules):
+    """Evaluates a version JSON 'rules' list for the current OS (features are treated as disabled)."""
+    allowed = False
+    for rule in rules:
+        if "features" in rule:
+            continue
+        os_rule = rule.get("os", {})
+        if "name" in os_rule and os_rule["name"] != _os_name():
+            continue
+        if os_rule.get("arch") == "x86" and platform.architecture()[0] != "32bit":
+            continue
+        allowed = rule["action"] == "allow"
+    return allowed
+
+
+class Downloader:
+    """Bounded worker pool sharing one pooled HTTP session, with per-file retries and backoff."""
+
+    def __init__(self, jobs=DEFAULT_JOBS, retries=3, backoff=0.5, timeout=30, mirrors=None, store=None, peer=None):
+        self._session = None
+        self._pool_size = 0
+        self._session_lock = threading.Lock()
+        self.jobs = jobs  # After the session fields, the setter checks them
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        # {"https://resources.download.minecraft.net": "http://127.0.0.1:8000/resources", ...}
+        self.mirrors = dict(mirrors or {})
+        # Optional ArtifactStore: hits are linked into place, misses are downloaded into it
+        self.store = store
+        # Optional peer cache URL ("http://10.0.0.5:8737"), asked first for anything with a known hash
+        self.peer = peer.rstrip("/") if peer else None
+        self._peer_down_until = 0.0
+        self._flight = SingleFlight()
+
+    @property
+    def jobs(self):
+        return self._jobs
+
+    @jobs.setter
+    def jobs(self, jobs):
+        """Worker count. A session built for fewer workers gets a bigger pool, otherwise the
+        extra workers' connections would be discarded instead of reused."""
+        self._jobs = max(1, jobs)
+        with self._session_lock:
+            if self._session is not None and self._jobs > self._pool_size:
+                self._pool_size = self._jobs
+                mount_pool(self._session, self._pool_size)
+
+    @property
+    def session(self):
+        with self._session_lock:
+            if self._session is None:
+                self._pool_size = max(self.jobs, DEFAULT_JOBS)
+                self._session = create_session(self._pool_size)
+            return self._session
+
+    def rewrite(self, url):
+        for prefix, mirror in self.mirrors.items():
+            if url.startswith(prefix):
+                return mirror.rstrip("/") + url[len(prefix):]
+        return url
+
+    def get_json(self, url):
+        r = self.session.get(self.rewrite(url), timeout=self.timeout)
+        r.raise_for_status()
+        return r.json()
+
+    def fetch(self, url, path, sha1=None, size=None, hashes=None, resume=False):
+        """Downloads url to path through a temp file, retrying with exponential backoff. Returns bytes written.
+
+        hashes is a Modrinth style {"sha1": ..., "sha512": ...} dict checked while streaming.
+        With resume=True the partial file survives errors and the next attempt continues it with a Range request."""
+        import requests
+        if self.peer and time.monotonic() >= self._peer_down_until:
+            source = peer_url(self.peer, url, sha1, hashes, size)
+            if source:
+                try:
+                    with trace.span("peer_download", "download", url=url) as span:
+                        written = self._fetch_once(source, path, sha1, size, hashes,
+                                                   timeout=(PEER_CONNECT_TIMEOUT, self.timeout))
+                        span.set(bytes=written)
+                    return written
+                except requests.ConnectionError:
+                    self._peer_down_until = time.monotonic() + PEER_RETRY_AFTER
+                except (requests.RequestException, DownloadError, OSError):
+                    pass  # Peer without the file, or it failed verification: go upstream
+        last_error = None
+        with trace.span("download", "download", url=url) as span:
+            for attempt in range(self.retries + 1):
+                if attempt:
+                    time.sleep(self.backoff * (2 ** (attempt - 1)) * (1 + random.random()))
+                try:
+                    written = self._fetch_once(url, path, sha1, size, hashes, resume)
+                    span.set(bytes=written, attempts=attempt + 1)
+                    return written
+                except (requests.RequestException, DownloadError, OSError) as e:
+                    last_error = e
+            span.set(error=str(last_error), attempts=self.retries + 1)
+        raise DownloadError(f"{url}: {last_error}")
+
+    def _fetch_once(self, url, path, sha1, size, hashes=None, resume=False, timeout=None):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        expected = {name: value for name, value in (hashes or {}).items() if name in VERIFIED_HASHES}
+        if sha1:
+            expected["sha1"] = sha1
+        digests = {name: hashlib.new(name) for name in expected}
+
+        # Resumable downloads need a stable temp name, the others a per-thread one (two tasks may share a store blob)
+        tmp_path = path + ".part" if resume else f"{path}.{threading.get_ident()}.part"
+        offset = os.path.getsize(tmp_path) if resume and os.path.exists(tmp_path) else 0
+        if size is not None and offset >= size:
+            offset = 0
+        headers = {"Range": f"bytes={offset}-"} if offset else None
+
+        written = 0
+        try:
+            with self.session.get(self.rewrite(url), stream=True, timeout=timeout or self.timeout, headers=headers) as r:
+                r.raise_for_status()
+                if offset and r.status_code != 206:
+                    offset = 0  # Server ignored the Range header, start over
+                if offset:
+                    with open(tmp_path, "rb") as f:
+                        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                            for digest in digests.values():
+                                digest.update(chunk)
+                with open(tmp_path, "ab" if offset else "wb") as f:
+                    for chunk in r.iter_content(CHUNK_SIZE):
+                        f.write(chunk)
+                        for digest in digests.values():
+                            digest.update(chunk)
+                        written += len(chunk)
+            if size is not None and offset + written != size:
+                raise DownloadError(f"size mismatch ({offset + written} != {size})")
+            for name, digest in digests.items():
+                if digest.hexdigest() != expected[name]:
+                    raise DownloadError(f"{name} mismatch ({digest.hexdigest()} != {expected[name]})")
+            os.replace(tmp_path, path)
+        except DownloadError:
+            # Bad content, a resumed attempt would only append to it
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        finally:
+            if not resume and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return written
+
+    def fetch_task(self, task):
+        """Fetches a single task, going through the artifact store when the hash is known.
+        Tasks sharing a blob download it once, the others link it when that is done."""
+        if self.store is None or not task.sha1:
+            return self.fetch(task.url, task.path, task.sha1, task.size)
+        blob = self.store.blob_path(task.sha1)
+        written, shared = self._flight.do(task.sha1, lambda: self.fetch(task.url, blob, task.sha1, task.size))
+        self.store.link(task.sha1, task.path)
+        return 0 if shared else written
+
+    def run(self, tasks, callback=None):
+        """Downloads every task that is not already present. Returns a stats dict."""
+        callback = callback or {}
+        set_progress = callback.get("setProgress", lambda *args: None)
+        stats = {"total": len(tasks), "downloaded": 0, "linked": 0, "skipped": 0, "bytes": 0, "failed": []}
+        pending = []
+        for t in tasks:
+            if t.is_present():
+                stats["skipped"] += 1
+            elif self.store is not None and t.sha1 and self.store.has(t.sha1):
+                self.store.link(t.sha1, t.path)
+                stats["linked"] += 1
+            else:
+                pending.append(t)
+        if not pending:
+            return stats
+
+        callback.get("setMax", lambda *args: None)(len(pending))
+        start = time.perf_counter()
+        with trace.span("download_batch", "download", files=len(pending), jobs=self.jobs) as span:
+            with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+                futures = {pool.submit(self.fetch_task, t): t for t in pending}
+                for done, future in enumerate(as_completed(futures), 1):
+                    try:
+                        stats["bytes"] += future.result()
+                        stats["downloaded"] += 1
+                    except DownloadError as e:
+                        stats["failed"].append(str(e))
+                    set_progress(done)
+            span.set(bytes=stats["bytes"], failed=len(stats["failed"]))
+        stats["seconds"] = time.perf_counter() - start
+        return stats
+
+    # --- Version JSON / asset index -> task list ---
+
+    def resolve_version_json(self, game_directory, version_id, fetch=True):
+        """Loads versions/<id>/<id>.json, fetching it from the version manifest if it is not installed yet."""
+        path = os.path.join(game_directory, "versions", version_id, version_id + ".json")
+        with trace.span("resolve_version_json", version=version_id):
+            if not os.path.isfile(path):
+                if not fetch:
+                    raise DownloadError(f"Version {version_id} is not installed")
+                manifest = self.get_json(VERSION_MANIFEST_URL)
+                entry = next((v for v in manifest["versions"] if v["id"] == version_id), None)
+                if entry is None:
+                    raise DownloadError(f"Version {version_id} not found in the version manifest")
+                self.fetch(entry["url"], path, entry.get("sha1"))
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+
+    def version_tasks(self, game_directory, version_id, fetch=True):
+        """Builds the full task list (client jar, libraries, natives, log config, assets) for a version.
+        With fetch=False nothing is downloaded and only locally available metadata is used."""
+        data = self.resolve_version_json(game_directory, version_id, fetch)
+        libraries = list(data.get("libraries", []))
+        parent_id = data.get("inheritsFrom")
+        while parent_id:
+            parent = self.resolve_version_json(game_directory, parent_id, fetch)
+            libraries += parent.get("libraries", [])
+            for key in ("downloads", "assetIndex", "assets", "logging"):
+                if key not in data and key in parent:
+                    data[key] = parent[key]
+            parent_id = parent.get("inheritsFrom")
+
+        tasks = []
+        client = (data.get("downloads") or {}).get("client")
+        if client:
+            jar_path = os.path.join(game_directory, "versions", version_id, version_id + ".jar")
+            tasks.append(DownloadTask(client["url"], jar_path, client.get("sha1"), client.get("size")))
+        tasks += self.library_tasks(game_directory, libraries)
+
+        log_file = ((data.get("logging") or {}).get("client") or {}).get("file")
+        if log_file:
+            tasks.append(DownloadTask(log_file["url"], os.path.join(game_directory, "assets", "log_configs", log_file["id"]), log_file.get("sha1"), log_file.get("size")))
+
+        asset_index = data.get("assetIndex")
+        if asset_index:
+            index_path = os.path.join(game_directory, "assets", "indexes", data.get("assets", asset_index["id"]) + ".json")
+            index_task = DownloadTask(asset_index["url"], index_path, asset_index.get("sha1"), asset_index.get("size"))
+            if not index_task.is_present() and fetch:
+                self.fetch(index_task.url, index_task.path, index_task.sha1, index_task.size)
+            tasks.append(index_task)
+            objects = {}
+            if os.path.isfile(index_path):
+                with open(index_path, "r", encoding="utf-8") as f:
+                    objects = json.load(f).get("objects", {})
+            objects_dir = os.path.join(game_directory, "assets", "objects")
+            seen = set()
+            for obj in objects.values():
+                h = obj["hash"]
+                if h in seen:
+                    continue
+                seen.add(h)
+                tasks.append(DownloadTask(f"{RESOURCES_URL}/{h[:2]}/{h}", os.path.join(objects_dir, h[:2], h), h, obj.get("size")))
+
+        # De-duplicate by destination (inherited libraries can repeat)
+        unique = {}
+        for t in tasks:
+            unique.setdefault(t.path, t)
+        return list(unique.values())
+
+    def library_tasks(self, game_directory, libraries):
+        """Tasks for a version JSON style "libraries" list: artifacts, Maven entries and natives."""
+        tasks = []
+        libraries_dir = os.path.join(game_directory, "libraries")
+        arch = "32" if platform.architecture()[0] == "32bit" else "64"
+        for lib in libraries:
+            if "rules" in lib and not rules_allow(lib["rules"]):
+                continue
+            downloads = lib.get("downloads", {})
+            artifact = downloads.get("artifact")
+            if artifact and artifact.get("url") and artifact.get("path"):
+                tasks.append(DownloadTask(artifact["url"], os.path.join(libraries_dir, artifact["path"]), artifact.get("sha1"), artifact.get("size")))
+            elif "downloads" not in lib and "name" in lib:
+                # Maven style entries used by Fabric/Quilt profiles
+                rel = maven_path(lib["name"])
+                base = lib.get("url") or LIBRARIES_URL
+                tasks.append(DownloadTask(base.rstrip("/") + "/" + rel, os.path.join(libraries_dir, *rel.split("/")), lib.get("sha1"), lib.get("size")))
+            native_key = lib.get("natives", {}).get(_os_name())
+            if native_key:
+                native = downloads.get("classifiers", {}).get(native_key.replace("${arch}", arch))
+                if native and native.get("url") and native.get("path"):
+                    tasks.append(DownloadTask(native["url"], os.path.join(libraries_dir, native["path"]), native.get("sha1"), native.get("size")))
+        return tasks
+
+    def runtime_tasks(self, game_directory, component):
+        """Tasks for the files of one of Mojang's Java runtimes ("java-runtime-gamma", ...), at the
+        paths minecraft_launcher_lib installs them to. Empty if there is no build for this platform."""
+        platform_name = _jvm_platform()
+        builds = self.get_json(JAVA_RUNTIME_MANIFEST_URL).get(platform_name, {}).get(component) or []
+        if not builds:
+            return []
+        files = self.get_json(builds[0]["manifest"]["url"]).get("files", {})
+        base = os.path.join(game_directory, "runtime", component, platform_name, component)
+        tasks = []
+        for name, entry in files.items():
+            raw = (entry.get("downloads") or {}).get("raw")
+            if entry.get("type") == "file" and raw:
+                tasks.append(DownloadTask(raw["url"], os.path.join(base, *name.split("/")), raw.get("sha1"), raw.get("size")))
+        return tasks
+
+    def prefetch_version(self, game_directory, version_id, callback=None):
+        """Downloads everything a version needs in one parallel pass."""
+        callback = callback or {}
+        set_status = callback.get("setStatus", print)
+        set_status(f"Resolving {version_id}")
+        tasks = self.version_tasks(game_directory, version_id)
+        # The Java runtime minecraft_launcher_lib installs next, it skips files already in place
+        component = (self.resolve_version_json(game_directory, version_id, fetch=False).get("javaVersion") or {}).get("component")
+        if component:
+            try:
+                tasks += self.runtime_tasks(game_directory, component)
+            except (DownloadError, OSError, ValueError, KeyError) as e:
+                set_status(f"Java runtime prefetch skipped: {e}")
+        set_status(f"Downloading {len(tasks)} files with {self.jobs} workers")
+        stats = self.run(tasks, callback)
+        if stats["downloaded"]:
+            mb = stats["bytes"] / (1024 * 1024)
+            set_status(f"Downloaded {stats['downloaded']} files ({mb:.1f} MB) in {stats['seconds']:.1f}s, {stats['skipped']} already present")
+        if stats["linked"]:
+            set_status(f"Linked {stats['linked']} files from the shared artifact store")
+        if stats["failed"]:
+            set_status(f"{len(stats['failed'])} downloads failed, falling back to the installer")
+        return stats
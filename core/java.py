@@ -0,0 +1,225 @@
+from concurrent.futures import ThreadPoolExecutor
+import subprocess
+import platform
+import shutil
+import glob
+import json
+import os
+import re
+
+JAVA_BINARY = "java.exe" if platform.system() == "Windows" else "java"
+
+# Install prefixes that hold one JDK/JRE per subdirectory
+SEARCH_GLOBS = [
+    "/usr/lib/jvm/*",
+    "/usr/lib64/jvm/*",
+    "/usr/java/*",
+    "/opt/java/*",
+    "/opt/jdk*",
+    "/opt/*jdk*",
+    "~/.sdkman/candidates/java/*",
+    "~/.jdks/*",
+    "~/.local/share/JetBrains/Toolbox/apps/*/jbr",
+    "/Library/Java/JavaVirtualMachines/*/Contents/Home",
+    "~/Library/Java/JavaVirtualMachines/*/Contents/Home",
+    "C:/Program Files/Java/*",
+    "C:/Program Files/Eclipse Adoptium/*",
+    "C:/Program Files/Microsoft/jdk-*",
+    "C:/Program Files/Zulu/*",
+]
+
+# Bump when probe() records something new, older index entries are probed again
+INDEX_VERSION = 2
+
+_PROPERTY = re.compile(r"^\s+([\w.]+) = (.*)$")
+_FLAG = re.compile(r"^\s*\S+\s+(\w+)\s+:?=")
+
+
+def parse_major(spec_version):
+    """'1.8' -> 8, '17' -> 17"""
+    parts = spec_version.split(".")
+    if parts[0] == "1" and len(parts) > 1:
+        return int(parts[1])
+    return int(parts[0])
+
+
+def probe(path):
+    """Runs the JVM once with -XshowSettings:properties and -XX:+PrintFlagsFinal and returns its description."""
+    # Unlocked so experimental options (G1NewSizePercent, ...) show up in the flag list
+    result = subprocess.run([path, "-XshowSettings:properties", "-XX:+UnlockExperimentalVMOptions",
+                             "-XX:+PrintFlagsFinal", "-version"],
+                            capture_output=True, text=True, timeout=30)
+    props = {}
+    for line in result.stderr.splitlines():
+        m = _PROPERTY.match(line)
+        if m:
+            props[m.group(1)] = m.group(2).strip()
+    flags = sorted({m.group(1) for m in map(_FLAG.match, result.stdout.splitlines()) if m})
+    if "java.specification.version" not in props:
+        raise ValueError(f"{path} did not report its version")
+    return {
+        "path": path,
+        "version": props.get("java.version", ""),
+        "major": parse_major(props["java.specification.version"]),
+        "vendor": props.get("java.vendor", ""),
+        "arch": props.get("os.arch", ""),
+        "bits": int(props.get("sun.arch.data.model", "64") or 64),
+        "flags": flags,
+    }
+
+
+class JavaIndex:
+    """Index of the JVMs on this machine, probed once and cached by binary mtime."""
+
+    def __init__(self, game_directory):
+        self.game_directory = game_directory
+        self.cache_path = os.path.join(game_directory, "cache", "java_index.json")
+        self._data = None
+
+    def candidates(self):
+        """Yields every java binary that could be used, deduplicated by real path."""
+        homes = []
+        if os.environ.get("JAVA_HOME"):
+            homes.append(os.environ["JAVA_HOME"])
+        for pattern in SEARCH_GLOBS:
+            homes += glob.glob(os.path.expanduser(pattern))
+        # Mojang runtimes: runtime/<component>/<platform>/<component>/bin/java
+        for runtime_root in (os.path.join(self.game_directory, "runtime"), os.path.expanduser("~/.minecraft/runtime")):
+            homes += glob.glob(os.path.join(runtime_root, "*", "*", "*"))
+
+        binaries = [os.path.join(home, "bin", JAVA_BINARY) for home in homes]
+        for directory in os.environ.get("PATH", "").split(os.pathsep):
+            binaries.append(os.path.join(directory, JAVA_BINARY))
+        found = shutil.which("java")
+        if found:
+            binaries.append(found)
+
+        seen = set()
+        for binary in binaries:
+            if not os.path.isfile(binary):
+                continue
+            real = os.path.realpath(binary)
+            if real not in seen:
+                seen.add(real)
+                yield real
+
+    def _load(self):
+        if self._data is None:
+            try:
+                with open(self.cache_path, "r", encoding="utf-8") as f:
+                    self._data = json.load(f)
+            except (OSError, ValueError):
+                self._data = None
+            if not self._data or self._data.get("version") != INDEX_VERSION:
+                required = (self._data or {}).get("required", {})
+                self._data = {"version": INDEX_VERSION, "runtimes": {}, "required": required, "scanned": False}
+        return self._data
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp = self.cache_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._data, f)
+        os.replace(tmp, self.cache_path)
+
+    def _refresh(self, paths, force=False):
+        """Probes every path whose binary is new or changed, in parallel."""
+        data = self._load()
+        runtimes = data["runtimes"]
+        todo = []
+        for path in paths:
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                runtimes.pop(path, None)
+                continue
+            entry = runtimes.get(path)
+            if force or entry is None or entry.get("mtime_ns") != mtime:
+                todo.append((path, mtime))
+        if not todo:
+            return False
+
+        def _probe(item):
+            path, mtime = item
+            try:
+                info = probe(path)
+            except (OSError, ValueError, subprocess.SubprocessError) as e:
+                print(f"Skipping {path}: {e}")
+                return path, None
+            info["mtime_ns"] = mtime
+            return path, info
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            for path, info in pool.map(_probe, todo):
+                if info is None:
+                    runtimes.pop(path, None)
+                else:
+                    runtimes[path] = info
+        return True
+
+    def scan(self, force=False):
+        """Full scan of JAVA_HOME, PATH, common prefixes and Mojang runtimes. Returns the runtimes."""
+        data = self._load()
+        paths = list(self.candidates())
+        for stale in set(data["runtimes"]) - set(paths):
+            del data["runtimes"][stale]
+        self._refresh(paths, force=force)
+        data["scanned"] = True
+        self._save()
+        return self.runtimes()
+
+    def runtimes(self):
+        data = self._load()
+        if not data["scanned"]:
+            return self.scan()
+        # Cheap revalidation: only the already known binaries are stat'ed
+        if self._refresh(list(data["runtimes"])):
+            self._save()
+        return sorted(data["runtimes"].values(), key=lambda r: (r["major"], r["version"]))
+
+    def info(self, path):
+        """Description of one JVM binary, probing it first if it is not indexed yet."""
+        path = os.path.realpath(shutil.which(path) or path)
+        if self._refresh([path]):
+            self._save()
+        return self._load()["runtimes"].get(path)
+
+    def required_major(self, version_id):
+        """javaVersion.majorVersion of a version, following inheritsFrom. Memoized by JSON mtime."""
+        data = self._load()
+        while version_id:
+            path = os.path.join(self.game_directory, "versions", version_id, version_id + ".json")
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                return None
+            memo = data["required"].get(path)
+            if memo and memo[0] == mtime:
+                major, version_id = memo[1], memo[2]
+            else:
+                with open(path, "r", encoding="utf-8") as f:
+                    version_json = json.load(f)
+                major = (version_json.get("javaVersion") or {}).get("majorVersion")
+                version_id = version_json.get("inheritsFrom")
+                data["required"][path] = [mtime, major, version_id]
+                self._save()
+            if major:
+                return major
+        return None
+
+    def select(self, major=None):
+        """Best JVM for a required major version: exact match first, then the closest newer one.
+        Java 8 has no fallback: LaunchWrapper era versions (Forge 1.12 and older) crash on 9+.
+        64-bit runtimes win over 32-bit ones. Returns None when nothing suitable is installed."""
+        runtimes = self.runtimes()
+        if major is None:
+            # Versions from before javaVersion was recorded run on Java 8
+            major = 8
+
+        def rank(r):
+            return (r["major"] != major, r["major"] - major, r["bits"] != 64)
+
+        suitable = [r for r in runtimes if r["major"] == major or (major > 8 and r["major"] > major)]
+        if not suitable:
+            return None
+        return min(suitable, key=rank)
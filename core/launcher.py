@@ -1,33 +1,81 @@
-import minecraft_launcher_lib
-import subprocess
 import sys
 import os
 import uuid
 import platform
 import json
+import time
+from core import plans, tuning, trace
+from core.downloader import Downloader, DownloadError, DEFAULT_JOBS, default_peer
+from core.store import ArtifactStore, sha1_file
+from core.java import JavaIndex
+from core.cds import CdsManager
+from core.supervisor import Supervisor
+from core.verify import Verifier
+from core.cache import HttpCache
+from core.versions import InstalledVersions, RemoteVersions, LOADER_PROFILE_URLS
+
+# minecraft_launcher_lib is imported where it is used: it pulls in requests and takes ~100ms,
+# which commands like list or a launch from a cached plan never need.
+
+def default_game_directory():
+    # Portable by default OR standard location
+    if platform.system() == "Windows":
+        return os.path.join(os.environ["APPDATA"], ".nano_launcher")
+    elif platform.system() == "Darwin":
+        return os.path.expanduser("~/Library/Application Support/nano_launcher")
+    else:
+        return os.path.expanduser("~/.nano_launcher")
 
 class NanoCore:
-    def __init__(self, game_directory=None):
-        if not game_directory:
-            # Portable by default OR standard location
-            if platform.system() == "Windows":
-                 self.game_directory = os.path.join(os.environ["APPDATA"], ".nano_launcher")
-            elif platform.system() == "Darwin":
-                 self.game_directory = os.path.expanduser("~/Library/Application Support/nano_launcher")
-            else:
-                 self.game_directory = os.path.expanduser("~/.nano_launcher")
-        else:
-            self.game_directory = game_directory
+    def __init__(self, game_directory=None, jobs=DEFAULT_JOBS, mirrors=None, peer=None):
+        self.game_directory = game_directory or default_game_directory()
         
         if not os.path.exists(self.game_directory):
             os.makedirs(self.game_directory)
 
+        self.java = JavaIndex(self.game_directory)
+        self.cds = CdsManager(self.game_directory)
+        self.supervisor = Supervisor(os.path.join(self.game_directory, "instances"))
+        self.supervisor.add_listener(self._on_game_event)
+        self.plans = plans.LaunchPlanCache(os.path.join(self.game_directory, "cache", "launch_plans"))
+        self.store = ArtifactStore(os.path.join(self.game_directory, "store"))
+        self.downloader = Downloader(jobs=jobs, mirrors=mirrors, store=self.store, peer=peer or default_peer())
+        self.verifier = Verifier(self.game_directory, self.downloader)
+        self.installed = InstalledVersions(self.game_directory)
+        http_cache = HttpCache(os.path.join(self.game_directory, "cache", "http"), lambda: self.downloader.session)
+        self.remote = RemoteVersions(http_cache, self.downloader.rewrite)
+
     def get_installed_versions(self):
-        return minecraft_launcher_lib.utils.get_installed_versions(self.game_directory)
+        return self.installed.list()
 
-    def install_version(self, version_id, loader=None, callback=None):
-        """Installs a specific version. Supports installing Fabric/Forge/Quilt directly."""
+    def check_version(self, version_id, loader=None):
+        """Raises ValueError if the version (and loader) is not in the cached version lists.
+        A failed check refreshes the lists once, so a release newer than the cache still passes."""
+        if not self.remote.known():
+            self.remote.refresh()
+        if self.remote.validate(version_id, loader) is None:
+            return
+        self.remote.refresh(ttl=0)
+        error = self.remote.validate(version_id, loader)
+        if error:
+            raise ValueError(error)
+
+    def install_version(self, version_id, loader=None, callback=None, jobs=None, loader_version=None):
+        """Installs a specific version. Supports installing Fabric/Forge/Quilt directly.
+        loader_version pins the loader build (e.g. from a modpack), otherwise the latest is used."""
+        with trace.span("install_version", "install", version=version_id, loader=loader or "vanilla"):
+            return self._install_version(version_id, loader, callback, jobs, loader_version)
+
+    def _install_version(self, version_id, loader, callback, jobs, loader_version):
+        if loader == "forge" and loader_version:
+            version_id = f"{version_id}-{loader_version}"
+        # Typos fail here, before anything is downloaded
+        with trace.span("check_version", "install"):
+            self.check_version(version_id, loader)
+        import minecraft_launcher_lib
         print(f"Installing {version_id}...")
+        if jobs:
+            self.downloader.jobs = jobs
         
         # Default empty callback to avoid errors
         if not callback:
@@ -38,76 +86,214 @@ class NanoCore:
         if "setProgress" not in callback: callback["setProgress"] = lambda *args: None
         if "setMax" not in callback: callback["setMax"] = lambda *args: None
 
-        if loader == "fabric":
-            print("Installing Fabric...")
-            # fabric install doesn't support standard callback dict in older versions, checking...
-            # modern minecraft-launcher-lib supports it usually.
-            minecraft_launcher_lib.fabric.install_fabric(version_id, self.game_directory, callback=callback)
-            version_id = minecraft_launcher_lib.fabric.get_fabric_version(version_id) # Update ID to modded one
-        elif loader == "forge":
-            print("Installing Forge...")
-            minecraft_launcher_lib.forge.install_forge_version(version_id, self.game_directory, callback=callback)
-            version_id = minecraft_launcher_lib.forge.find_forge_version(version_id)
-        elif loader == "quilt":
-            print("Installing Quilt...")
-            minecraft_launcher_lib.quilt.install_quilt(version_id, self.game_directory, callback=callback)
-            version_id = minecraft_launcher_lib.quilt.get_quilt_version(version_id)
-        else:
-            minecraft_launcher_lib.install.install_minecraft_version(version_id, self.game_directory, callback=callback)
-            # Vanilla ID is just the version itself
+        # Pick the loader build now, so its libraries can be prefetched and the ID is known
+        if loader in LOADER_PROFILE_URLS and not loader_version:
+            builds = self.remote.loader_versions(loader)
+            loader_version = builds[0] if builds else getattr(minecraft_launcher_lib, loader).get_latest_loader_version()
+
+        # Fetch the game version's jar, libraries, assets and Java runtime in one parallel pass,
+        # then the Fabric/Quilt loader's libraries. minecraft_launcher_lib then only finds
+        # verified files already in place and is left with natives extraction and loader setup.
+        # Forge IDs look like "1.20.1-47.1.0", the game version is the part before the dash.
+        game_version = version_id.split("-")[0] if loader == "forge" else version_id
+        try:
+            with trace.span("prefetch", "install"):
+                self.downloader.prefetch_version(self.game_directory, game_version, callback)
+        except Exception as e:
+            callback["setStatus"](f"Parallel prefetch skipped: {e}")
+        if loader in LOADER_PROFILE_URLS:
+            try:
+                with trace.span("prefetch_loader", "install", loader=loader):
+                    self.prefetch_loader(loader, game_version, loader_version, callback)
+            except Exception as e:
+                callback["setStatus"](f"Loader library prefetch skipped: {e}")
+
+        # minecraft_launcher_lib checks (and fills in) the files, installs the loader and the runtime
+        with trace.span("loader_install", "install", loader=loader or "vanilla"):
+            if loader == "fabric":
+                print("Installing Fabric...")
+                # fabric install doesn't support standard callback dict in older versions, checking...
+                # modern minecraft-launcher-lib supports it usually.
+                minecraft_launcher_lib.fabric.install_fabric(version_id, self.game_directory, loader_version=loader_version, callback=callback)
+                version_id = f"fabric-loader-{loader_version}-{version_id}"
+            elif loader == "forge":
+                print("Installing Forge...")
+                minecraft_launcher_lib.forge.install_forge_version(version_id, self.game_directory, callback=callback)
+                version_id = self.installed_forge_id(version_id)
+            elif loader == "quilt":
+                print("Installing Quilt...")
+                minecraft_launcher_lib.quilt.install_quilt(version_id, self.game_directory, loader_version=loader_version, callback=callback)
+                version_id = f"quilt-loader-{loader_version}-{version_id}"
+            else:
+                minecraft_launcher_lib.install.install_minecraft_version(version_id, self.game_directory, callback=callback)
+                # Vanilla ID is just the version itself
             
+        # Loader libraries were fetched by minecraft_launcher_lib, move them into the store too
+        try:
+            with trace.span("adopt", "install"):
+                self.adopt_version(version_id)
+        except Exception as e:
+            callback["setStatus"](f"Artifact store update skipped: {e}")
+
         print(f"Installation of {version_id} complete.")
         return version_id
 
-    def get_aikar_flags(self, ram_mb):
-        """Returns optimization flags based on RAM allocation."""
-        # Aikar's simplified flags for client performance
-        flags = [
-            f"-Xmx{ram_mb}M",
-            f"-Xms{min(ram_mb, 2048)}M", # Don't alloc full RAM at start on potato PC
-            "-XX:+UnlockExperimentalVMOptions",
-            "-XX:+UseG1GC",
-            "-XX:G1NewSizePercent=20",
-            "-XX:G1ReservePercent=20",
-            "-XX:MaxGCPauseMillis=50",
-            "-XX:G1HeapRegionSize=32M",
-            "-XX:+DisableExplicitGC",
-            "-XX:+AlwaysPreTouch",
-            "-XX:+ParallelRefProcEnabled"
-        ]
-        return flags
-
-    def launch(self, version_id, username, ram_mb=2048, java_path=None):
-        """Launches the localized version."""
-        # Generate offline UUID
-        options = {
-            "username": username,
-            "uuid": str(uuid.uuid3(uuid.NAMESPACE_DNS, username)),
-            "token": ""
-        }
+    def prefetch_loader(self, loader, game_version, loader_version, callback=None):
+        """Fetches a Fabric/Quilt loader's libraries through the downloader (store, mirrors, peer),
+        so minecraft_launcher_lib's install finds them in place."""
+        url = LOADER_PROFILE_URLS[loader].format(game_version=game_version, loader_version=loader_version)
+        profile = self.downloader.get_json(url)
+        tasks = self.downloader.library_tasks(self.game_directory, profile.get("libraries", []))
+        return self.downloader.run(tasks, callback)
+
+    def installed_forge_id(self, forge_version):
+        """Version ID the Forge installer created for a Forge version like "1.20.1-47.1.0"."""
+        game_version, _, build = forge_version.partition("-")
+        version_id = f"{game_version}-forge-{build}"
+        if not os.path.isfile(os.path.join(self.game_directory, "versions", version_id, version_id + ".json")):
+            raise ValueError(f"Forge {forge_version} did not install as {version_id}")
+        return version_id
+
+    def adopt_version(self, version_id):
+        """Puts every installed file of a version into the artifact store, replacing duplicates with links.
+        Files that do not match their recorded size and hash are left out, they would become the blob."""
+        count = 0
+        for task in self.downloader.version_tasks(self.game_directory, version_id, fetch=False):
+            if not os.path.isfile(task.path):
+                continue
+            if task.sha1 and self.store.has(task.sha1) and os.path.samefile(self.store.blob_path(task.sha1), task.path):
+                count += 1  # Already a link to the blob
+                continue
+            if task.size is not None and os.path.getsize(task.path) != task.size:
+                print(f"Not adding {task.path} to the store: size mismatch")
+                continue
+            sha1 = sha1_file(task.path)
+            if task.sha1 and sha1 != task.sha1:
+                print(f"Not adding {task.path} to the store: sha1 mismatch")
+                continue
+            self.store.add_file(task.path, sha1)
+            count += 1
+        return count
+
+    def gc_store(self, dry_run=False):
+        """Removes artifact store blobs that no installed version references. Returns (removed, bytes_freed)."""
+        referenced = set()
+        for v in self.get_installed_versions():
+            try:
+                tasks = self.downloader.version_tasks(self.game_directory, v["id"], fetch=False)
+            except (DownloadError, OSError, ValueError) as e:
+                print(f"Skipping {v['id']}: {e}")
+                continue
+            for task in tasks:
+                if task.sha1:
+                    referenced.add(task.sha1)
+                elif os.path.isfile(task.path):
+                    # Maven entries without a recorded hash were adopted by content
+                    sha1 = sha1_file(task.path)
+                    referenced.add(sha1)
+                    if not dry_run:
+                        self.store.add_file(task.path, sha1)
+        return self.store.gc(referenced, dry_run=dry_run)
+
+    def get_jvm_flags(self, ram_mb, runtime=None, profile=tuning.DEFAULT_PROFILE):
+        """Returns optimization flags for the RAM allocation, machine and JVM (see core.tuning)."""
+        return tuning.jvm_flags(ram_mb, runtime, profile)
+
+    def find_java(self, version_id):
+        """Picks the best indexed JVM for the version's javaVersion.majorVersion."""
+        major = self.java.required_major(version_id)
+        runtime = self.java.select(major)
+        if runtime is None:
+            # A JVM may have been installed since the last scan
+            self.java.scan()
+            runtime = self.java.select(major)
+        if runtime is None:
+            wanted = f"Java {major}+" if major and major > 8 else "Java 8"
+            print(f"No {wanted} found, falling back to the system default")
+            import minecraft_launcher_lib
+            return minecraft_launcher_lib.utils.get_java_executable()
+        return runtime["path"]
+
+    def prepare_launch(self, version_id, username, ram_mb=2048, java_path=None, cds=True, timings=None, profile=tuning.DEFAULT_PROFILE, dry_run=False):
+        """Resolves the full command line. Returns (command, cds_mode), cds_mode being
+        "record", "warm" or None. Pass a dict as timings to get the duration of each phase in seconds.
+        dry_run=True is for printing the command: the CDS archive is left as it is."""
+        if timings is None:
+            timings = {}
+        clock = time.perf_counter()
+
+        def phase(name):
+            nonlocal clock
+            now = time.perf_counter()
+            timings[name] = now - clock
+            trace.record(name, clock, now, "launch")
+            clock = now
 
         # Find java if not provided
         if not java_path:
-             # Try to find system java or runtime
-             java_path = minecraft_launcher_lib.utils.get_java_executable()
-
-        # Get command
-        launch_command = minecraft_launcher_lib.command.get_minecraft_command(
-            version=version_id,
-            minecraft_directory=self.game_directory,
-            options=options
-        )
-
-        # Inject optimizations
-        # The library command is a list. We need to find where to inject JVM args.
-        # Usually it's right after the java executable.
-        optimization_flags = self.get_aikar_flags(ram_mb)
-        
-        # Insert flags at index 1 (after java executable)
-        for flag in reversed(optimization_flags):
-            launch_command.insert(1, flag)
+            java_path = self.find_java(version_id)
+        runtime = self.java.info(java_path)
+        phase("java")
+
+        optimization_flags = self.get_jvm_flags(ram_mb, runtime, profile)
+        phase("flags")
+
+        # Warm path: the resolved command only needs the user filled in
+        plan = self.plans.get(version_id, java_path, optimization_flags)
+        phase("plan_lookup")
+
+        if plan is None:
+            import minecraft_launcher_lib
+            # Get command with placeholders instead of the user, so it can be reused for anyone
+            options = {
+                "username": plans.USERNAME,
+                "uuid": plans.UUID,
+                "token": plans.TOKEN,
+                "executablePath": java_path,
+            }
+            base_command = minecraft_launcher_lib.command.get_minecraft_command(
+                version=version_id,
+                minecraft_directory=self.game_directory,
+                options=options
+            )
+
+            # Inject optimizations right after the java executable
+            argv = base_command[:1] + optimization_flags + base_command[1:]
+            plan = self.plans.put(version_id, java_path, optimization_flags, argv, plans.version_sources(self.game_directory, version_id))
+            phase("build_command")
 
+        # Generate offline UUID
+        launch_command = plans.fill(plan["argv"], username, str(uuid.uuid3(uuid.NAMESPACE_DNS, username)))
+        phase("fill")
+
+        cds_mode = None
+        if cds:
+            cds_flags, cds_mode = self.cds.flags(version_id, plan["argv"], plan["sources"], runtime, dry_run=dry_run)
+            launch_command = launch_command[:1] + cds_flags + launch_command[1:]
+            phase("cds")
+
+        return launch_command, cds_mode
+
+    def launch(self, version_id, username, ram_mb=2048, java_path=None, timings=None, cds=True, profile=tuning.DEFAULT_PROFILE, detach=False):
+        """Launches the localized version under the supervisor. Returns the GameProcess.
+
+        Use prepare_launch() to get the command without starting anything."""
+        if timings is None:
+            timings = {}
+        launch_command, cds_mode = self.prepare_launch(version_id, username, ram_mb, java_path, cds, timings, profile)
+
+        if cds_mode == "record":
+            print("Recording a class data sharing archive, later launches will start faster.")
         print(f"Launching with command: {' '.join(launch_command)}")
         
         # Execute
-        subprocess.Popen(launch_command)
+        start = time.perf_counter()
+        process = self.supervisor.spawn(version_id, launch_command, cwd=self.game_directory, cds_mode=cds_mode, detach=detach)
+        timings["spawn"] = time.perf_counter() - start
+        trace.record("spawn", start, category="launch", pid=process.pid)
+        return process
+
+    def _on_game_event(self, process, event, data):
+        # Every supervised launch feeds the CDS cold/warm startup report
+        if event == "startup" and process.cds_mode:
+            self.cds.record_startup(process.version_id, process.cds_mode, data)
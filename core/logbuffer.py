@@ -0,0 +1,93 @@
+import threading
+
+
+class LogBuffer:
+    """Fixed-capacity ring buffer of (level, text) log lines, safe to append from any thread.
+
+    Memory stays constant: once full, the oldest line is overwritten. version increases on
+    every append so a view can tell whether it needs to redraw."""
+
+    def __init__(self, capacity=20000):
+        self.capacity = capacity
+        self._items = [None] * capacity
+        self._start = 0
+        self._len = 0
+        self._lock = threading.Lock()
+        self.version = 0
+        self._counts = {}
+
+    def __len__(self):
+        return self._len
+
+    def append(self, level, text):
+        with self._lock:
+            end = (self._start + self._len) % self.capacity
+            if self._len == self.capacity:
+                evicted = self._items[end][0]
+                self._counts[evicted] -= 1
+                self._start = (self._start + 1) % self.capacity
+            else:
+                self._len += 1
+            self._items[end] = (level, text)
+            self._counts[level] = self._counts.get(level, 0) + 1
+            self.version += 1
+
+    def clear(self):
+        with self._lock:
+            self._start = 0
+            self._len = 0
+            self._items = [None] * self.capacity
+            self._counts = {}
+            self.version += 1
+
+    def count(self, levels=None):
+        """Number of buffered lines, or of those whose level is in levels."""
+        with self._lock:
+            if levels is None:
+                return self._len
+            return sum(self._counts.get(level, 0) for level in levels)
+
+    def lines(self, levels=None):
+        """All buffered lines, oldest first, optionally only those whose level is in levels."""
+        with self._lock:
+            items = self._items[self._start:self._start + self._len]
+            if self._start + self._len > self.capacity:
+                items += self._items[:(self._start + self._len) % self.capacity]
+        if levels is not None:
+            items = [item for item in items if item[0] in levels]
+        return items
+
+    def window(self, count, offset=0, levels=None):
+        """Up to count lines ending offset lines above the newest one: what a view of
+        count rows scrolled up by offset shows. Returns (lines, total_matching).
+        Only the lines near the window are touched, not the whole buffer."""
+        with self._lock:
+            cap, start = self.capacity, self._start
+            if levels is None:
+                total = self._len
+                end = max(0, total - offset)
+                return [self._items[(start + i) % cap] for i in range(max(0, end - count), end)], total
+
+            total = sum(self._counts.get(level, 0) for level in levels)
+            out = []
+            skip = offset
+            for i in range(self._len - 1, -1, -1):
+                item = self._items[(start + i) % cap]
+                if item[0] not in levels:
+                    continue
+                if skip:
+                    skip -= 1
+                    continue
+                out.append(item)
+                if len(out) == count:
+                    break
+            out.reverse()
+            return out, total
+
+    def export(self, path, levels=None):
+        """Writes the buffered lines to a text file. Returns the number of lines written."""
+        items = self.lines(levels)
+        with open(path, "w", encoding="utf-8") as f:
+            for _, text in items:
+                f.write(text + "\n")
+        return len(items)
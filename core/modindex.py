@@ -0,0 +1,244 @@
+from concurrent.futures import ThreadPoolExecutor
+import zipfile
+import json
+import os
+import re
+from core.store import sha1_file
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11, the subset parser below covers mods.toml
+    tomllib = None
+
+INDEX_VERSION = 1
+# Dependencies every mod has, left out of the dependency lists
+PLATFORM_IDS = {"minecraft", "java", "fabricloader", "fabric-loader", "quilt_loader", "forge", "neoforge"}
+
+_TOML_TABLE = re.compile(r"^\[\[?\s*([^\]]+?)\s*\]\]?$")
+_TOML_PAIR = re.compile(r"""^([A-Za-z0-9_.\-"]+)\s*=\s*(".*?"|'.*?'|true|false|[-+\d.]+)\s*(?:#.*)?$""")
+
+
+def _parse_toml(text):
+    """Just enough TOML for mods.toml: [tables], [[arrays of tables]] and single-line string/bool/number values."""
+    root = {}
+    table = root
+    in_multiline = False
+    for line in text.splitlines():
+        line = line.strip()
+        if in_multiline:
+            in_multiline = line.count('"""') % 2 == 0 and line.count("'''") % 2 == 0
+            continue
+        if not line or line.startswith("#"):
+            continue
+        if ('"""' in line and line.count('"""') % 2) or ("'''" in line and line.count("'''") % 2):
+            in_multiline = True
+            continue
+        m = _TOML_TABLE.match(line)
+        if m:
+            *parents, name = [p.strip('"') for p in m.group(1).split(".")]
+            node = root
+            for p in parents:
+                node = node.setdefault(p, {})
+            if line.startswith("[["):
+                table = {}
+                node.setdefault(name, []).append(table)
+            else:
+                table = node.setdefault(name, {})
+            continue
+        m = _TOML_PAIR.match(line)
+        if m:
+            key, value = m.group(1).strip('"'), m.group(2)
+            if value in ("true", "false"):
+                table[key] = value == "true"
+            elif value[0] in "\"'":
+                table[key] = value[1:-1]
+            else:
+                table[key] = value
+    return root
+
+
+def _load_toml(text):
+    if tomllib:
+        try:
+            return tomllib.loads(text)
+        except tomllib.TOMLDecodeError:
+            pass
+    return _parse_toml(text)
+
+
+def _fabric(data):
+    depends = {k: v if isinstance(v, str) else " || ".join(v) for k, v in data.get("depends", {}).items()}
+    return [{
+        "id": data["id"],
+        "version": data.get("version"),
+        "name": data.get("name", data["id"]),
+        "depends": depends,
+        "provides": data.get("provides", []),
+    }]
+
+
+def _quilt(data):
+    loader = data["quilt_loader"]
+    depends = {}
+    for dep in loader.get("depends", []):
+        if isinstance(dep, str):
+            depends[dep] = "*"
+        elif not dep.get("optional"):
+            versions = dep.get("versions", "*")
+            depends[dep["id"]] = versions if isinstance(versions, str) else " || ".join(versions)
+    return [{
+        "id": loader["id"],
+        "version": loader.get("version"),
+        "name": loader.get("metadata", {}).get("name", loader["id"]),
+        "depends": depends,
+        "provides": [p if isinstance(p, str) else p["id"] for p in loader.get("provides", [])],
+    }]
+
+
+def _forge(data, jar_version):
+    mods = []
+    for mod in data.get("mods", []):
+        version = mod.get("version")
+        if not version or "${" in version:
+            version = jar_version  # ${file.jarVersion} comes from the manifest
+        depends = {}
+        for dep in data.get("dependencies", {}).get(mod.get("modId"), []):
+            # Forge uses mandatory = true, NeoForge type = "required"
+            if dep.get("mandatory") or dep.get("type", "").lower() == "required":
+                depends[dep["modId"]] = dep.get("versionRange", "*")
+        mods.append({
+            "id": mod["modId"],
+            "version": version,
+            "name": mod.get("displayName", mod["modId"]),
+            "depends": depends,
+            "provides": [],
+        })
+    return mods
+
+
+def _manifest_version(jar):
+    try:
+        text = jar.read("META-INF/MANIFEST.MF").decode("utf-8", "replace")
+    except KeyError:
+        return None
+    m = re.search(r"^Implementation-Version:\s*(.+?)\s*$", text, re.M)
+    return m.group(1) if m else None
+
+
+def read_jar(path):
+    """Mod metadata of one jar: loader plus a list of {id, version, name, depends, provides}
+    (Forge jars may hold several mods). Only the central directory and the metadata entries are read."""
+    with zipfile.ZipFile(path) as jar:
+        names = set(jar.namelist())
+        if "fabric.mod.json" in names:
+            # strict=False: mod authors leave raw newlines in descriptions
+            return "fabric", _fabric(json.loads(jar.read("fabric.mod.json").decode("utf-8"), strict=False))
+        if "quilt.mod.json" in names:
+            return "quilt", _quilt(json.loads(jar.read("quilt.mod.json").decode("utf-8"), strict=False))
+        for entry, loader in (("META-INF/neoforge.mods.toml", "neoforge"), ("META-INF/mods.toml", "forge")):
+            if entry in names:
+                data = _load_toml(jar.read(entry).decode("utf-8", "replace"))
+                return loader, _forge(data, _manifest_version(jar))
+    return None, []
+
+
+def scan_jar(path):
+    """Index entry for one jar. Unreadable jars get an error instead of metadata."""
+    entry = {"sha1": sha1_file(path), "loader": None, "mods": [], "error": None}
+    try:
+        entry["loader"], entry["mods"] = read_jar(path)
+        for mod in entry["mods"]:
+            mod["depends"] = {k: v for k, v in mod["depends"].items() if k not in PLATFORM_IDS}
+    except (zipfile.BadZipFile, ValueError, KeyError, TypeError, AttributeError) as e:
+        entry["error"] = f"{type(e).__name__}: {e}"
+    return entry
+
+
+class ModIndex:
+    """Metadata of the jars in a mods folder, cached by file name, size and mtime.
+
+    refresh() only opens jars that are new or changed since the last call, in parallel."""
+
+    def __init__(self, mods_path, cache_path, jobs=None):
+        self.mods_path = mods_path
+        self.cache_path = cache_path
+        self.jobs = jobs or min(16, (os.cpu_count() or 1) * 2)
+        self._entries = None
+
+    def _load(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                return data["files"]
+        except (OSError, ValueError, KeyError):
+            pass
+        return {}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp = self.cache_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "files": self._entries}, f)
+        os.replace(tmp, self.cache_path)
+
+    def refresh(self):
+        """Brings the index in line with the folder. Returns {file name: entry}."""
+        if self._entries is None:
+            self._entries = self._load()
+        current = {}
+        if os.path.isdir(self.mods_path):
+            for e in os.scandir(self.mods_path):
+                if e.name.endswith(".jar") and e.is_file():
+                    st = e.stat()
+                    current[e.name] = (st.st_size, st.st_mtime_ns)
+
+        stale = [name for name, (size, mtime) in current.items()
+                 if name not in self._entries
+                 or self._entries[name]["size"] != size or self._entries[name]["mtime_ns"] != mtime]
+        removed = [name for name in self._entries if name not in current]
+
+        if stale:
+            with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+                scanned = pool.map(scan_jar, [os.path.join(self.mods_path, n) for n in stale])
+                for name, entry in zip(stale, scanned):
+                    entry["size"], entry["mtime_ns"] = current[name]
+                    self._entries[name] = entry
+        for name in removed:
+            del self._entries[name]
+        if stale or removed:
+            self._save()
+        return self._entries
+
+    def mods(self):
+        """One row per mod: {file, loader, id, version, name, depends, provides, sha1}, sorted by mod ID."""
+        rows = []
+        for name, entry in self.refresh().items():
+            for mod in entry["mods"]:
+                rows.append(dict(mod, file=name, loader=entry["loader"], sha1=entry["sha1"]))
+        return sorted(rows, key=lambda r: (r["id"], r["file"]))
+
+    def problems(self):
+        """Duplicate and conflicting mod IDs and unreadable jars, as (kind, mod id or file, detail)
+        tuples. "duplicate" = same ID and version in several jars,
+        "conflict" = same ID in different versions."""
+        found = []
+        by_id = {}
+        for row in self.mods():
+            for mod_id in [row["id"]] + row["provides"]:
+                by_id.setdefault(mod_id, {})[row["file"]] = row
+
+        for mod_id, owners in sorted(by_id.items()):
+            if len(owners) < 2:
+                continue
+            owners = list(owners.values())
+            versions = {r["version"] for r in owners}
+            kind = "duplicate" if len(versions) == 1 else "conflict"
+            found.append((kind, mod_id, ", ".join(f"{r['file']} ({r['version']})" for r in owners)))
+
+        for name, entry in sorted(self._entries.items()):
+            if entry["error"]:
+                found.append(("unreadable", name, entry["error"]))
+            elif not entry["mods"]:
+                found.append(("unknown", name, "no fabric.mod.json, quilt.mod.json or mods.toml"))
+        return found
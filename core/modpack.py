@@ -0,0 +1,193 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import zipfile
+import shutil
+import json
+import os
+import re
+from core.downloader import DownloadError
+from core.store import sha1_file
+
+INDEX_NAME = "modrinth.index.json"
+# client-overrides are applied after overrides, so they win
+OVERRIDE_DIRS = ("overrides/", "client-overrides/")
+# modrinth.index.json dependency key -> NanoCore loader name
+LOADERS = {"fabric-loader": "fabric", "quilt-loader": "quilt", "forge": "forge", "neoforge": "neoforge"}
+# Instance content that goes into an exported pack's overrides
+EXPORT_PATHS = ("config", "resourcepacks", "shaderpacks", "options.txt")
+
+
+def safe_path(root, relative):
+    """Joins a path taken from a pack, refusing anything that escapes root."""
+    root = os.path.abspath(root)
+    path = os.path.abspath(os.path.join(root, relative))
+    if os.path.commonpath([root, path]) != root or path == root:
+        raise ValueError(f"Unsafe path in modpack: {relative}")
+    return path
+
+
+def read_index(pack_path):
+    """Reads modrinth.index.json from an .mrpack without extracting anything."""
+    with zipfile.ZipFile(pack_path) as pack:
+        index = json.loads(pack.read(INDEX_NAME).decode("utf-8"))
+    if index.get("game") != "minecraft" or index.get("formatVersion") != 1:
+        raise ValueError(f"Unsupported modpack format: {index.get('game')} v{index.get('formatVersion')}")
+    return index
+
+
+def pack_target(index):
+    """(game version, loader, loader version) of a pack; loader is None for vanilla."""
+    deps = index.get("dependencies", {})
+    for key, loader in LOADERS.items():
+        if key in deps:
+            return deps["minecraft"], loader, deps[key]
+    return deps["minecraft"], None, None
+
+
+def client_files(index):
+    """The index entries a client needs (env.client "unsupported" ones are server-only)."""
+    return [f for f in index.get("files", []) if f.get("env", {}).get("client") != "unsupported"]
+
+
+def _fetch_file(downloader, entry, path):
+    """Downloads one pack file, trying each of its mirrors. Skips files already in place."""
+    if os.path.isfile(path) and os.path.getsize(path) == entry.get("fileSize") \
+            and sha1_file(path) == entry["hashes"].get("sha1"):
+        return 0
+    errors = []
+    for url in entry["downloads"]:
+        try:
+            return downloader.fetch(url, path, size=entry.get("fileSize"), hashes=entry["hashes"], resume=True)
+        except DownloadError as e:
+            errors.append(str(e))
+    raise DownloadError(f"{entry['path']}: " + "; ".join(errors or ["no download URLs"]))
+
+
+def extract_overrides(pack, target):
+    """Streams the override folders of an open pack into target. Returns the number of files written."""
+    count = 0
+    for prefix in OVERRIDE_DIRS:
+        for info in pack.infolist():
+            if not info.filename.startswith(prefix) or info.is_dir():
+                continue
+            dest = safe_path(target, info.filename[len(prefix):])
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            with pack.open(info) as src, open(dest, "wb") as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            count += 1
+    return count
+
+
+def import_pack(core, pack_path, callback=None, jobs=None):
+    """Installs an .mrpack into the core's game directory: loader, every file of the index and the overrides.
+
+    Files are downloaded in one parallel pass (checked against the index hashes) while the overrides
+    are extracted. Returns {"name", "version", "files", "overrides", "failed"}; "version" is the
+    installed version ID to launch."""
+    callback = callback or {}
+    set_status = callback.get("setStatus", print)
+    index = read_index(pack_path)
+    game_version, loader, loader_version = pack_target(index)
+    if loader == "neoforge":
+        raise ValueError("NeoForge modpacks are not supported yet")
+
+    downloader = core.downloader
+    if jobs:
+        downloader.jobs = jobs
+    target = core.game_directory
+    files = client_files(index)
+    # Validate every path before anything is written
+    paths = [safe_path(target, f["path"]) for f in files]
+    for path in paths:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    result = {"name": index.get("name"), "version": None, "files": 0, "overrides": 0, "failed": []}
+    set_status(f"Installing {len(files)} files of {index.get('name')}...")
+    callback.get("setMax", lambda *args: None)(len(files))
+    with ThreadPoolExecutor(max_workers=downloader.jobs) as pool:
+        futures = [pool.submit(_fetch_file, downloader, f, p) for f, p in zip(files, paths)]
+        # The overrides are local, extract them while the downloads run
+        with zipfile.ZipFile(pack_path) as pack:
+            result["overrides"] = extract_overrides(pack, target)
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                future.result()
+                result["files"] += 1
+            except (DownloadError, OSError) as e:
+                result["failed"].append(str(e))
+            callback.get("setProgress", lambda *args: None)(done)
+
+    result["version"] = core.install_version(game_version, loader, callback, loader_version=loader_version)
+    return result
+
+
+def installed_target(game_directory, version_id):
+    """(game version, loader, loader version) of an installed version, from its ID and JSON."""
+    path = os.path.join(game_directory, "versions", version_id, version_id + ".json")
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    game_version = data.get("inheritsFrom", version_id)
+    m = re.match(r"^(fabric|quilt)-loader-(.+)-" + re.escape(game_version) + "$", version_id)
+    if m:
+        return game_version, m.group(1), m.group(2)
+    m = re.match(r"^" + re.escape(game_version) + r"-forge-?(.+)$", version_id)
+    if m:
+        return game_version, "forge", m.group(1)
+    return game_version, None, None
+
+
+def export_pack(manager, version_id, out_path, name=None, pack_version="1.0.0", include=EXPORT_PATHS):
+    """Writes an .mrpack for the mods folder of manager's game directory, set up for version_id.
+
+    Jars Modrinth knows (one bulk hash lookup) are referenced by URL, other jars and the include
+    paths go into overrides/. Returns {"files", "overrides"} counts."""
+    game_directory = manager.game_directory
+    game_version, loader, loader_version = installed_target(game_directory, version_id)
+    deps = {"minecraft": game_version}
+    if loader:
+        deps[{v: k for k, v in LOADERS.items()}[loader]] = loader_version
+
+    entries = manager.index.refresh()
+    by_sha1 = {e["sha1"]: n for n, e in entries.items()}
+    known = manager.api_post("/version_files", {"hashes": list(by_sha1), "algorithm": "sha1"}) if by_sha1 else {}
+
+    files = []
+    local = []
+    for sha1, filename in sorted(by_sha1.items(), key=lambda item: item[1]):
+        version = known.get(sha1)
+        remote = next((f for f in version["files"] if f["hashes"].get("sha1") == sha1), None) if version else None
+        if remote is None:
+            local.append(os.path.join("mods", filename))
+            continue
+        files.append({
+            "path": f"mods/{filename}",
+            "hashes": {"sha1": sha1, "sha512": remote["hashes"]["sha512"]},
+            "env": {"client": "required", "server": "required"},
+            "downloads": [remote["url"]],
+            "fileSize": remote["size"],
+        })
+
+    for item in include:
+        path = os.path.join(game_directory, item)
+        if os.path.isfile(path):
+            local.append(item)
+        elif os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                local += [os.path.relpath(os.path.join(root, n), game_directory) for n in names]
+
+    index = {
+        "formatVersion": 1,
+        "game": "minecraft",
+        "versionId": pack_version,
+        "name": name or version_id,
+        "files": files,
+        "dependencies": deps,
+    }
+    tmp = out_path + ".part"
+    with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as pack:
+        pack.writestr(INDEX_NAME, json.dumps(index, indent=1))
+        for rel in local:
+            # Jars are already compressed, storing them saves time for nothing lost
+            compress = zipfile.ZIP_STORED if rel.endswith(".jar") else zipfile.ZIP_DEFLATED
+            pack.write(os.path.join(game_directory, rel), "overrides/" + rel.replace(os.sep, "/"), compress_type=compress)
+    os.replace(tmp, out_path)
+    return {"files": len(files), "overrides": len(local)}
@@ -1,54 +1,102 @@
 import requests
+from concurrent.futures import ThreadPoolExecutor
+import json
 import os
+from core import trace
+from core.downloader import Downloader, DownloadError, default_peer
+from core.cache import HttpCache
+from core.modindex import ModIndex
+
+MODRINTH_API = "https://api.modrinth.com/v2"
+
+# Seconds a cached response is used without revalidation, by endpoint prefix
+API_TTLS = {
+    "/search": 10 * 60,
+    "/project/": 30 * 60,
+    "/projects": 30 * 60,
+    "/version": 60 * 60,
+}
+DEFAULT_TTL = 5 * 60
+
+# IDs per /projects or /versions call, keeps the query string well under URL limits
+BULK_CHUNK = 100
+# Newest version IDs of each project looked at before falling back to a filtered per-project query
+VERSION_WINDOW = 16
+# Search results per request; Modrinth allows up to 100
+SEARCH_PAGE = 20
+
+
+def primary_file(version):
+    """Returns the primary file entry of a Modrinth version (the first file if none is flagged)."""
+    for f in version["files"]:
+        if f.get("primary"):
+            return f
+    return version["files"][0]
+
+
+def is_compatible(version, game_version, loader):
+    return game_version in version["game_versions"] and loader in version["loaders"]
 
 class ModManager:
-    def __init__(self, game_directory):
+    def __init__(self, game_directory, api_url=MODRINTH_API, peer=None):
         self.game_directory = game_directory
+        self.api_url = api_url.rstrip("/")
         self.mods_path = os.path.join(game_directory, "mods")
         if not os.path.exists(self.mods_path):
             os.makedirs(self.mods_path)
+        # One pooled session for both API calls and file downloads
+        self.downloader = Downloader(jobs=4, peer=peer or default_peer())
+        self.cache = HttpCache(os.path.join(game_directory, "cache", "http"), lambda: self.downloader.session)
+        self.index = ModIndex(self.mods_path, os.path.join(game_directory, "cache", "mod_index.json"))
 
-    def search_modrinth(self, query, version=None, loader=None):
-        """Searches Modrinth for mods."""
-        url = "https://api.modrinth.com/v2/search"
+    def api_get(self, path, params=None):
+        """Cached GET against the Modrinth API. Raises requests exceptions on failure."""
+        ttl = next((t for prefix, t in API_TTLS.items() if path.startswith(prefix)), DEFAULT_TTL)
+        with trace.span("modrinth_get", "modrinth", path=path):
+            return self.cache.get_json(self.api_url + path, params=params, ttl=ttl)
+
+    def api_post(self, path, body):
+        """Uncached POST against the Modrinth API (bulk hash lookups). Raises requests exceptions on failure."""
+        with trace.span("modrinth_post", "modrinth", path=path) as span:
+            response = self.downloader.session.post(self.api_url + path, json=body, timeout=self.downloader.timeout)
+            span.set(status=response.status_code, bytes=len(response.content))
+            response.raise_for_status()
+            return response.json()
+
+    def search_page(self, query, version=None, loader=None, offset=0, limit=SEARCH_PAGE):
+        """One page of Modrinth search results, filtered server-side by game version and loader.
+        Returns the raw response ({"hits", "offset", "limit", "total_hits"}). Raises requests exceptions."""
         params = {
             "query": query,
-            "limit": 5
+            "offset": offset,
+            "limit": limit
         }
-        
-        facets = []
+
+        facets = ['["project_type:mod"]']
         if version:
             facets.append(f'["versions:{version}"]')
         if loader:
             facets.append(f'["categories:{loader}"]')
-            
-        if facets:
-            params["facets"] = "[" + ",".join(facets) + "]"
+        params["facets"] = "[" + ",".join(facets) + "]"
 
-        headers = {
-            "User-Agent": "NanoLauncher/1.0 (launcher@nano.app)"
-        }
-        
-        response = requests.get(url, params=params, headers=headers)
-        if response.status_code == 200:
-            return response.json().get("hits", [])
-        return []
+        return self.api_get("/search", params)
+
+    def search_modrinth(self, query, version=None, loader=None, offset=0, limit=SEARCH_PAGE):
+        """Searches Modrinth for mods."""
+        try:
+            return self.search_page(query, version, loader, offset, limit).get("hits", [])
+        except requests.RequestException as e:
+            print(f"Search failed: {e}")
+            return []
 
     def install_mod(self, project_id, version, loader):
         """Downloads the correct version file for the mod. Client-side filtering for reliability."""
-        url = f"https://api.modrinth.com/v2/project/{project_id}/version"
-        
-        headers = {
-             "User-Agent": "NanoLauncher/1.0 (launcher@nano.app)"
-        }
-
         try:
-            response = requests.get(url, headers=headers)
-            if response.status_code != 200:
-                print(f"Failed to fetch versions: {response.text}")
+            try:
+                versions = self.api_get(f"/project/{project_id}/version")
+            except requests.RequestException as e:
+                print(f"Failed to fetch versions: {e}")
                 return False
-                
-            versions = response.json()
             
             target_version = None
             
@@ -67,30 +115,206 @@ class ModManager:
                 print(f"No compatible version found for {project_id} on {version} ({loader})")
                 return False
             
-            # Download primary file
-            primary_file = target_version["files"][0]
-            for f in target_version["files"]:
-                if f["primary"]:
-                    primary_file = f
-                    break
-            
-            file_url = primary_file["url"]
-            filename = primary_file["filename"]
-            
-            print(f"Downloading {filename}...")
-            r = requests.get(file_url)
-            
             # Ensure mods dir exists for this instance specifically logic to be added, currently shared
             # In a real launcher, we'd have instance separation. For Nano, let's keep it simple:
             # But wait, mods go into <game_dir>/mods usually.
-            
-            save_path = os.path.join(self.mods_path, filename)
-            with open(save_path, "wb") as f:
-                f.write(r.content)
+            filename = self.download_version(target_version)
                 
             print(f"Installed {filename} to {self.mods_path}")
             return True
             
+        except DownloadError as e:
+            print(f"Download failed: {e}")
+            return False
         except Exception as e:
             print(f"Error installing mod: {e}")
             return False
+
+    def download_version(self, version, force=False):
+        """Downloads the primary file of a Modrinth version into mods/. Returns the filename.
+        force replaces an existing file of the same name even if its size matches."""
+        f = primary_file(version)
+        filename = os.path.basename(f["filename"])
+        save_path = os.path.join(self.mods_path, filename)
+        if not force and os.path.isfile(save_path) and os.path.getsize(save_path) == f.get("size"):
+            return filename
+
+        print(f"Downloading {filename}...")
+        # Streamed to <filename>.part and checked against Modrinth's hashes before the rename,
+        # a dropped connection resumes from the partial file on the next attempt.
+        self.downloader.fetch(f["url"], save_path, size=f.get("size"), hashes=f.get("hashes"), resume=True)
+        return filename
+
+    def _bulk_get(self, path, ids):
+        """Runs /projects or /versions for any number of IDs, BULK_CHUNK per request, in parallel."""
+        ids = list(ids)
+        chunks = [ids[i:i + BULK_CHUNK] for i in range(0, len(ids), BULK_CHUNK)]
+        if not chunks:
+            return []
+        with ThreadPoolExecutor(max_workers=min(len(chunks), self.downloader.jobs)) as pool:
+            pages = pool.map(lambda chunk: self.api_get(path, {"ids": json.dumps(chunk)}), chunks)
+            return [item for page in pages for item in page]
+
+    def _pick_versions(self, projects, game_version, loader):
+        """Returns {project_id: newest compatible version} for the given project objects."""
+        window = [vid for p in projects for vid in p.get("versions", [])[-VERSION_WINDOW:]]
+        picked = {}
+        for v in self._bulk_get("/versions", window):
+            if not is_compatible(v, game_version, loader):
+                continue
+            current = picked.get(v["project_id"])
+            if current is None or v["date_published"] > current["date_published"]:
+                picked[v["project_id"]] = v
+
+        # Older game versions sit outside the window, ask Modrinth to filter those projects
+        missing = [p["id"] for p in projects if p["id"] not in picked]
+        if missing:
+            params = {"game_versions": json.dumps([game_version]), "loaders": json.dumps([loader])}
+            with ThreadPoolExecutor(max_workers=min(len(missing), self.downloader.jobs)) as pool:
+                results = pool.map(lambda pid: self.api_get(f"/project/{pid}/version", params), missing)
+                for pid, versions in zip(missing, results):
+                    versions = [v for v in versions if is_compatible(v, game_version, loader)]
+                    if versions:
+                        picked[pid] = max(versions, key=lambda v: v["date_published"])
+        return picked
+
+    def resolve_mods(self, projects, game_version, loader):
+        """Resolves project IDs/slugs plus their required dependencies to one version each.
+
+        Returns (versions, unresolved): versions maps project_id -> version object,
+        unresolved lists the inputs or dependencies with no compatible version."""
+        resolved = {}
+        unresolved = []
+        pinned = set()
+        wanted = list(dict.fromkeys(projects))
+        pinned_ids = []
+        while wanted or pinned_ids:
+            picked = {}
+            # Exact versions pinned by a dependency are taken as they are, if they fit
+            found_ids = set()
+            for v in self._bulk_get("/versions", pinned_ids):
+                found_ids.add(v["id"])
+                if v["project_id"] in resolved or v["project_id"] in picked:
+                    continue
+                if is_compatible(v, game_version, loader):
+                    picked[v["project_id"]] = v
+                else:
+                    unresolved.append(v["project_id"])
+            unresolved += [vid for vid in pinned_ids if vid not in found_ids]
+            resolved.update(picked)
+
+            wanted = [w for w in wanted if w not in resolved]
+            found = self._bulk_get("/projects", wanted)
+            known = {p["id"] for p in found} | {p["slug"] for p in found}
+            unresolved += [w for w in wanted if w not in known]
+
+            todo = []
+            for p in found:
+                if p["id"] in resolved:
+                    continue
+                # Skip the version lookups for mods that can never match
+                if p.get("project_type") == "mod" and p.get("loaders") and loader not in p["loaders"]:
+                    unresolved.append(p["slug"])
+                    continue
+                todo.append(p)
+            chosen = self._pick_versions(todo, game_version, loader)
+            for p in todo:
+                if p["id"] not in chosen:
+                    unresolved.append(p["slug"])
+            resolved.update(chosen)
+            picked.update(chosen)
+
+            # Required dependencies of everything new, pinned or not: exact versions are pinned,
+            # bare projects are looked up in the next round
+            wanted = []
+            pinned_ids = []
+            for v in picked.values():
+                for dep in v.get("dependencies", []):
+                    if dep.get("dependency_type") != "required":
+                        continue
+                    if dep.get("version_id") and dep["version_id"] not in pinned:
+                        pinned.add(dep["version_id"])
+                        pinned_ids.append(dep["version_id"])
+                    elif dep.get("project_id") and dep["project_id"] not in resolved:
+                        wanted.append(dep["project_id"])
+            wanted = [pid for pid in dict.fromkeys(wanted) if pid not in resolved]
+        return resolved, unresolved
+
+    def install_mods(self, projects, version, loader, jobs=None):
+        """Installs several mods and their required dependencies: batched resolution, then one parallel download phase.
+
+        Returns {"installed": [filenames], "unresolved": [ids], "failed": [errors]}."""
+        if jobs:
+            self.downloader.jobs = jobs
+        result = {"installed": [], "unresolved": [], "failed": []}
+        try:
+            with trace.span("resolve_mods", "modrinth", projects=len(projects)):
+                resolved, result["unresolved"] = self.resolve_mods(projects, version, loader)
+        except requests.RequestException as e:
+            result["failed"].append(f"Resolution failed: {e}")
+            return result
+
+        print(f"Resolved {len(resolved)} mods, downloading with {self.downloader.jobs} workers...")
+        with ThreadPoolExecutor(max_workers=self.downloader.jobs) as pool:
+            futures = [pool.submit(self.download_version, v) for v in resolved.values()]
+            for future in futures:
+                try:
+                    result["installed"].append(future.result())
+                except (DownloadError, OSError) as e:
+                    result["failed"].append(str(e))
+        return result
+
+    def check_updates(self, version, loader):
+        """Looks up every installed jar by hash: two bulk requests however many mods there are.
+
+        Returns (updates, unknown). updates is a list of {"file", "mod_id", "project_id", "current",
+        "latest"} (Modrinth version objects) sorted by file, unknown lists jars Modrinth does not know."""
+        entries = self.index.refresh()
+        files = {e["sha1"]: name for name, e in entries.items() if not e["error"]}
+        if not files:
+            return [], []
+        hashes = list(files)
+        current = self.api_post("/version_files", {"hashes": hashes, "algorithm": "sha1"})
+        latest = self.api_post("/version_files/update", {
+            "hashes": hashes, "algorithm": "sha1", "loaders": [loader], "game_versions": [version]})
+
+        updates = []
+        for sha1, new in latest.items():
+            old = current.get(sha1)
+            if old is None or new["id"] == old["id"]:
+                continue
+            # The newest build for this target can be older than what is installed (e.g. a
+            # snapshot build); that is not an update
+            if new["date_published"] <= old["date_published"]:
+                continue
+            mods = entries[files[sha1]]["mods"]
+            updates.append({
+                "file": files[sha1],
+                "mod_id": mods[0]["id"] if mods else None,
+                "project_id": new["project_id"],
+                "current": old,
+                "latest": new,
+            })
+        unknown = sorted(files[sha1] for sha1 in hashes if sha1 not in current)
+        return sorted(updates, key=lambda u: u["file"]), unknown
+
+    def apply_updates(self, updates, jobs=None):
+        """Downloads the new versions in parallel, then removes the replaced jars.
+
+        Returns {"updated": [(old file, new file)], "failed": [errors]}."""
+        if jobs:
+            self.downloader.jobs = jobs
+        result = {"updated": [], "failed": []}
+        with ThreadPoolExecutor(max_workers=self.downloader.jobs) as pool:
+            futures = [(u, pool.submit(self.download_version, u["latest"], True)) for u in updates]
+            for update, future in futures:
+                try:
+                    filename = future.result()
+                except (DownloadError, OSError) as e:
+                    result["failed"].append(f"{update['file']}: {e}")
+                    continue
+                # Same name: the download already replaced the file in place
+                if filename != update["file"]:
+                    os.remove(os.path.join(self.mods_path, update["file"]))
+                result["updated"].append((update["file"], filename))
+        return result
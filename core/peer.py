@@ -0,0 +1,255 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from collections import OrderedDict
+from urllib.parse import urlsplit, parse_qs
+import threading
+import shutil
+import time
+import json
+import re
+import os
+from core import trace
+from core.downloader import DownloadError, SingleFlight, PEER_ENV
+from core.store import sha1_file
+
+DEFAULT_PORT = 8737
+DEFAULT_MAX_BYTES = 10 * 1024 ** 3
+ALIASES_NAME = "sha512.json"
+OWNED_NAME = "peer.json"
+# peer.json is rewritten at most this often (in seconds) while serving, and by save()
+SAVE_INTERVAL = 30
+# Hosts a peer fetches misses from on its clients' behalf, it is not an open proxy
+UPSTREAM_HOSTS = (
+    "piston-meta.mojang.com", "piston-data.mojang.com", "launchermeta.mojang.com", "launcher.mojang.com",
+    "libraries.minecraft.net", "resources.download.minecraft.net",
+    "cdn.modrinth.com",
+    "maven.fabricmc.net", "maven.quiltmc.org", "maven.minecraftforge.net", "maven.neoforged.net",
+)
+HASH_PATTERNS = {"sha1": re.compile(r"^[0-9a-f]{40}$"), "sha512": re.compile(r"^[0-9a-f]{128}$")}
+
+
+class ArtifactCache:
+    """Content-addressed cache shared over the LAN, on top of an ArtifactStore.
+
+    Blobs stay keyed by SHA1; SHA512 keys (Modrinth files) map to them through sha512.json in
+    the store. Misses are fetched from the upstream url once, however many clients ask for the
+    same artifact at the same time, and verified before they are stored.
+
+    Only blobs the cache fetched itself count towards max_bytes and can be evicted, least
+    recently used first. They are listed in peer.json in the store, so serving the launcher's
+    own store never removes its blobs. Recency is kept in memory rather than by touching the
+    files, which may be hardlinked into installs, and written out with save()."""
+
+    def __init__(self, store, downloader, max_bytes=DEFAULT_MAX_BYTES, upstream_hosts=UPSTREAM_HOSTS):
+        self.store = store
+        self.downloader = downloader
+        self.max_bytes = max_bytes
+        self.upstream_hosts = set(upstream_hosts)
+        self.stats = {"hits": 0, "misses": 0, "merged": 0, "rejected": 0, "errors": 0, "evicted": 0,
+                      "upstream_bytes": 0, "served_bytes": 0}
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._aliases_path = os.path.join(store.root, ALIASES_NAME)
+        self._aliases = _read_json(self._aliases_path, {})
+        self._owned_path = os.path.join(store.root, OWNED_NAME)
+        self._lru = OrderedDict()  # sha1 -> size of the blobs fetched here, least recently used first
+        self._size = 0
+        for sha1, size in _read_json(self._owned_path, []):
+            if self.store.has(sha1):
+                self._lru[sha1] = size
+                self._size += size
+        self._saved = time.monotonic()
+        self._evict()
+
+    def count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def status(self):
+        with self._lock:
+            return dict(self.stats, blobs=len(self._lru), bytes=self._size, max_bytes=self.max_bytes)
+
+    def lookup(self, algorithm, digest):
+        """SHA1 of the stored blob for a hash, marked as just used, or None."""
+        with self._lock:
+            sha1 = digest if algorithm == "sha1" else self._aliases.get(digest)
+            if sha1 and self.store.has(sha1):
+                if sha1 in self._lru:
+                    self._lru.move_to_end(sha1)
+                return sha1
+        return None
+
+    def get(self, algorithm, digest, url=None, size=None):
+        """Path of the blob for a hash, fetched from url first if it is not stored yet. None on a
+        miss without a usable url; raises DownloadError if the upstream fetch fails."""
+        sha1 = self.lookup(algorithm, digest)
+        if sha1:
+            self.count("hits")
+            return self.store.blob_path(sha1)
+        if not url:
+            return None
+        if urlsplit(url).hostname not in self.upstream_hosts:
+            self.count("rejected")
+            return None
+        try:
+            sha1, shared = self._flight.do((algorithm, digest), lambda: self._fetch(algorithm, digest, url, size))
+        except DownloadError:
+            self.count("errors")
+            raise
+        self.count("merged" if shared else "misses")
+        return self.store.blob_path(sha1)
+
+    def _fetch(self, algorithm, digest, url, size):
+        with trace.span("peer_upstream", "download", url=url) as span:
+            stored = False  # Already in the store: the launcher's own blob, only the alias is new
+            if algorithm == "sha1":
+                written = self.downloader.fetch(url, self.store.blob_path(digest), digest, size)
+                sha1 = digest
+            else:
+                incoming = os.path.join(self.store.root, "incoming", digest)
+                written = self.downloader.fetch(url, incoming, size=size, hashes={algorithm: digest})
+                sha1 = sha1_file(incoming)
+                stored = self.store.has(sha1)
+                self.store.add_file(incoming, sha1)
+                os.remove(incoming)
+                with self._lock:
+                    self._aliases[digest] = sha1
+                    _write_json(self._aliases_path, self._aliases)
+            span.set(bytes=written)
+        blob_size = os.path.getsize(self.store.blob_path(sha1))
+        with self._lock:
+            self.stats["upstream_bytes"] += written
+            if stored and sha1 not in self._lru:
+                return sha1
+            if sha1 not in self._lru:
+                self._size += blob_size
+            self._lru[sha1] = blob_size
+            self._lru.move_to_end(sha1)
+        self._evict()
+        if time.monotonic() - self._saved > SAVE_INTERVAL:
+            self.save()
+        return sha1
+
+    def save(self):
+        """Writes the fetched blobs, in recency order, to peer.json. Blobs fetched since the last
+        save are left out if the process dies, which only means they are never evicted."""
+        with self._lock:
+            _write_json(self._owned_path, list(self._lru.items()))
+            self._saved = time.monotonic()
+
+    def _evict(self):
+        """Removes least recently used blobs until the cache fits in max_bytes. The newest blob
+        always stays, it is about to be served."""
+        with self._lock:
+            evicted = set()
+            while self._size > self.max_bytes and len(self._lru) > 1:
+                sha1, size = self._lru.popitem(last=False)
+                self._size -= size
+                try:
+                    os.remove(self.store.blob_path(sha1))
+                except OSError:
+                    pass
+                evicted.add(sha1)
+            self.stats["evicted"] += len(evicted)
+            stale = [k for k, v in self._aliases.items() if v in evicted]
+            for k in stale:
+                del self._aliases[k]
+            if stale:
+                _write_json(self._aliases_path, self._aliases)
+        if evicted:
+            self.save()
+
+
+def _read_json(path, default):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def _write_json(path, value):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(value, f)
+    os.replace(tmp, path)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        cache = self.server.cache
+        parts = urlsplit(self.path)
+        segments = parts.path.strip("/").split("/")
+        if segments == ["status"]:
+            self._reply(200, json.dumps(cache.status()).encode("utf-8"), "application/json")
+            return
+        if len(segments) != 2 or segments[0] not in HASH_PATTERNS or not HASH_PATTERNS[segments[0]].match(segments[1]):
+            self._reply(404, b"not found")
+            return
+        query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        try:
+            size = int(query["size"]) if "size" in query else None
+            path = cache.get(segments[0], segments[1], query.get("url"), size)
+        except ValueError:
+            self._reply(400, b"bad size")
+            return
+        except (DownloadError, OSError) as e:
+            self._reply(502, str(e).encode("utf-8"))
+            return
+        if path is None:
+            self._reply(404, b"not found")
+            return
+        try:
+            f = open(path, "rb")
+        except OSError:
+            self._reply(404, b"not found")  # Evicted in the meantime
+            return
+        with f:
+            length = os.fstat(f.fileno()).st_size
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(length))
+            self.end_headers()
+            shutil.copyfileobj(f, self.wfile, 1024 * 1024)
+        cache.count("served_bytes", length)
+
+    def _reply(self, status, data, content_type="text/plain"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class PeerServer(ThreadingHTTPServer):
+    """Serves an ArtifactCache over HTTP:
+
+        GET /sha1/<hash>[?url=<upstream>&size=<bytes>]
+        GET /sha512/<hash>[?url=<upstream>&size=<bytes>]
+        GET /status
+    """
+
+    daemon_threads = True
+
+    def __init__(self, cache, host="0.0.0.0", port=DEFAULT_PORT):
+        super().__init__((host, port), _Handler)
+        self.cache = cache
+        self.started = time.time()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def fetch_status(peer, timeout=5):
+    """A peer's /status as a dict."""
+    from core.downloader import create_session
+    r = create_session(1).get(peer.rstrip("/") + "/status", timeout=timeout)
+    r.raise_for_status()
+    return r.json()
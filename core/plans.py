@@ -0,0 +1,87 @@
+import hashlib
+import json
+import os
+
+# Placeholders baked into cached argv templates, filled in per launch
+USERNAME = "${nano_username}"
+UUID = "${nano_uuid}"
+TOKEN = "${nano_token}"
+
+
+def _sha1(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def version_sources(game_directory, version_id):
+    """Returns the version JSON files a launch depends on, following inheritsFrom."""
+    sources = []
+    while version_id:
+        path = os.path.join(game_directory, "versions", version_id, version_id + ".json")
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        st = os.stat(path)
+        sources.append({"path": path, "mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha1": _sha1(path)})
+        version_id = data.get("inheritsFrom")
+    return sources
+
+
+class LaunchPlanCache:
+    """Stores resolved launch commands so a warm launch skips version JSON parsing and classpath building.
+
+    A plan is looked up by version ID, Java path and JVM flags, and is only used while every
+    version JSON in its inheritance chain still has the recorded mtime/size or, failing that, hash."""
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, version_id, java_path, flags):
+        key = json.dumps([version_id, java_path, flags])
+        return os.path.join(self.root, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, version_id, java_path, flags):
+        """Returns the cached plan ({"argv": template, "sources": version JSONs}) or None."""
+        path = self._path(version_id, java_path, flags)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                plan = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        for source in plan["sources"]:
+            try:
+                st = os.stat(source["path"])
+            except OSError:
+                return None
+            if st.st_mtime_ns == source["mtime_ns"] and st.st_size == source["size"]:
+                continue
+            # Touched but maybe not changed (e.g. reinstall), fall back to the hash
+            if _sha1(source["path"]) != source["sha1"]:
+                return None
+        if not os.path.exists(plan["argv"][0]) and os.path.isabs(plan["argv"][0]):
+            return None
+        return plan
+
+    def put(self, version_id, java_path, flags, argv, sources):
+        path = self._path(version_id, java_path, flags)
+        plan = {"version": version_id, "argv": argv, "sources": sources}
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(plan, f)
+        os.replace(tmp, path)
+        return plan
+
+    def clear(self):
+        for name in os.listdir(self.root):
+            os.remove(os.path.join(self.root, name))
+
+
+def fill(argv, username, uuid, token=""):
+    """Fills the per-user placeholders of an argv template."""
+    out = []
+    for arg in argv:
+        if "${nano_" in arg:
+            arg = arg.replace(USERNAME, username).replace(UUID, uuid).replace(TOKEN, token)
+        out.append(arg)
+    return out
@@ -0,0 +1,59 @@
+from collections import OrderedDict
+import itertools
+import threading
+import time
+
+
+class FrameScheduler:
+    """Queue of UI tasks run on the main thread, a time budget's worth per frame.
+
+    Tasks submitted with a key supersede any pending task with the same key (the latest
+    progress value or button state wins), so bursts collapse into one update. Activity
+    (new tasks, wake()) is timestamped so the render loop can slow down when idle."""
+
+    def __init__(self, budget=0.004):
+        self.budget = budget
+        self._tasks = OrderedDict()
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self.last_activity = time.monotonic()
+
+    def submit(self, func, *args, key=None, **kwargs):
+        """Thread-safe. Returns immediately, func runs on a later frame."""
+        with self._lock:
+            if key is None:
+                key = next(self._ids)
+            else:
+                key = ("key", key)
+                self._tasks.pop(key, None)
+            self._tasks[key] = (func, args, kwargs)
+            self.last_activity = time.monotonic()
+
+    def wake(self):
+        """Marks user activity: keeps the render loop at full speed for a while."""
+        self.last_activity = time.monotonic()
+
+    def pending(self):
+        return bool(self._tasks)
+
+    def idle_for(self):
+        return time.monotonic() - self.last_activity
+
+    def run_frame(self, budget=None):
+        """Runs queued tasks in order until the budget is spent (at least one task per call).
+        Returns the number of tasks run; the rest wait for the next frame."""
+        deadline = time.perf_counter() + (self.budget if budget is None else budget)
+        done = 0
+        while True:
+            with self._lock:
+                if not self._tasks:
+                    break
+                _, (func, args, kwargs) = self._tasks.popitem(last=False)
+            try:
+                func(*args, **kwargs)
+            except Exception as e:
+                print(f"UI task failed: {e}")
+            done += 1
+            if time.perf_counter() >= deadline:
+                break
+        return done
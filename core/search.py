@@ -0,0 +1,107 @@
+import threading
+import time
+
+# Seconds of typing pause before a query is sent
+DEFAULT_DEBOUNCE = 0.3
+
+
+class SearchSession:
+    """Search-as-you-type over a paged search function, one request in flight at a time.
+
+    search(query, version, loader, offset, limit) returns {"hits", "total_hits"}. Every new query
+    bumps seq; a response that comes back for an older seq is dropped, so a slow stale request never
+    overwrites newer results. on_page(seq, offset, hits, total) and on_error(seq, error) are called
+    from the worker thread; consumers that hand results to another thread should check current(seq)
+    again before using them."""
+
+    def __init__(self, search, on_page, on_error=None, debounce=DEFAULT_DEBOUNCE, page_size=20):
+        self.search = search
+        self.on_page = on_page
+        self.on_error = on_error
+        self.debounce = debounce
+        self.page_size = page_size
+        self.seq = 0
+        self._params = None
+        self._due = None  # monotonic time the next request may go out, None = nothing to fetch
+        self._next_offset = 0
+        self._total = None
+        self._busy = False
+        self._failed = False
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def set_query(self, query, version=None, loader=None, immediate=False):
+        """Starts a new search after the debounce delay (or right away). Unchanged parameters are
+        ignored unless immediate. An empty query cancels the search. Returns the new seq."""
+        params = (query.strip(), version or None, loader or None)
+        with self._cond:
+            if params == self._params and not immediate:
+                return self.seq
+            self.seq += 1
+            self._params = params
+            self._next_offset = 0
+            self._total = None
+            self._failed = False
+            self._due = None
+            if params[0]:
+                self._due = time.monotonic() + (0 if immediate else self.debounce)
+                self._start()
+                self._cond.notify()
+            return self.seq
+
+    def load_more(self):
+        """Requests the next page of the current query. Does nothing while a request is pending,
+        before the first page arrived or once every result is loaded. Returns True if queued."""
+        with self._cond:
+            if self._busy or self._due is not None or self._failed or self._total is None:
+                return False
+            if self._next_offset >= self._total:
+                return False
+            self._due = time.monotonic()
+            self._cond.notify()
+            return True
+
+    def current(self, seq):
+        return seq == self.seq
+
+    def has_more(self):
+        return self._total is not None and self._next_offset < self._total
+
+    def _start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True, name="search")
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._due is None or self._due > time.monotonic():
+                    self._cond.wait(None if self._due is None else self._due - time.monotonic())
+                seq, params, offset = self.seq, self._params, self._next_offset
+                self._due = None
+                self._busy = True
+
+            result, error = None, None
+            try:
+                result = self.search(*params, offset, self.page_size)
+            except Exception as e:
+                error = e
+
+            with self._cond:
+                self._busy = False
+                if seq != self.seq:
+                    continue  # The query changed while this request was in flight
+                if error is not None:
+                    self._failed = True
+                else:
+                    hits = result.get("hits", [])
+                    self._next_offset = offset + len(hits)
+                    # An empty page means the index shrank under us, stop paging
+                    self._total = result.get("total_hits", 0) if hits else self._next_offset
+                    total = self._total
+
+            if error is not None:
+                if self.on_error:
+                    self.on_error(seq, error)
+            else:
+                self.on_page(seq, offset, hits, total)
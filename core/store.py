@@ -0,0 +1,104 @@
+import hashlib
+import shutil
+import os
+from core import trace
+
+FICLONE = 0x40049409  # linux/fs.h, lets btrfs/xfs share extents between files
+
+
+def sha1_file(path):
+    h = hashlib.sha1()
+    with trace.span("hash", "io") as span, open(path, "rb") as f:
+        size = 0
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+            size += len(chunk)
+        span.set(bytes=size)
+    return h.hexdigest()
+
+
+def _reflink(src, dst):
+    import fcntl
+    with open(src, "rb") as s, open(dst, "wb") as d:
+        fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+
+
+class ArtifactStore:
+    """SHA1-keyed blob store. Installed files are hardlinks (or reflinks) to the blobs, so
+    the same library jar used by many versions and loaders is stored on disk once."""
+
+    def __init__(self, root):
+        self.root = root
+        self.objects_path = os.path.join(root, "objects")
+        os.makedirs(self.objects_path, exist_ok=True)
+
+    def blob_path(self, sha1):
+        return os.path.join(self.objects_path, sha1[:2], sha1)
+
+    def has(self, sha1):
+        return os.path.isfile(self.blob_path(sha1))
+
+    def link(self, sha1, dest):
+        """Places blob sha1 at dest: hardlink, then reflink, then plain copy. Returns the method used."""
+        src = self.blob_path(sha1)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        tmp = dest + ".link"
+        if os.path.lexists(tmp):
+            os.remove(tmp)
+        method = "hardlink"
+        try:
+            os.link(src, tmp)
+        except OSError:
+            try:
+                _reflink(src, tmp)
+                method = "reflink"
+            except (OSError, ImportError):
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                shutil.copyfile(src, tmp)
+                method = "copy"
+        os.replace(tmp, dest)
+        return method
+
+    def add_file(self, path, sha1=None):
+        """Takes an existing installed file into the store. If an identical blob is already
+        stored the file is replaced by a link to it, otherwise it becomes the blob."""
+        sha1 = sha1 or sha1_file(path)
+        blob = self.blob_path(sha1)
+        if os.path.isfile(blob):
+            if not os.path.samefile(blob, path):
+                self.link(sha1, path)
+            return sha1
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        try:
+            os.link(path, blob)
+        except OSError:
+            shutil.copyfile(path, blob + ".tmp")
+            os.replace(blob + ".tmp", blob)
+        return sha1
+
+    def blobs(self):
+        for prefix in os.listdir(self.objects_path):
+            prefix_path = os.path.join(self.objects_path, prefix)
+            if not os.path.isdir(prefix_path):
+                continue
+            for name in os.listdir(prefix_path):
+                if not name.endswith(".tmp"):
+                    yield name
+
+    def gc(self, referenced, dry_run=False):
+        """Removes every blob whose hash is not in referenced. Returns (removed, bytes_freed).
+        Only blobs with no remaining hardlink count towards bytes_freed."""
+        removed = 0
+        freed = 0
+        for sha1 in list(self.blobs()):
+            if sha1 in referenced:
+                continue
+            path = self.blob_path(sha1)
+            st = os.stat(path)
+            if st.st_nlink <= 1:
+                freed += st.st_size
+            if not dry_run:
+                os.remove(path)
+            removed += 1
+        return removed, freed
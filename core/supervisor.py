@@ -0,0 +1,250 @@
+from collections import deque
+import subprocess
+import tempfile
+import threading
+import time
+import json
+import os
+import re
+from core import trace
+from core.cds import STARTUP_MARKER
+
+# [12:34:56] [Render thread/INFO]: Message   (newer versions add a [logger] part before the colon)
+LOG4J_LINE = re.compile(r"^\[(?P<time>[\d:.]+)\] \[(?P<thread>[^\]]+)/(?P<level>[A-Z]+)\](?: \[[^\]]*\])?: (?P<message>.*)$")
+
+DEFAULT_SAMPLE_INTERVAL = 2.0
+LOG_TAIL = 5000
+
+try:
+    CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+    PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    CLOCK_TICKS = 100
+    PAGE_SIZE = 4096
+
+
+def parse_line(line, last_level="INFO"):
+    """Returns (level, thread, message). Lines without a log4j prefix (stack traces, raw prints)
+    keep the level of the line before them."""
+    m = LOG4J_LINE.match(line)
+    if m:
+        return m.group("level"), m.group("thread"), m.group("message")
+    return last_level, None, line
+
+
+def read_proc(pid):
+    """RSS (bytes), thread count and total CPU seconds of a process from /proc, or None if it is gone."""
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            # The command name may contain spaces, fields start after its closing parenthesis
+            fields = f.read().rsplit(")", 1)[1].split()
+    except (OSError, IndexError):
+        return None
+    return {
+        "cpu_seconds": (int(fields[11]) + int(fields[12])) / CLOCK_TICKS,
+        "threads": int(fields[17]),
+        "rss": int(fields[21]) * PAGE_SIZE,
+    }
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class GameProcess:
+    """One running game: its output is parsed on a reader thread and its resources sampled on another."""
+
+    def __init__(self, supervisor, version_id, argv, cds_mode=None):
+        self.supervisor = supervisor
+        self.version_id = version_id
+        self.argv = argv
+        self.cds_mode = cds_mode
+        self.pid = None
+        self.started = None
+        self.startup_seconds = None
+        self.exit_code = None
+        self.lines = deque(maxlen=LOG_TAIL)
+        self.level_counts = {}
+        self.metrics = {}
+        self._popen = None
+        self._spawned = None  # perf_counter() at spawn, for the startup trace spans
+        self._detached = False
+        self._exited = threading.Event()
+        self._state_lock = threading.Lock()  # The reader and sampler threads both save state
+
+    @property
+    def running(self):
+        if self._detached:
+            if self.exit_code is None:
+                self.exit_code = self._popen.poll()
+            return self.exit_code is None
+        return not self._exited.is_set()
+
+    @property
+    def log_path(self):
+        return os.path.join(self.supervisor.state_dir, f"{self.pid}.log")
+
+    def start(self, cwd=None, detach=False):
+        self.started = time.time()
+        if detach:
+            self._detached = True
+            # Nobody stays around to read a pipe: the game writes straight into the log file
+            os.makedirs(self.supervisor.state_dir, exist_ok=True)
+            # The pid is only known once it runs, a unique name until then
+            fd, tmp_log = tempfile.mkstemp(prefix="starting-", suffix=".log", dir=self.supervisor.state_dir)
+            log = os.fdopen(fd, "w")
+            self._popen = subprocess.Popen(self.argv, cwd=cwd, stdout=log, stderr=subprocess.STDOUT,
+                                           stdin=subprocess.DEVNULL, start_new_session=True)
+            log.close()
+            self.pid = self._popen.pid
+            os.replace(tmp_log, self.log_path)
+            self._save_state()
+            return self
+
+        spawned = time.perf_counter()
+        self._popen = subprocess.Popen(self.argv, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                       stdin=subprocess.DEVNULL, text=True, bufsize=1, errors="replace")
+        self.pid = self._popen.pid
+        self._spawned = spawned
+        self._save_state()
+        threading.Thread(target=self._read, daemon=True, name=f"game-{self.pid}-log").start()
+        threading.Thread(target=self._sample, daemon=True, name=f"game-{self.pid}-metrics").start()
+        return self
+
+    def _read(self):
+        level = "INFO"
+        first_line = True
+        with open(self.log_path, "w", encoding="utf-8") as log:
+            for line in self._popen.stdout:
+                if first_line:
+                    trace.record("jvm_first_line", self._spawned, category="launch", pid=self.pid)
+                    first_line = False
+                line = line.rstrip("\n")
+                log.write(line + "\n")
+                log.flush()
+                level, thread, message = parse_line(line, level)
+                self.level_counts[level] = self.level_counts.get(level, 0) + 1
+                self.lines.append((level, line))
+                if self.startup_seconds is None and STARTUP_MARKER in message:
+                    self.startup_seconds = time.time() - self.started
+                    trace.record("jvm_startup", self._spawned, category="launch", pid=self.pid)
+                    self.supervisor._emit(self, "startup", self.startup_seconds)
+                self.supervisor._emit(self, "line", (level, thread, message))
+        self.exit_code = self._popen.wait()
+        self._exited.set()
+        self._save_state()
+        self.supervisor._emit(self, "exit", self.exit_code)
+
+    def _sample(self):
+        last = None
+        while not self._exited.wait(self.supervisor.sample_interval):
+            now = time.time()
+            stats = read_proc(self.pid)
+            if stats is None:
+                continue
+            if last:
+                stats["cpu_percent"] = 100 * (stats["cpu_seconds"] - last[1]["cpu_seconds"]) / (now - last[0])
+            last = (now, stats)
+            self.metrics = stats
+            self._save_state()
+            self.supervisor._emit(self, "metrics", stats)
+
+    def wait(self, timeout=None):
+        self._exited.wait(timeout)
+        return self.exit_code
+
+    def stop(self):
+        if self._popen and self.running:
+            self._popen.terminate()
+
+    def state(self):
+        running = self.running  # Polls detached children, fills exit_code
+        return {
+            "pid": self.pid,
+            "version": self.version_id,
+            "started": self.started,
+            "startup_seconds": self.startup_seconds,
+            "exit_code": self.exit_code,
+            "running": running,
+            "metrics": self.metrics,
+            "levels": self.level_counts,
+        }
+
+    def _save_state(self):
+        path = os.path.join(self.supervisor.state_dir, f"{self.pid}.json")
+        tmp = path + ".tmp"
+        with self._state_lock:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.state(), f)
+            os.replace(tmp, path)
+
+
+class Supervisor:
+    """Owns the game processes started by this launcher. Listeners are called as
+    listener(process, event, data) with event "line", "startup", "metrics" or "exit",
+    from the process' worker threads.
+
+    State and logs are mirrored to state_dir so other launcher processes (cli.py ps/logs)
+    can inspect instances they did not start."""
+
+    def __init__(self, state_dir, sample_interval=DEFAULT_SAMPLE_INTERVAL):
+        self.state_dir = state_dir
+        self.sample_interval = sample_interval
+        self.processes = {}
+        self._listeners = []
+        os.makedirs(state_dir, exist_ok=True)
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self._listeners.remove(listener)
+
+    def _emit(self, process, event, data):
+        for listener in list(self._listeners):
+            try:
+                listener(process, event, data)
+            except Exception as e:
+                print(f"Supervisor listener failed: {e}")
+
+    def spawn(self, version_id, argv, cwd=None, cds_mode=None, detach=False):
+        process = GameProcess(self, version_id, argv, cds_mode).start(cwd=cwd, detach=detach)
+        self.processes[process.pid] = process
+        return process
+
+    def instances(self, include_exited=False):
+        """States of all known instances, including ones started by other launcher processes."""
+        states = []
+        for name in os.listdir(self.state_dir):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.state_dir, name), "r", encoding="utf-8") as f:
+                    state = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if state["pid"] in self.processes:
+                state = self.processes[state["pid"]].state()
+            elif state["running"] and not pid_alive(state["pid"]):
+                state["running"] = False  # Detached or its supervisor died, exit code unknown
+            if state["running"] or include_exited:
+                states.append(state)
+        return sorted(states, key=lambda s: s["started"])
+
+    def log_path(self, pid):
+        return os.path.join(self.state_dir, f"{pid}.log")
+
+    def prune(self):
+        """Deletes state and logs of instances that are no longer running."""
+        for state in self.instances(include_exited=True):
+            if not state["running"]:
+                for ext in (".json", ".log"):
+                    path = os.path.join(self.state_dir, f"{state['pid']}{ext}")
+                    if os.path.exists(path):
+                        os.remove(path)
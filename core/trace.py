@@ -0,0 +1,166 @@
+import threading
+import time
+import json
+import os
+
+# The active Tracer, None while tracing is off. Every span() call checks it first, so
+# instrumented code costs one global lookup when nobody is tracing.
+_tracer = None
+
+
+class _NullSpan:
+    """Shared stand-in returned while tracing is off."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **args):
+        pass
+
+    def end(self):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """A timed block, used as a context manager (or ended explicitly with end(), also from
+    another thread; it stays on the thread that began it). set() adds arguments, bytes=...
+    is summed in the summary."""
+
+    __slots__ = ("tracer", "name", "category", "args", "start", "tid", "ended")
+
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.tid = threading.get_native_id()
+        self.start = time.perf_counter()
+        self.ended = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.end()
+        return False
+
+    def set(self, **args):
+        self.args.update(args)
+
+    def end(self):
+        if not self.ended:
+            self.ended = True
+            self.tracer.add(self.name, self.category, self.start, time.perf_counter(), self.args, self.tid)
+
+
+class Tracer:
+    """Collects finished spans. Timestamps are time.perf_counter() seconds."""
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.spans = []  # (name, category, start, end, args, thread id)
+        self.threads = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, category, start, end, args, tid=None):
+        tid = tid or threading.get_native_id()
+        with self._lock:
+            self.spans.append((name, category, start, end, args, tid))
+            if tid not in self.threads:
+                self.threads[tid] = _thread_name(tid)
+
+    def chrome_trace(self):
+        """The spans in the Chrome trace event format, for chrome://tracing and ui.perfetto.dev."""
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self.spans)
+            threads = dict(self.threads)
+        events = [{"ph": "M", "name": "process_name", "pid": pid, "tid": 0, "args": {"name": "Nano Launcher"}}]
+        events += [{"ph": "M", "name": "thread_name", "pid": pid, "tid": tid, "args": {"name": name}}
+                   for tid, name in threads.items()]
+        for name, category, start, end, args, tid in sorted(spans, key=lambda s: s[2]):
+            events.append({"ph": "X", "name": name, "cat": category, "pid": pid, "tid": tid,
+                           "ts": round((start - self.origin) * 1e6, 3), "dur": round((end - start) * 1e6, 3),
+                           "args": args})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write(self, path):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f)
+
+    def summary(self):
+        """One row per span name, slowest total first: {"name", "count", "total", "mean", "max", "bytes", "threads"}."""
+        rows = {}
+        with self._lock:
+            spans = list(self.spans)
+        for name, category, start, end, args, tid in spans:
+            row = rows.setdefault(name, {"name": name, "category": category, "count": 0, "total": 0.0,
+                                         "max": 0.0, "bytes": 0, "threads": set()})
+            row["count"] += 1
+            row["total"] += end - start
+            row["max"] = max(row["max"], end - start)
+            row["bytes"] += args.get("bytes") or 0
+            row["threads"].add(tid)
+        for row in rows.values():
+            row["mean"] = row["total"] / row["count"]
+            row["threads"] = len(row["threads"])
+        return sorted(rows.values(), key=lambda r: r["total"], reverse=True)
+
+    def format_summary(self):
+        """The summary as text table lines. Totals of nested or parallel spans overlap."""
+        lines = [f"{'PHASE':<24} {'COUNT':>6} {'TOTAL ms':>10} {'MEAN ms':>9} {'MAX ms':>9} {'MB':>8} {'THREADS':>7}"]
+        for r in self.summary():
+            mb = f"{r['bytes'] / (1024 * 1024):.1f}" if r["bytes"] else "-"
+            lines.append(f"{r['name']:<24} {r['count']:>6} {r['total'] * 1000:>10.1f} {r['mean'] * 1000:>9.2f} "
+                         f"{r['max'] * 1000:>9.1f} {mb:>8} {r['threads']:>7}")
+        return lines
+
+
+def _thread_name(tid):
+    for thread in threading.enumerate():
+        if thread.native_id == tid:
+            return thread.name
+    return str(tid)
+
+
+def span(name, category="launcher", **args):
+    """Context manager timing the block as a span; a no-op when tracing is off."""
+    tracer = _tracer
+    if tracer is None:
+        return NULL_SPAN
+    return Span(tracer, name, category, args)
+
+
+def record(name, start, end=None, category="launcher", **args):
+    """Adds a span for an interval measured elsewhere with time.perf_counter()."""
+    tracer = _tracer
+    if tracer is not None:
+        tracer.add(name, category, start, time.perf_counter() if end is None else end, args)
+
+
+def enabled():
+    return _tracer is not None
+
+
+def start():
+    """Turns tracing on with a fresh Tracer and returns it."""
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+
+def stop():
+    """Turns tracing off and returns the Tracer that was collecting, or None."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
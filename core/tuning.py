@@ -0,0 +1,128 @@
+import os
+
+PROFILES = ("balanced", "low-latency", "low-memory", "throughput")
+DEFAULT_PROFILE = "balanced"
+
+# Left for the OS, the GPU driver and the launcher when capping the heap
+RESERVED_MB = 1536
+
+
+def system_info():
+    """Total/available RAM in MB, usable cores and transparent huge page mode. RAM is None off Linux."""
+    info = {"total_mb": None, "available_mb": None, "cores": os.cpu_count() or 1, "thp": None}
+    if hasattr(os, "sched_getaffinity"):
+        info["cores"] = len(os.sched_getaffinity(0))
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key == "MemTotal":
+                    info["total_mb"] = int(value.split()[0]) // 1024
+                elif key == "MemAvailable":
+                    info["available_mb"] = int(value.split()[0]) // 1024
+    except OSError:
+        pass
+    try:
+        with open("/sys/kernel/mm/transparent_hugepage/enabled", "r") as f:
+            # e.g. "always [madvise] never"
+            info["thp"] = f.read().split("[")[1].split("]")[0]
+    except (OSError, IndexError):
+        pass
+    return info
+
+
+def max_heap_mb(system=None):
+    """Largest heap worth offering (e.g. as the GUI slider limit)."""
+    system = system or system_info()
+    if not system["total_mb"]:
+        return 16384
+    return max(1024, system["total_mb"] - RESERVED_MB)
+
+
+def flag_name(flag):
+    """-XX:+UseG1GC -> UseG1GC, -XX:G1HeapRegionSize=16M -> G1HeapRegionSize, -Xmx4G -> None"""
+    if not flag.startswith("-XX:"):
+        return None
+    name = flag[4:].lstrip("+-")
+    return name.split("=")[0]
+
+
+def supported(flags, runtime):
+    """Drops every -XX option the JVM does not know, so an unsupported flag never stops startup."""
+    known = set(runtime.get("flags", [])) if runtime else set()
+    if not known:
+        return flags
+    return [f for f in flags if flag_name(f) is None or flag_name(f) in known]
+
+
+def _region_size(heap_mb):
+    if heap_mb < 4096:
+        return "8M"
+    if heap_mb < 8192:
+        return "16M"
+    return "32M"
+
+
+def _g1(heap_mb, pause_ms):
+    # Aikar's client settings, with the region size scaled to the heap
+    return [
+        "-XX:+UseG1GC",
+        "-XX:+UnlockExperimentalVMOptions",
+        "-XX:G1NewSizePercent=20" if heap_mb < 12288 else "-XX:G1NewSizePercent=30",
+        "-XX:G1MaxNewSizePercent=40" if heap_mb < 12288 else "-XX:G1MaxNewSizePercent=50",
+        "-XX:G1ReservePercent=20",
+        f"-XX:MaxGCPauseMillis={pause_ms}",
+        f"-XX:G1HeapRegionSize={_region_size(heap_mb)}",
+        "-XX:+ParallelRefProcEnabled",
+        "-XX:+DisableExplicitGC",
+    ]
+
+
+def jvm_flags(ram_mb, runtime=None, profile=DEFAULT_PROFILE, system=None):
+    """Builds the heap, GC, pretouch, large page and GC thread flags for a launch.
+
+    runtime is a JavaIndex entry (major version and supported flags), system comes from system_info()."""
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown profile {profile}, expected one of {', '.join(PROFILES)}")
+    system = system or system_info()
+    major = runtime["major"] if runtime else 8
+
+    heap = min(ram_mb, max_heap_mb(system))
+    if heap < ram_mb:
+        print(f"Capping heap to {heap}M, only {system['total_mb']}M of RAM installed")
+
+    if profile == "low-memory":
+        initial = min(heap, 512)
+    elif profile in ("low-latency", "throughput"):
+        initial = heap  # No heap resizing during play
+    else:
+        initial = min(heap, max(1024, heap // 2))
+    flags = [f"-Xmx{heap}M", f"-Xms{initial}M"]
+
+    if profile == "low-latency" and major >= 21:
+        flags += ["-XX:+UseZGC", "-XX:+ZGenerational"] if major < 23 else ["-XX:+UseZGC"]
+    elif profile == "throughput":
+        flags += ["-XX:+UseParallelGC"]
+    elif profile == "low-memory":
+        flags += ["-XX:+UseG1GC", "-XX:MaxGCPauseMillis=200", "-XX:+UseStringDeduplication", "-XX:+DisableExplicitGC"]
+    elif major >= 21 and heap >= 8192:
+        # Big heaps on 21+: generational ZGC keeps pauses short without G1 tuning
+        flags += ["-XX:+UseZGC", "-XX:+ZGenerational"] if major < 23 else ["-XX:+UseZGC"]
+    else:
+        flags += _g1(heap, 30 if profile == "low-latency" else 50)
+
+    # Touching the whole heap upfront only pays off when it is really there
+    available = system["available_mb"]
+    if profile != "low-memory" and initial == heap and available and available > heap + 1024:
+        flags.append("-XX:+AlwaysPreTouch")
+
+    if profile in ("low-latency", "throughput") and system["thp"] in ("always", "madvise"):
+        flags.append("-XX:+UseTransparentHugePages")
+
+    cores = system["cores"]
+    parallel = cores if cores <= 8 else 8 + (cores - 8) * 5 // 8
+    if profile == "low-memory":
+        parallel = max(1, min(parallel, 2))
+    flags += [f"-XX:ParallelGCThreads={parallel}", f"-XX:ConcGCThreads={max(1, parallel // 4)}"]
+
+    return supported(flags, runtime)
@@ -0,0 +1,137 @@
+from concurrent.futures import ThreadPoolExecutor
+import time
+import json
+import os
+from core.store import sha1_file
+
+
+class Verifier:
+    """Checks the installed files of a version against the hashes in its version JSON and asset index.
+
+    Every file that hashed correctly is remembered by path, size and mtime in cache/verified.json,
+    so later runs only stat those and rehash what changed since."""
+
+    def __init__(self, game_directory, downloader):
+        self.game_directory = game_directory
+        self.downloader = downloader
+        self.manifest_path = os.path.join(game_directory, "cache", "verified.json")
+        self._manifest = None
+
+    def _load(self):
+        if self._manifest is None:
+            try:
+                with open(self.manifest_path, "r", encoding="utf-8") as f:
+                    self._manifest = json.load(f)
+            except (OSError, ValueError):
+                self._manifest = {}
+        return self._manifest
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._manifest, f)
+        os.replace(tmp, self.manifest_path)
+
+    def tasks(self, version_id, repair=True):
+        """Every file of the version, which must be installed. With repair, missing asset indexes
+        are fetched and a corrupt one is deleted and fetched again; without, nothing is written."""
+        # Raises DownloadError for a version that is not installed, verify never installs one
+        self.downloader.resolve_version_json(self.game_directory, version_id, fetch=False)
+        try:
+            return self.downloader.version_tasks(self.game_directory, version_id, fetch=repair)
+        except ValueError:
+            if not repair:
+                raise
+            # json.JSONDecodeError: one of the metadata files is damaged; drop the asset
+            # indexes (version JSONs are rewritten by reinstalling) and try once more
+            indexes = os.path.join(self.game_directory, "assets", "indexes")
+            for name in os.listdir(indexes) if os.path.isdir(indexes) else []:
+                path = os.path.join(indexes, name)
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        json.load(f)
+                except ValueError:
+                    os.remove(path)
+            return self.downloader.version_tasks(self.game_directory, version_id)
+
+    def check(self, tasks):
+        """Sorts tasks into (ok, missing, corrupt) and returns them with the number of files hashed."""
+        manifest = self._load()
+        ok, missing, corrupt, to_hash = [], [], [], []
+        before = len(manifest)
+        for task in tasks:
+            rel = os.path.relpath(task.path, self.game_directory)
+            try:
+                st = os.stat(task.path)
+            except OSError:
+                missing.append(task)
+                manifest.pop(rel, None)
+                continue
+            if task.size is not None and st.st_size != task.size:
+                corrupt.append(task)
+                manifest.pop(rel, None)
+            elif not task.sha1:
+                ok.append(task)  # Nothing to check against beyond presence
+            elif manifest.get(rel) == [st.st_size, st.st_mtime_ns, task.sha1]:
+                ok.append(task)
+            else:
+                to_hash.append((task, rel, st))
+
+        if to_hash:
+            with ThreadPoolExecutor(max_workers=self.downloader.jobs) as pool:
+                hashes = pool.map(lambda item: sha1_file(item[0].path), to_hash)
+                for (task, rel, st), sha1 in zip(to_hash, hashes):
+                    if sha1 == task.sha1:
+                        ok.append(task)
+                        manifest[rel] = [st.st_size, st.st_mtime_ns, sha1]
+                    else:
+                        corrupt.append(task)
+                        manifest.pop(rel, None)
+        if to_hash or len(manifest) != before:
+            self._save()
+        return ok, missing, corrupt, len(to_hash)
+
+    def repair(self, tasks):
+        """Deletes broken files (and their store blobs if those are broken too) and downloads them again."""
+        store = self.downloader.store
+        for task in tasks:
+            if store is not None and task.sha1 and store.has(task.sha1):
+                blob = store.blob_path(task.sha1)
+                # A hardlinked install shares its blob's bytes, so check the blob itself
+                if sha1_file(blob) != task.sha1:
+                    os.remove(blob)
+            if os.path.lexists(task.path):
+                os.remove(task.path)
+        return self.downloader.run(tasks)
+
+    def verify(self, version_id, repair=True):
+        """Checks every file of a version and, with repair, fetches the missing and broken ones.
+
+        Returns {"total", "ok", "hashed", "missing", "corrupt", "repaired", "failed", "errors", "seconds"}:
+        missing/corrupt list the paths found bad, failed the ones still bad afterwards, errors the download errors."""
+        start = time.perf_counter()
+        tasks = self.tasks(version_id, repair)
+        ok, missing, corrupt, hashed = self.check(tasks)
+        report = {
+            "total": len(tasks),
+            "ok": len(ok),
+            "hashed": hashed,
+            "missing": [t.path for t in missing],
+            "corrupt": [t.path for t in corrupt],
+            "repaired": [],
+            "failed": [],
+            "errors": [],
+        }
+        broken = missing + corrupt
+        if repair and broken:
+            report["errors"] = self.repair(broken)["failed"]
+            # Confirm the new files the same way, which also records them in the manifest
+            _, still_missing, still_corrupt, _ = self.check(broken)
+            bad = {t.path for t in still_missing + still_corrupt}
+            report["repaired"] = [t.path for t in broken if t.path not in bad]
+            report["failed"] = sorted(bad)
+        elif broken:
+            report["failed"] = [t.path for t in broken]
+        report["seconds"] = time.perf_counter() - start
+        return report
@@ -0,0 +1,236 @@
+from datetime import datetime
+import threading
+import difflib
+import json
+import os
+from core.downloader import VERSION_MANIFEST_URL
+
+# Loader -> (supported game versions, loader builds)
+LOADER_META = {
+    "fabric": ("https://meta.fabricmc.net/v2/versions/game", "https://meta.fabricmc.net/v2/versions/loader"),
+    "quilt": ("https://meta.quiltmc.org/v3/versions/game", "https://meta.quiltmc.org/v3/versions/loader"),
+}
+# The version JSON a loader's installer writes, libraries included
+LOADER_PROFILE_URLS = {
+    "fabric": "https://meta.fabricmc.net/v2/versions/loader/{game_version}/{loader_version}/profile/json",
+    "quilt": "https://meta.quiltmc.org/v3/versions/loader/{game_version}/{loader_version}/profile/json",
+}
+# {"1.20.1": ["1.20.1-47.1.0", ...], ...}
+FORGE_METADATA_URL = "https://files.minecraftforge.net/net/minecraftforge/forge/maven-metadata.json"
+# Cached lists older than this are revalidated (conditional request) by refresh()
+REFRESH_TTL = 60 * 60
+
+
+def _release_time(value):
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        # Custom clients sometimes carry invalid times
+        return datetime.fromtimestamp(0)
+
+
+class InstalledVersions:
+    """Index of versions/*/*.json. A JSON is only parsed again when its size or mtime changed,
+    and the directory is only listed again when its own mtime changed. Version directories
+    without a readable JSON yet (an install in progress) are checked on every call, since
+    writing the JSON later does not touch the directory's mtime."""
+
+    def __init__(self, game_directory):
+        self.versions_path = os.path.join(game_directory, "versions")
+        self.cache_path = os.path.join(game_directory, "cache", "installed_versions.json")
+        self._dir_mtime = None
+        self._entries = None  # name -> [size, mtime_ns, info]
+        self._pending = []  # Version directories whose JSON is missing or unreadable
+
+    def _load(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data["dir_mtime"], data["entries"], data.get("pending", [])
+        except (OSError, ValueError, KeyError):
+            return None, {}, []
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp = self.cache_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"dir_mtime": self._dir_mtime, "entries": self._entries, "pending": self._pending}, f)
+        os.replace(tmp, self.cache_path)
+
+    def list(self):
+        """Installed versions like minecraft_launcher_lib.utils.get_installed_versions, newest first."""
+        if self._entries is None:
+            self._dir_mtime, self._entries, self._pending = self._load()
+        try:
+            dir_mtime = os.stat(self.versions_path).st_mtime_ns
+        except OSError:
+            return []
+
+        if dir_mtime == self._dir_mtime:
+            names = list(self._entries) + self._pending
+        else:
+            names = os.listdir(self.versions_path)
+        changed = dir_mtime != self._dir_mtime
+        entries = {}
+        pending = []
+        for name in names:
+            path = os.path.join(self.versions_path, name, name + ".json")
+            try:
+                st = os.stat(path)
+            except OSError:
+                if os.path.isdir(os.path.join(self.versions_path, name)):
+                    pending.append(name)
+                changed = changed or name in self._entries
+                continue
+            cached = self._entries.get(name)
+            if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+                entries[name] = cached
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                pending.append(name)  # Probably still being written
+                continue
+            entries[name] = [st.st_size, st.st_mtime_ns, {
+                "id": data["id"],
+                "type": data.get("type", "release"),
+                "releaseTime": data.get("releaseTime"),
+                "complianceLevel": data.get("complianceLevel", 0),
+            }]
+            changed = True
+
+        changed = changed or pending != self._pending
+        self._entries = entries
+        self._pending = pending
+        self._dir_mtime = dir_mtime
+        if changed:
+            self._save()
+        versions = [dict(e[2], releaseTime=_release_time(e[2]["releaseTime"])) for e in entries.values()]
+        # timestamp(): some custom JSONs have naive times, which do not compare with aware ones
+        return sorted(versions, key=lambda v: v["releaseTime"].timestamp(), reverse=True)
+
+    def ids(self):
+        return [v["id"] for v in self.list()]
+
+
+class RemoteVersions:
+    """Mojang's version manifest and the Fabric/Quilt/Forge version lists, kept in the HTTP cache.
+
+    Lookups only read what is cached (they work offline and never block on the network);
+    refresh() revalidates the lists with conditional requests, typically from a background thread.
+    rewrite maps a URL to the one actually requested (Downloader.rewrite, for mirrors)."""
+
+    def __init__(self, cache, rewrite=None):
+        self.cache = cache
+        self.rewrite = rewrite or (lambda url: url)
+        self._data = {}
+        self._lock = threading.Lock()
+        self._refreshing = None
+
+    def _urls(self):
+        return [VERSION_MANIFEST_URL, FORGE_METADATA_URL] + [url for pair in LOADER_META.values() for url in pair]
+
+    def _get(self, url):
+        if url not in self._data:
+            body = self.cache.peek(self.rewrite(url))
+            if body is None:
+                return None
+            with self._lock:
+                self._data[url] = body
+        return self._data[url]
+
+    def refresh(self, ttl=REFRESH_TTL):
+        """Fetches or revalidates every list older than ttl. Returns the URLs that failed."""
+        import requests
+        failed = []
+        for url in self._urls():
+            try:
+                body = self.cache.get_json(self.rewrite(url), ttl=ttl)
+            except (requests.RequestException, ValueError) as e:
+                print(f"Could not refresh {url}: {e}")
+                failed.append(url)
+                continue
+            with self._lock:
+                self._data[url] = body
+        return failed
+
+    def refresh_async(self, on_done=None):
+        """Runs refresh() on a background thread (once at a time). on_done(failed) is called when it ends."""
+        if self._refreshing and self._refreshing.is_alive():
+            return self._refreshing
+
+        def task():
+            failed = self.refresh()
+            if on_done:
+                on_done(failed)
+
+        self._refreshing = threading.Thread(target=task, daemon=True, name="version-lists")
+        self._refreshing.start()
+        return self._refreshing
+
+    def known(self):
+        """True once the Mojang manifest has been cached."""
+        return self._get(VERSION_MANIFEST_URL) is not None
+
+    def game_versions(self, loader=None, types=None):
+        """Game version IDs, newest first. loader limits them to those the loader supports,
+        types (e.g. ("release",)) to those kinds. Empty if nothing is cached yet."""
+        manifest = self._get(VERSION_MANIFEST_URL)
+        if manifest is None:
+            return []
+        ids = [v["id"] for v in manifest["versions"] if types is None or v["type"] in types]
+        if loader in LOADER_META:
+            supported = self._get(LOADER_META[loader][0])
+            if supported is not None:
+                supported = {v["version"] for v in supported}
+                ids = [i for i in ids if i in supported]
+        elif loader == "forge":
+            forge = self._get(FORGE_METADATA_URL)
+            if forge is not None:
+                ids = [i for i in ids if i in forge]
+        return ids
+
+    def loader_versions(self, loader, game_version=None):
+        """Loader builds, newest first. Forge builds are full IDs like 1.20.1-47.1.0."""
+        if loader == "forge":
+            forge = self._get(FORGE_METADATA_URL) or {}
+            return list(reversed(forge.get(game_version, [])))
+        if loader in LOADER_META:
+            return [v["version"] for v in self._get(LOADER_META[loader][1]) or []]
+        return []
+
+    def suggest(self, text, loader=None, limit=8):
+        """Versions starting with text (releases first), or the closest matches if none do."""
+        text = text.strip()
+        if loader == "forge" and "-" in text:
+            builds = self.loader_versions("forge", text.split("-")[0])
+            return [b for b in builds if b.startswith(text)][:limit]
+        ids = self.game_versions(loader)
+        releases = set(self.game_versions(loader, types=("release",)))
+        matches = [i for i in ids if i.startswith(text)]
+        matches.sort(key=lambda i: i not in releases)  # Stable: keeps newest first within each group
+        return matches[:limit] or difflib.get_close_matches(text, ids, n=limit)
+
+    def validate(self, version_id, loader=None):
+        """Returns None if version_id can be installed with loader, else an error message.
+        Returns None too when nothing is cached, so a missing cache never blocks an install."""
+        game_version = version_id.split("-")[0] if loader == "forge" else version_id
+        ids = self.game_versions()
+        if not ids:
+            return None
+        if game_version not in ids:
+            close = difflib.get_close_matches(game_version, ids, n=3)
+            hint = f" Did you mean {', '.join(close)}?" if close else ""
+            return f"Unknown Minecraft version {game_version}.{hint}"
+        supported = self.game_versions(loader)
+        if loader and game_version not in supported:
+            return f"{loader.capitalize()} does not support Minecraft {game_version}."
+        if loader == "forge":
+            builds = self.loader_versions("forge", game_version)
+            if "-" not in version_id:
+                latest = f" (latest: {builds[0]})" if builds else ""
+                return f"Forge needs a full version ID like {game_version}-<forge version>{latest}."
+            if builds and version_id not in builds:
+                return f"Unknown Forge version {version_id}."
+        return None
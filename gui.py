@@ -1,49 +1,162 @@
 import dearpygui.dearpygui as dpg
 import threading
-import queue
-from core.launcher import NanoCore
-from core.mods import ModManager
+from core.tuning import PROFILES, DEFAULT_PROFILE, max_heap_mb
+from core.logbuffer import LogBuffer
+from core.scheduler import FrameScheduler
+from core.search import SearchSession
+from core import modpack, trace
 import time
+import os
 
 # --- Architecture ---
-# Logic runs in threads -> Pushes GUI updates to Queue -> Main Thread renders Queue
+# Logic runs in threads -> Pushes GUI updates to the scheduler -> Main Thread runs them within a frame budget
 # This prevents SEGFAULTS on macOS.
 
-command_queue = queue.Queue()
-core = NanoCore()
-manager = ModManager(core.game_directory)
-
-def queue_ui_task(func, *args, **kwargs):
-    """Push a UI function to run on the main thread."""
-    command_queue.put((func, args, kwargs))
-
-def ui_loop():
-    """Process pending UI updates."""
-    while not command_queue.empty():
-        try:
-            func, args, kwargs = command_queue.get_nowait()
-            func(*args, **kwargs)
-        except queue.Empty:
-            break
+# Per-frame time for UI tasks; the rest of the queue waits for the next frame
+UI_TASK_BUDGET = 0.004
+# Without input or pending work for IDLE_AFTER seconds, render at IDLE_FPS only
+IDLE_AFTER = 2.0
+IDLE_FPS = 5
+
+scheduler = FrameScheduler(UI_TASK_BUDGET)
+# Built by init_backend() once the window is up: NanoCore and ModManager pull in
+# requests and minecraft_launcher_lib, which would otherwise delay the first frame.
+core = None
+manager = None
+search = None
+
+def init_backend():
+    global core, manager, search
+    from core.launcher import NanoCore
+    from core.mods import ModManager, SEARCH_PAGE
+    core = NanoCore()
+    manager = ModManager(core.game_directory)
+    search = SearchSession(manager.search_page, on_search_page, on_search_error, page_size=SEARCH_PAGE)
+
+# Console: writer threads only append to the ring buffer, the main loop redraws
+# a fixed set of text rows from it at most once per frame.
+LOG_CAPACITY = 20000
+CONSOLE_ROWS = 8
+LOG_TYPES = ["INFO", "SYSTEM", "SUCCESS", "INSTALL", "MODS", "GAME", "ERROR"]
+LOG_COLORS = {
+    "ERROR": (255, 50, 50),
+    "SUCCESS": (50, 255, 50),
+    "SYSTEM": (50, 150, 255),
+    "GAME": (150, 150, 150),
+}
+log_buffer = LogBuffer(LOG_CAPACITY)
+# offset: lines scrolled up from the newest. levels is replaced, never changed in place, so
+# render_console and export_console can use it while a filter callback runs
+console_state = {"offset": 0, "levels": frozenset(LOG_TYPES), "drawn": None}
+
+# Mod search: results rows added per UI task, and how close to the bottom (px) the next page is requested
+SEARCH_ROW_BATCH = 5
+SEARCH_PREFETCH_PX = 150
+# rows: row batches queued but not added yet. settle: rows were just added, the table's scroll
+# max is only right after the next frame lays them out
+search_scroll = {"rows": 0, "settle": False}
+
+def queue_ui_task(func, *args, key=None, **kwargs):
+    """Push a UI function to run on the main thread. A pending task with the same key is replaced."""
+    scheduler.submit(func, *args, key=key, **kwargs)
+
+def set_progress(tag, value, overlay=""):
+    dpg.set_value(tag, value)
+    dpg.configure_item(tag, overlay=overlay)
+
+def on_user_input(sender, app_data):
+    scheduler.wake()
 
 # --- UI Callbacks (Executed in Threads usually) ---
 
 def log(message, type="INFO"):
-    def _update():
-        # Add new text item to the child window
-        # Color coding based on type
-        color = (200, 200, 200)
-        if type == "ERROR": color = (255, 50, 50)
-        elif type == "SUCCESS": color = (50, 255, 50)
-        elif type == "SYSTEM": color = (50, 150, 255)
-        
-        dpg.add_text(f"[{type}] {message}", parent="console_output", color=color)
-        
-        # Scroll to bottom
-        y_max = dpg.get_y_scroll_max("console_output")
-        dpg.set_y_scroll("console_output", y_max)
-    
-    queue_ui_task(_update)
+    """Thread-safe, the line shows up on the next frame."""
+    log_buffer.append(type, f"[{type}] {message}")
+    scheduler.wake()
+
+def render_console():
+    """Redraws the visible console rows if anything changed since the last frame."""
+    # None = no filtering, the cheapest path
+    levels = console_state["levels"]
+    levels = None if len(levels) == len(LOG_TYPES) else levels
+    key = (log_buffer.version, console_state["offset"], console_state["levels"])
+    if key == console_state["drawn"]:
+        return
+    console_state["drawn"] = key
+
+    lines, total = log_buffer.window(CONSOLE_ROWS, console_state["offset"], levels)
+    for i in range(CONSOLE_ROWS):
+        if i < len(lines):
+            level, text = lines[i]
+            dpg.set_value(f"console_row_{i}", text)
+            dpg.configure_item(f"console_row_{i}", color=LOG_COLORS.get(level, (200, 200, 200)))
+        else:
+            dpg.set_value(f"console_row_{i}", "")
+
+    # A vertical slider has max_value at the top: the value is the offset, so the thumb sits at
+    # the bottom while the newest lines are shown and at the top for the oldest
+    max_offset = max(0, total - CONSOLE_ROWS)
+    dpg.configure_item("console_scroll", max_value=max(1, max_offset))
+    dpg.set_value("console_scroll", min(console_state["offset"], max_offset))
+
+def scroll_console(delta):
+    total = log_buffer.count(console_state["levels"])
+    max_offset = max(0, total - CONSOLE_ROWS)
+    console_state["offset"] = min(max(0, console_state["offset"] + delta), max_offset)
+
+def on_console_wheel(sender, app_data):
+    if dpg.is_item_hovered("console_output"):
+        scroll_console(int(app_data) * 3)
+
+def on_console_scroll(sender, app_data):
+    total = log_buffer.count(console_state["levels"])
+    console_state["offset"] = min(max(0, app_data), max(0, total - CONSOLE_ROWS))
+
+def on_console_filter(sender, app_data, user_data):
+    if app_data:
+        console_state["levels"] = console_state["levels"] | {user_data}
+    else:
+        console_state["levels"] = console_state["levels"] - {user_data}
+    console_state["offset"] = 0
+
+def export_console(sender, app_data):
+    logs_dir = os.path.join(core.game_directory, "logs")
+    os.makedirs(logs_dir, exist_ok=True)
+    path = os.path.join(logs_dir, time.strftime("launcher-%Y%m%d-%H%M%S.log"))
+    count = log_buffer.export(path, console_state["levels"])
+    log(f"Exported {count} lines to {path}", "SYSTEM")
+
+def on_trace_toggle(sender, app_data):
+    if app_data:
+        trace.start()
+        log("Tracing on: install, mod and launch timings are being recorded.", "SYSTEM")
+        return
+    tracer = trace.stop()
+    if tracer is None:
+        return
+
+    def task():
+        # Serializing thousands of spans would stall a frame
+        path = os.path.join(core.game_directory, "logs", time.strftime("trace-%Y%m%d-%H%M%S.json"))
+        tracer.write(path)
+        for line in tracer.format_summary():
+            log(line, "SYSTEM")
+        log(f"Trace written to {path} (open it in ui.perfetto.dev or chrome://tracing)", "SYSTEM")
+
+    threading.Thread(target=task, daemon=True).start()
+
+def on_game_event(process, event, data):
+    """Supervisor listener: game output and exit status go to the console."""
+    if event == "line":
+        level, thread, message = data
+        log(message, "ERROR" if level in ("ERROR", "FATAL") else "GAME")
+    elif event == "startup":
+        log(f"{process.version_id} ready after {data:.1f}s", "SUCCESS")
+    elif event == "exit":
+        if data == 0:
+            log(f"{process.version_id} (pid {process.pid}) exited.", "SYSTEM")
+        else:
+            log(f"{process.version_id} (pid {process.pid}) crashed with exit code {data}.", "ERROR")
 
 def refresh_versions_ui():
     versions = core.get_installed_versions()
@@ -54,12 +167,13 @@ def refresh_versions_ui():
              dpg.set_value("version_combo", ids[0])
         else:
              dpg.configure_item("version_combo", items=["No versions found"])
-    queue_ui_task(_update)
+    queue_ui_task(_update, key="version_combo")
 
 def launch_game(sender, app_data):
     ver = dpg.get_value("version_combo")
     user = dpg.get_value("username_input")
     ram = dpg.get_value("ram_slider")
+    profile = dpg.get_value("profile_combo")
     
     if not user:
         log("Username is required!", "ERROR")
@@ -70,39 +184,73 @@ def launch_game(sender, app_data):
 
     def task():
         try:
-            core.launch(ver, user, ram)
-            log("Process launched.", "SUCCESS")
+            process = core.launch(ver, user, ram, profile=profile)
+            log(f"Game started (pid {process.pid}).", "SYSTEM")
         except Exception as e:
             log(str(e), "ERROR")
         finally:
-            queue_ui_task(lambda: dpg.configure_item("launch_btn", label="LAUNCH GAME", enabled=True))
+            queue_ui_task(lambda: dpg.configure_item("launch_btn", label="LAUNCH GAME", enabled=True), key="launch_btn")
 
     threading.Thread(target=task, daemon=True).start()
 
+def install_callbacks():
+    """minecraft_launcher_lib style callbacks: status to the console, progress to the install bar."""
+    # Thousands of progress calls collapse into one bar update per frame
+    progress = {"max": 1}
+
+    def progress_callback(curr):
+        value = min(1.0, curr / max(1, progress["max"]))
+        queue_ui_task(set_progress, "install_progress", value, f"{curr}/{progress['max']}", key="install_progress")
+
+    def max_callback(max_val):
+        progress["max"] = max_val
+
+    return {
+        "setStatus": lambda status: log(status, "INSTALL"),
+        "setProgress": progress_callback,
+        "setMax": max_callback
+    }
+
+def update_install_hint(sender=None, app_data=None):
+    """Offline autocomplete and validation for the INSTALL tab, from the cached version lists."""
+    text = dpg.get_value("install_ver_input").strip()
+    loader = dpg.get_value("loader_combo")
+    loader = None if loader == "vanilla" else loader
+    if not text or not core.remote.known():
+        dpg.set_value("install_ver_hint", "" if core.remote.known() else "Version list not downloaded yet.")
+        dpg.configure_item("install_ver_hint", color=(150, 150, 150))
+        dpg.hide_item("install_ver_suggestions")
+        return
+
+    error = core.remote.validate(text, loader)
+    dpg.set_value("install_ver_hint", error or "OK")
+    dpg.configure_item("install_ver_hint", color=(255, 50, 50) if error else (50, 255, 50))
+    matches = [m for m in core.remote.suggest(text, loader) if m != text]
+    dpg.configure_item("install_ver_suggestions", items=matches)
+    if matches:
+        dpg.show_item("install_ver_suggestions")
+    else:
+        dpg.hide_item("install_ver_suggestions")
+
+def pick_install_suggestion(sender, app_data):
+    dpg.set_value("install_ver_input", app_data)
+    update_install_hint()
+
 def install_version_btn(sender, app_data):
-    ver = dpg.get_value("install_ver_input")
+    ver = dpg.get_value("install_ver_input").strip()
     loader = dpg.get_value("loader_combo")
     
     if not ver:
         log("Enter a version.", "ERROR")
         return
+    error = core.remote.validate(ver, loader if loader != "vanilla" else None)
+    if error:
+        log(error, "ERROR")
+        return
         
     dpg.configure_item("install_btn", label="Installing...", enabled=False)
     log(f"Starting optimized install of {ver}...", "SYSTEM")
-    
-    # Callback for detailed logging
-    def status_callback(status):
-        log(status, "INSTALL")
-        
-    def progress_callback(curr, max_val):
-        # Optional: could update a progress bar here
-        pass
-
-    callbacks = {
-        "setStatus": status_callback,
-        "setProgress": progress_callback,
-        "setMax": lambda m: None
-    }
+    callbacks = install_callbacks()
 
     def task():
         try:
@@ -113,50 +261,97 @@ def install_version_btn(sender, app_data):
         except Exception as e:
              log(f"Install failed: {str(e)}", "ERROR")
         finally:
-             queue_ui_task(lambda: dpg.configure_item("install_btn", label="INSTALL", enabled=True))
+             queue_ui_task(lambda: dpg.configure_item("install_btn", label="INSTALL", enabled=True), key="install_btn")
 
     threading.Thread(target=task, daemon=True).start()
 
-def search_mods_btn(sender, app_data):
-    query = dpg.get_value("mod_search_input")
-    if not query: return
-    
-    # Clear table
-    dpg.delete_item("mod_results_table", children_only=True)
-    dpg.add_text("Searching...", parent="mod_results_table", tag="searching_txt")
-    
+def import_pack_selected(sender, app_data):
+    path = app_data.get("file_path_name")
+    if not path or not os.path.isfile(path):
+        return
+    dpg.configure_item("import_pack_btn", label="Importing...", enabled=False)
+    log(f"Importing modpack {os.path.basename(path)}...", "SYSTEM")
+
     def task():
-        results = manager.search_modrinth(query)
-        
-        def _build_table():
-            dpg.delete_item("searching_txt")
-            # Clear previous results but we must restore columns!
-            # Actually, let's just clear rows. 
-            # DPG Trick: Create a 'staging' row or manage IDs? 
-            # Simpler: Just re-create columns.
-            dpg.delete_item("mod_results_table", children_only=True)
-            dpg.add_table_column(label="Mod Name", parent="mod_results_table", width_stretch=True)
-            dpg.add_table_column(label="Author", parent="mod_results_table", width_fixed=True, init_width_or_weight=100)
-            dpg.add_table_column(label="Action", parent="mod_results_table", width_fixed=True, init_width_or_weight=80)
-
-            if not results:
-                with dpg.table_row(parent="mod_results_table"):
-                    dpg.add_text("No results found.")
-                return
-
-            for mod in results:
-                # Unique tags are needed if we want to reference them, but rows don't need distinct tags usually
-                with dpg.table_row(parent="mod_results_table"):
-                    dpg.add_text(mod['title'])
-                    dpg.add_text(mod['author'])
-                    
-                    # Store mod data in user_data for valid access
-                    dpg.add_button(label="Install", user_data=mod, callback=install_mod_callback)
-        
-        queue_ui_task(_build_table)
+        try:
+            result = modpack.import_pack(core, path, callback=install_callbacks())
+            for error in result["failed"]:
+                log(error, "ERROR")
+            log(f"Installed {result['name']}: {result['files']} files, {result['overrides']} overrides, version {result['version']}", "SUCCESS")
+            refresh_versions_ui()
+        except Exception as e:
+            log(f"Modpack import failed: {str(e)}", "ERROR")
+        finally:
+            queue_ui_task(lambda: dpg.configure_item("import_pack_btn", label="IMPORT .MRPACK", enabled=True), key="import_pack_btn")
 
     threading.Thread(target=task, daemon=True).start()
 
+def search_params():
+    return dpg.get_value("mod_search_input"), dpg.get_value("mod_target_ver").strip(), dpg.get_value("mod_loader_combo")
+
+def on_search_changed(sender, app_data):
+    """Search-as-you-type: every edit (or target change) restarts the debounce timer."""
+    query = search_params()[0]
+    search.set_query(*search_params())
+    dpg.set_value("mod_search_status", "Searching..." if query.strip() else "")
+    if not query.strip():
+        dpg.delete_item("mod_results_table", children_only=True, slot=1)
+
+def search_mods_btn(sender, app_data):
+    if not dpg.get_value("mod_search_input").strip(): return
+    search.set_query(*search_params(), immediate=True)
+    dpg.set_value("mod_search_status", "Searching...")
+
+def on_search_page(seq, offset, hits, total):
+    # Search worker thread -> main thread
+    queue_ui_task(_show_search_page, seq, offset, hits, total)
+
+def on_search_error(seq, error):
+    log(f"Search failed: {error}", "ERROR")
+    queue_ui_task(_show_search_error, seq)
+
+def _show_search_error(seq):
+    if search.current(seq):
+        dpg.set_value("mod_search_status", "Search failed. Press Search to retry.")
+
+def _show_search_page(seq, offset, hits, total):
+    if not search.current(seq):
+        return
+    if offset == 0:
+        # Only the rows go, the columns (slot 0) stay
+        dpg.delete_item("mod_results_table", children_only=True, slot=1)
+        dpg.set_y_scroll("mod_results_table", 0)
+    shown = offset + len(hits)
+    dpg.set_value("mod_search_status", f"{shown} of {total} results" if total else "No results found.")
+    # A few rows per task, so a page never stalls a frame
+    for i in range(0, len(hits), SEARCH_ROW_BATCH):
+        search_scroll["rows"] += 1
+        queue_ui_task(_add_search_rows, seq, hits[i:i + SEARCH_ROW_BATCH])
+    search_scroll["settle"] = True
+
+def _add_search_rows(seq, mods):
+    search_scroll["rows"] -= 1
+    search_scroll["settle"] = True
+    if not search.current(seq):
+        return
+    for mod in mods:
+        with dpg.table_row(parent="mod_results_table"):
+            dpg.add_text(mod['title'])
+            dpg.add_text(mod['author'])
+            # Store mod data in user_data for valid access
+            dpg.add_button(label="Install", user_data=mod, callback=install_mod_callback)
+
+def check_search_scroll():
+    """Fetches the next page once the results table is scrolled near its end. Waits while the
+    Mods tab is hidden and until the rows added last are laid out."""
+    if search_scroll["rows"] or not search.has_more() or not dpg.is_item_visible("mod_results_table"):
+        return
+    if search_scroll["settle"]:
+        search_scroll["settle"] = False
+        return
+    if dpg.get_y_scroll("mod_results_table") >= dpg.get_y_scroll_max("mod_results_table") - SEARCH_PREFETCH_PX:
+        search.load_more()
+
 def install_mod_callback(sender, app_data, user_data):
     # user_data contains the mod dict
     mod = user_data
@@ -169,7 +364,11 @@ def install_mod_callback(sender, app_data, user_data):
     dpg.configure_item(sender, label="...", enabled=False)
 
     def task():
-        success = manager.install_mod(mod['project_id'], t_ver, loader)
+        # Bulk path so required dependencies come along
+        result = manager.install_mods([mod['project_id']], t_ver, loader)
+        success = bool(result["installed"]) and not result["failed"]
+        for dep in result["installed"]:
+            log(f"+ {dep}", "MODS")
         def _finish():
             if success:
                 dpg.configure_item(sender, label="Done")
@@ -199,6 +398,9 @@ def create_gui():
 
     dpg.bind_theme(global_theme)
 
+    with dpg.file_dialog(tag="import_pack_dialog", show=False, callback=import_pack_selected, width=600, height=400):
+        dpg.add_file_extension(".mrpack")
+
     with dpg.window(tag="Primary Window", no_title_bar=True):
         
         dpg.add_text("NANO LAUNCHER", color=(30, 200, 100))
@@ -218,7 +420,13 @@ def create_gui():
                 
                 with dpg.group(horizontal=True):
                     dpg.add_text("RAM:    ", color=(150, 150, 150))
-                    dpg.add_slider_int(tag="ram_slider", min_value=1024, max_value=16384, default_value=4096, width=300)
+                    # Slider stops at what the machine can actually give the game
+                    ram_limit = max_heap_mb()
+                    dpg.add_slider_int(tag="ram_slider", min_value=1024, max_value=ram_limit, default_value=min(4096, ram_limit), width=300)
+
+                with dpg.group(horizontal=True):
+                    dpg.add_text("Tuning: ", color=(150, 150, 150))
+                    dpg.add_combo(tag="profile_combo", items=list(PROFILES), default_value=DEFAULT_PROFILE, width=300)
                 
                 dpg.add_spacer(height=20)
                 dpg.add_button(tag="launch_btn", label="LAUNCH GAME", callback=launch_game, width=400, height=60)
@@ -226,22 +434,30 @@ def create_gui():
             with dpg.tab(label=" INSTALL "):
                 dpg.add_spacer(height=20)
                 dpg.add_text("Install new instance:")
-                dpg.add_input_text(tag="install_ver_input", hint="e.g. 1.20.1", width=300)
-                dpg.add_combo(tag="loader_combo", items=["vanilla", "fabric", "forge", "quilt"], default_value="vanilla", width=300)
+                dpg.add_input_text(tag="install_ver_input", hint="e.g. 1.20.1", width=300, callback=update_install_hint)
+                dpg.add_text("", tag="install_ver_hint", color=(150, 150, 150))
+                dpg.add_listbox(tag="install_ver_suggestions", items=[], num_items=4, width=300, show=False,
+                                callback=pick_install_suggestion)
+                dpg.add_combo(tag="loader_combo", items=["vanilla", "fabric", "forge", "quilt"], default_value="vanilla", width=300,
+                              callback=update_install_hint)
                 dpg.add_spacer(height=10)
                 dpg.add_button(tag="install_btn", label="INSTALL", callback=install_version_btn, width=200)
+                dpg.add_progress_bar(tag="install_progress", default_value=0.0, width=300)
+                dpg.add_spacer(height=10)
+                dpg.add_button(tag="import_pack_btn", label="IMPORT .MRPACK", width=200,
+                               callback=lambda: dpg.show_item("import_pack_dialog"))
 
             with dpg.tab(label=" MODS "):
                 dpg.add_spacer(height=20)
                 with dpg.group(horizontal=True):
-                    dpg.add_input_text(tag="mod_search_input", hint="Search Modrinth...", width=400)
+                    dpg.add_input_text(tag="mod_search_input", hint="Search Modrinth...", width=400, callback=on_search_changed)
                     dpg.add_button(label="Search", callback=search_mods_btn)
                 
                 dpg.add_spacer(height=10)
                 dpg.add_text("Target:", color=(150, 150, 150))
                 with dpg.group(horizontal=True):
-                     dpg.add_input_text(tag="mod_target_ver", default_value="1.20.1", width=100)
-                     dpg.add_combo(tag="mod_loader_combo", items=["fabric", "forge", "quilt"], default_value="fabric", width=100)
+                     dpg.add_input_text(tag="mod_target_ver", default_value="1.20.1", width=100, callback=on_search_changed)
+                     dpg.add_combo(tag="mod_loader_combo", items=["fabric", "forge", "quilt"], default_value="fabric", width=100, callback=on_search_changed)
 
                 dpg.add_spacer(height=10)
                 # Results Table
@@ -250,6 +466,7 @@ def create_gui():
                     dpg.add_table_column(label="Name", width_stretch=True)
                     dpg.add_table_column(label="Author", width_fixed=True, init_width_or_weight=100)
                     dpg.add_table_column(label="Action", width_fixed=True, init_width_or_weight=80)
+                dpg.add_text("", tag="mod_search_status", color=(150, 150, 150))
             
             with dpg.tab(label=" ABOUT "):
                 dpg.add_text("Nano Launcher v1.0")
@@ -259,25 +476,54 @@ def create_gui():
         # Console Log Area
         dpg.add_spacer(height=20)
         dpg.add_separator()
-        dpg.add_text("SYSTEM LOG", color=(100, 100, 100))
-        # Use child window for log
-        with dpg.child_window(tag="console_output", height=150, width=-1, border=True):
-             pass
+        with dpg.group(horizontal=True):
+            dpg.add_text("SYSTEM LOG", color=(100, 100, 100))
+            for log_type in LOG_TYPES:
+                dpg.add_checkbox(label=log_type, default_value=True, user_data=log_type, callback=on_console_filter)
+            dpg.add_button(label="Export", callback=export_console)
+            dpg.add_checkbox(label="Trace", callback=on_trace_toggle)
+        # Fixed rows fed from the ring buffer: the widget count never grows with the log
+        with dpg.group(horizontal=True):
+            with dpg.child_window(tag="console_output", height=150, width=-40, border=True, no_scrollbar=True):
+                for i in range(CONSOLE_ROWS):
+                    dpg.add_text("", tag=f"console_row_{i}")
+            dpg.add_slider_int(tag="console_scroll", vertical=True, height=150, width=30, min_value=0, max_value=1,
+                               format="", callback=on_console_scroll)
+
+    with dpg.handler_registry():
+        dpg.add_mouse_wheel_handler(callback=on_console_wheel)
+        # Any input brings the render loop back to full speed
+        dpg.add_mouse_move_handler(callback=on_user_input)
+        dpg.add_mouse_click_handler(callback=on_user_input)
+        dpg.add_mouse_wheel_handler(callback=on_user_input)
+        dpg.add_key_press_handler(callback=on_user_input)
 
     dpg.setup_dearpygui()
     dpg.show_viewport()
     dpg.set_primary_window("Primary Window", True)
-    
+    # Show the window before the heavy imports
+    dpg.render_dearpygui_frame()
+    init_backend()
+
     # Load initial data
     refresh_versions_ui()
+    # Version lists for autocomplete: cached copy right away, revalidated in the background
+    core.remote.refresh_async(on_done=lambda failed: queue_ui_task(update_install_hint, key="install_ver_hint"))
+    core.supervisor.add_listener(on_game_event)
 
     # --- MANUAL RENDER LOOP ---
     # This keeps the main thread free to handle OS events and our UI queue
     while dpg.is_dearpygui_running():
-        # process queue
-        ui_loop()
+        frame_start = time.perf_counter()
+        # run this frame's share of the queue
+        scheduler.run_frame()
+        render_console()
+        check_search_scroll()
         # render frame
         dpg.render_dearpygui_frame()
+        # idle: nothing queued and no input for a while, stop redrawing at full rate
+        if not scheduler.pending() and scheduler.idle_for() > IDLE_AFTER:
+            time.sleep(max(0.0, 1.0 / IDLE_FPS - (time.perf_counter() - frame_start)))
 
     dpg.destroy_context()
 